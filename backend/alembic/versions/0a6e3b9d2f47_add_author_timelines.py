@@ -0,0 +1,49 @@
+"""add author timelines
+
+Revision ID: 0a6e3b9d2f47
+Revises: f2a7d9c3b614
+Create Date: 2026-10-18 12:41:09.512876
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6e3b9d2f47'
+down_revision: Union[str, None] = 'f2a7d9c3b614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination of an author's posts and comments on (created_at, id)
+    op.create_index('ix_posts_author_id_created_at_id', 'posts', ['author_id', 'created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_comments_author_id_created_at_id', 'comments', ['author_id', 'created_at', 'id'], unique=False
+    )
+
+    op.add_column('users', sa.Column('post_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('likes_received', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill, afterwards kept up to date by `app.crud.user.increment_aggregates`
+    # and `reconcile_counters.py`
+    op.execute(
+        "UPDATE users SET "
+        "post_count = (SELECT count(*) FROM posts WHERE posts.author_id = users.id), "
+        "comment_count = (SELECT count(*) FROM comments WHERE comments.author_id = users.id), "
+        "likes_received = "
+        "(SELECT coalesce(sum(likes_count), 0) FROM posts WHERE posts.author_id = users.id) + "
+        "(SELECT coalesce(sum(likes_count), 0) FROM comments WHERE comments.author_id = users.id)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'likes_received')
+    op.drop_column('users', 'comment_count')
+    op.drop_column('users', 'post_count')
+    op.drop_index('ix_comments_author_id_created_at_id', table_name='comments')
+    op.drop_index('ix_posts_author_id_created_at_id', table_name='posts')
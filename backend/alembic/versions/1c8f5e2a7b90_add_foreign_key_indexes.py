@@ -0,0 +1,37 @@
+"""add foreign key indexes
+
+Revision ID: 1c8f5e2a7b90
+Revises: 0a6e3b9d2f47
+Create Date: 2026-10-18 13:10:26.094315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c8f5e2a7b90'
+down_revision: Union[str, None] = '0a6e3b9d2f47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Foreign keys that no other index leads with; every one of them is
+    # searched when its parent row is deleted
+    op.create_index('ix_comments_parent_id', 'comments', ['parent_id'], unique=False)
+    op.create_index('ix_blacklisted_tokens_user_id', 'blacklisted_tokens', ['user_id'], unique=False)
+    # The unique (user_id, target) indexes only serve lookups by user
+    op.create_index('ix_post_reactions_post_id_is_like', 'post_reactions', ['post_id', 'is_like'], unique=False)
+    op.create_index(
+        'ix_comment_reactions_comment_id_is_like', 'comment_reactions', ['comment_id', 'is_like'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_comment_reactions_comment_id_is_like', table_name='comment_reactions')
+    op.drop_index('ix_post_reactions_post_id_is_like', table_name='post_reactions')
+    op.drop_index('ix_blacklisted_tokens_user_id', table_name='blacklisted_tokens')
+    op.drop_index('ix_comments_parent_id', table_name='comments')
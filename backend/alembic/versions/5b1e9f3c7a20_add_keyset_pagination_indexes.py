@@ -0,0 +1,34 @@
+"""add keyset pagination indexes
+
+Revision ID: 5b1e9f3c7a20
+Revises: 14c60885b93f
+Create Date: 2026-10-18 09:12:04.318255
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e9f3c7a20'
+down_revision: Union[str, None] = '14c60885b93f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Composite indexes backing cursor pagination on (created_at, id)
+    op.create_index('ix_posts_created_at_id', 'posts', ['created_at', 'id'], unique=False)
+    op.create_index(
+        'ix_comments_post_id_parent_id_created_at_id',
+        'comments',
+        ['post_id', 'parent_id', 'created_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_comments_post_id_parent_id_created_at_id', table_name='comments')
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
@@ -0,0 +1,42 @@
+"""add comment counter to posts
+
+Revision ID: 6e2d0c4b9a15
+Revises: 1c8f5e2a7b90
+Create Date: 2026-10-18 15:42:08.513276
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e2d0c4b9a15'
+down_revision: Union[str, None] = '1c8f5e2a7b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill in id-range batches, afterwards kept up to date by
+    # `app.crud.comment` and `reconcile_counters.py`
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text('SELECT max(id) FROM posts')).scalar() or 0
+    for start in range(0, max_id + 1, BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                'UPDATE posts SET comment_count = '
+                '(SELECT count(*) FROM comments WHERE comments.post_id = posts.id) '
+                'WHERE id >= :start AND id < :end'
+            ),
+            {'start': start, 'end': start + BATCH_SIZE},
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('posts', 'comment_count')
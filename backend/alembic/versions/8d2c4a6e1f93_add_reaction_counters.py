@@ -0,0 +1,43 @@
+"""add reaction counters to posts and comments
+
+Revision ID: 8d2c4a6e1f93
+Revises: 5b1e9f3c7a20
+Create Date: 2026-10-18 10:41:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2c4a6e1f93'
+down_revision: Union[str, None] = '5b1e9f3c7a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('posts', 'comments'):
+        op.add_column(table, sa.Column('likes_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('dislikes_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the reaction tables, afterwards kept up to date by the
+    # like/dislike endpoints and `reconcile_counters.py`
+    op.execute(
+        "UPDATE posts SET "
+        "likes_count = (SELECT count(*) FROM post_likes WHERE post_likes.post_id = posts.id), "
+        "dislikes_count = (SELECT count(*) FROM post_dislikes WHERE post_dislikes.post_id = posts.id)"
+    )
+    op.execute(
+        "UPDATE comments SET "
+        "likes_count = (SELECT count(*) FROM comment_likes WHERE comment_likes.comment_id = comments.id), "
+        "dislikes_count = (SELECT count(*) FROM comment_dislikes WHERE comment_dislikes.comment_id = comments.id)"
+    )
+
+
+def downgrade() -> None:
+    for table in ('comments', 'posts'):
+        op.drop_column(table, 'dislikes_count')
+        op.drop_column(table, 'likes_count')
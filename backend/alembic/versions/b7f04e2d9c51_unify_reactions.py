@@ -0,0 +1,78 @@
+"""move likes and dislikes into post_reactions and comment_reactions
+
+Revision ID: b7f04e2d9c51
+Revises: 8d2c4a6e1f93
+Create Date: 2026-10-18 11:26:53.540871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f04e2d9c51'
+down_revision: Union[str, None] = '8d2c4a6e1f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+
+def _copy(source: str, target: str, fk: str, is_like: bool) -> None:
+    """
+    Copy a legacy like/dislike table into its reaction table in id-range
+    batches, which keeps each statement small but all of them run in the
+    migration's transaction.
+
+    Duplicate rows for the same user collapse into one, and when a user has
+    both a like and a dislike the most recent one wins (compared against the
+    copied row's `updated_at`, keeping its `created_at`). Rows written to the
+    legacy tables after the migration are copied by `backfill_reactions.py`.
+    """
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text(f"SELECT max(id) FROM {source}")).scalar() or 0
+    flag = 'true' if is_like else 'false'
+    for start in range(0, max_id + 1, BATCH_SIZE):
+        bind.execute(
+            sa.text(
+                f"INSERT INTO {target} (user_id, {fk}, is_like, created_at, updated_at) "
+                f"SELECT user_id, {fk}, {flag}, max(created_at), max(created_at) FROM {source} "
+                f"WHERE id >= :start AND id < :end "
+                f"GROUP BY user_id, {fk} "
+                f"ON CONFLICT (user_id, {fk}) DO UPDATE SET "
+                f"is_like = excluded.is_like, updated_at = excluded.updated_at "
+                f"WHERE excluded.updated_at > {target}.updated_at"
+            ),
+            {"start": start, "end": start + BATCH_SIZE},
+        )
+
+
+def upgrade() -> None:
+    op.create_index('uq_post_reactions_user_id_post_id', 'post_reactions', ['user_id', 'post_id'], unique=True)
+    op.create_index('uq_comment_reactions_user_id_comment_id', 'comment_reactions', ['user_id', 'comment_id'], unique=True)
+
+    _copy('post_likes', 'post_reactions', 'post_id', True)
+    _copy('post_dislikes', 'post_reactions', 'post_id', False)
+    _copy('comment_likes', 'comment_reactions', 'comment_id', True)
+    _copy('comment_dislikes', 'comment_reactions', 'comment_id', False)
+
+    # Counters may shift where duplicates were collapsed
+    op.execute(
+        "UPDATE posts SET "
+        "likes_count = (SELECT count(*) FROM post_reactions WHERE post_reactions.post_id = posts.id AND is_like), "
+        "dislikes_count = (SELECT count(*) FROM post_reactions WHERE post_reactions.post_id = posts.id AND NOT is_like)"
+    )
+    op.execute(
+        "UPDATE comments SET "
+        "likes_count = (SELECT count(*) FROM comment_reactions WHERE comment_reactions.comment_id = comments.id AND is_like), "
+        "dislikes_count = (SELECT count(*) FROM comment_reactions WHERE comment_reactions.comment_id = comments.id AND NOT is_like)"
+    )
+    # The legacy tables are kept until every running instance writes to the
+    # reaction tables; drop them in a follow-up migration.
+
+
+def downgrade() -> None:
+    op.drop_index('uq_comment_reactions_user_id_comment_id', table_name='comment_reactions')
+    op.drop_index('uq_post_reactions_user_id_post_id', table_name='post_reactions')
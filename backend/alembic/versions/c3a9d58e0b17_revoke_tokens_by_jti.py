@@ -0,0 +1,60 @@
+"""store revoked tokens by jti instead of the full token
+
+Revision ID: c3a9d58e0b17
+Revises: b7f04e2d9c51
+Create Date: 2026-10-18 12:03:15.774209
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9d58e0b17'
+down_revision: Union[str, None] = 'b7f04e2d9c51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Expired rows are useless, drop them before rewriting the table
+    bind.execute(sa.text("DELETE FROM blacklisted_tokens WHERE expires_at <= CURRENT_TIMESTAMP"))
+
+    op.add_column('blacklisted_tokens', sa.Column('jti', sa.String(length=64), nullable=True))
+    # Tokens issued before the jti claim are identified by their SHA-256,
+    # matching app.core.revocation.token_id
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, token FROM blacklisted_tokens WHERE jti IS NULL LIMIT :limit"),
+            {"limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            sa.text("UPDATE blacklisted_tokens SET jti = :jti WHERE id = :id"),
+            [{"id": row.id, "jti": hashlib.sha256(row.token.encode()).hexdigest()} for row in rows],
+        )
+
+    with op.batch_alter_table('blacklisted_tokens') as batch_op:
+        batch_op.alter_column('jti', existing_type=sa.String(length=64), nullable=False)
+        batch_op.drop_index('ix_blacklisted_tokens_token')
+        batch_op.drop_column('token')
+        batch_op.create_index('ix_blacklisted_tokens_jti', ['jti'], unique=True)
+        batch_op.create_index('ix_blacklisted_tokens_expires_at', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    # Full tokens cannot be recovered from their jti
+    op.execute("DELETE FROM blacklisted_tokens")
+    with op.batch_alter_table('blacklisted_tokens') as batch_op:
+        batch_op.drop_index('ix_blacklisted_tokens_expires_at')
+        batch_op.drop_index('ix_blacklisted_tokens_jti')
+        batch_op.add_column(sa.Column('token', sa.String(), nullable=False))
+        batch_op.create_index('ix_blacklisted_tokens_token', ['token'], unique=True)
+        batch_op.drop_column('jti')
@@ -0,0 +1,30 @@
+"""add client_id to comments for idempotent batch creation
+
+Revision ID: d41f7b2a6c88
+Revises: c3a9d58e0b17
+Create Date: 2026-10-18 13:41:52.508316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f7b2a6c88'
+down_revision: Union[str, None] = 'c3a9d58e0b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('comments', sa.Column('client_id', sa.String(length=64), nullable=True))
+    # NULLs never conflict, so comments created one by one are unaffected
+    op.create_index('uq_comments_author_id_client_id', 'comments', ['author_id', 'client_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_comments_author_id_client_id', table_name='comments')
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.drop_column('client_id')
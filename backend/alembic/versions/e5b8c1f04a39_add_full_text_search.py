@@ -0,0 +1,68 @@
+"""add full text search
+
+Revision ID: e5b8c1f04a39
+Revises: d41f7b2a6c88
+Create Date: 2026-10-18 11:34:52.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8c1f04a39'
+down_revision: Union[str, None] = 'd41f7b2a6c88'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Searchable columns and their weight class, see app.db.fulltext
+SEARCHABLE = {
+    'posts': {'title': 'A', 'body': 'B'},
+    'comments': {'content': 'A'},
+}
+
+
+def _postgres_upgrade(table: str, weights: dict) -> None:
+    vector = ' || '.join(
+        f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')"
+        for column, weight in weights.items()
+    )
+    op.execute(f'ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED')
+    op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def _sqlite_upgrade(table: str, weights: dict) -> None:
+    columns = ', '.join(weights)
+    new = ', '.join(f'new.{column}' for column in weights)
+    old = ', '.join(f'old.{column}' for column in weights)
+    delete = f"INSERT INTO {table}_fts({table}_fts, rowid, {columns}) VALUES ('delete', old.id, {old});"
+    insert = f'INSERT INTO {table}_fts(rowid, {columns}) VALUES (new.id, {new});'
+    op.execute(f"CREATE VIRTUAL TABLE {table}_fts USING fts5({columns}, content='{table}', content_rowid='id')")
+    op.execute(f'CREATE TRIGGER {table}_fts_ai AFTER INSERT ON {table} BEGIN {insert} END')
+    op.execute(f'CREATE TRIGGER {table}_fts_ad AFTER DELETE ON {table} BEGIN {delete} END')
+    op.execute(f'CREATE TRIGGER {table}_fts_au AFTER UPDATE OF {columns} ON {table} BEGIN {delete} {insert} END')
+    op.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for table, weights in SEARCHABLE.items():
+        if dialect == 'postgresql':
+            _postgres_upgrade(table, weights)
+        elif dialect == 'sqlite':
+            _sqlite_upgrade(table, weights)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for table in SEARCHABLE:
+        if dialect == 'postgresql':
+            op.drop_index(f'ix_{table}_search_vector', table_name=table)
+            op.drop_column(table, 'search_vector')
+        elif dialect == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {table}_fts')
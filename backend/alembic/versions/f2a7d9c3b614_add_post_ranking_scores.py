@@ -0,0 +1,75 @@
+"""add post ranking scores
+
+Revision ID: f2a7d9c3b614
+Revises: e5b8c1f04a39
+Create Date: 2026-10-18 12:05:17.881430
+
+"""
+import math
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7d9c3b614'
+down_revision: Union[str, None] = 'e5b8c1f04a39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+# Frozen copy of app.core.ranking.hot_score
+def _hot_score(likes: int, dislikes: int, created_at: datetime) -> float:
+    score = likes - dislikes
+    order = math.log10(max(abs(score), 1))
+    sign = (score > 0) - (score < 0)
+    return round(sign * order + (created_at - datetime(2024, 1, 1)).total_seconds() / 45000, 7)
+
+
+def upgrade() -> None:
+    op.add_column('posts', sa.Column('score', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('posts', sa.Column('hot_score', sa.Float(), server_default='0', nullable=False))
+
+    # Backfill from the counters in id-range batches, afterwards kept up to
+    # date by `app.crud.post.increment_counters` and `reconcile_counters.py`
+    posts = sa.table(
+        'posts',
+        sa.column('id', sa.Integer),
+        sa.column('likes_count', sa.Integer),
+        sa.column('dislikes_count', sa.Integer),
+        sa.column('created_at', sa.DateTime),
+        sa.column('score', sa.Integer),
+        sa.column('hot_score', sa.Float),
+    )
+    bind = op.get_bind()
+    max_id = bind.execute(sa.select(sa.func.max(posts.c.id))).scalar() or 0
+    for start in range(0, max_id + 1, BATCH_SIZE):
+        in_batch = sa.and_(posts.c.id >= start, posts.c.id < start + BATCH_SIZE)
+        bind.execute(posts.update().where(in_batch).values(score=posts.c.likes_count - posts.c.dislikes_count))
+        rows = bind.execute(
+            sa.select(posts.c.id, posts.c.likes_count, posts.c.dislikes_count, posts.c.created_at).where(in_batch)
+        ).all()
+        if rows:
+            bind.execute(
+                posts.update().where(posts.c.id == sa.bindparam('post_id')).values(hot_score=sa.bindparam('hot')),
+                [
+                    {
+                        'post_id': row.id,
+                        'hot': _hot_score(row.likes_count, row.dislikes_count, row.created_at or datetime.utcnow()),
+                    }
+                    for row in rows
+                ],
+            )
+
+    op.create_index('ix_posts_score_id', 'posts', ['score', 'id'], unique=False)
+    op.create_index('ix_posts_hot_score_id', 'posts', ['hot_score', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_hot_score_id', table_name='posts')
+    op.drop_index('ix_posts_score_id', table_name='posts')
+    op.drop_column('posts', 'hot_score')
+    op.drop_column('posts', 'score')
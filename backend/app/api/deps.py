@@ -1,55 +1,84 @@
-from typing import Generator, Optional
+import time
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core import auth_cache, revocation
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import DBSession, get_db, get_read_db, run_db
 from app.models.user import User
-from app.models.blacklisted_token import BlacklistedToken
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
-def get_db() -> Generator:
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
-
-async def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        blacklisted = db.query(BlacklistedToken).filter(BlacklistedToken.token == token).first()
-        if blacklisted:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has been invalidated",
-                headers={"WWW-Authenticate": "Bearer"},
+
+def _token_user_id(token: str) -> int:
+    """
+    Validate `token` and return its user id. Warm tokens come from
+    `app.core.auth_cache`; revocation is checked against the in-memory
+    `app.core.revocation` set. Never touches the database.
+    """
+    cached = auth_cache.token_cache.get(token)
+    if cached is None:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
             )
+            user_id: Optional[int] = payload.get("sub")
+            if user_id is None:
+                raise _credentials_exception()
+            user_id = int(user_id)
+        except (JWTError, ValueError):
+            raise _credentials_exception()
+        jti = revocation.token_id(token, payload)
+        expires_at = payload.get("exp")
+        auth_cache.token_cache.set(
+            token, (user_id, jti), ttl=expires_at - time.time() if expires_at else None
+        )
+    else:
+        user_id, jti = cached
 
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    if revocation.revoked_tokens.is_revoked(jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been invalidated",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        user_id: Optional[int] = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
+    return user_id
+
+def _load_user(db: Session, user_id: int) -> User:
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    auth_cache.cache_user(user)
+    return user
+
+async def _authenticate(db: DBSession, token: str) -> User:
+    """
+    Resolve the user behind `token`. A cached user is attached to the session
+    without I/O; otherwise it is loaded through `run_db`.
+    """
+    user_id = _token_user_id(token)
+    sync_db = db.sync_session if isinstance(db, AsyncSession) else db
+    user = auth_cache.get_cached_user(sync_db, user_id)
+    if user is None:
+        user = await run_db(db, _load_user, user_id)
     return user
 
+async def get_current_user(
+    db: DBSession = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    return await _authenticate(db, token)
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -58,24 +87,19 @@ async def get_current_active_user(
     return current_user
 
 async def get_current_user_optional(
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     token: str = Depends(oauth2_scheme_optional)
 ) -> Optional[User]:
     if not token:
         return None
     try:
-        blacklisted = db.query(BlacklistedToken).filter(BlacklistedToken.token == token).first()
-        if blacklisted:
-            return None
-
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: Optional[int] = payload.get("sub")
-        if user_id is None:
-            return None
-    except JWTError:
+        return await _authenticate(db, token)
+    except HTTPException:
         return None
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    return user 
\ No newline at end of file
+
+async def get_current_active_superuser(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    return current_user
@@ -0,0 +1,83 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_active_superuser
+from app.core import auth_cache
+from app.core.profiling import profiler
+from app.db.session import pool_stats
+from app.models.user import User
+from app.schemas.profiler import ProfilerSettings, ProfilerStatus
+
+router = APIRouter()
+
+@router.get("/pool")
+def read_pool_stats(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Connection pool state and checkout metrics of every engine.
+    """
+    return pool_stats()
+
+@router.get("/auth-cache")
+def read_auth_cache_stats(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Size and hit ratio of this worker's token and user caches.
+    """
+    return auth_cache.stats()
+
+def _profiler_status() -> ProfilerStatus:
+    return ProfilerStatus(
+        sample_rate=profiler.sample_rate,
+        routes=profiler.routes,
+        interval_ms=profiler.interval_ms,
+        enabled=profiler.enabled,
+        in_flight=profiler.in_flight,
+        requests=profiler.requests,
+        samples=profiler.samples,
+    )
+
+@router.get("/profiler", response_model=ProfilerStatus)
+def read_profiler(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Sampling profiler settings and the number of samples collected.
+    """
+    return _profiler_status()
+
+@router.put("/profiler", response_model=ProfilerStatus)
+def update_profiler(
+    *,
+    profiler_in: ProfilerSettings,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Start, retarget or stop (zero sample rate, no routes) the profiler.
+    Collected samples are kept.
+    """
+    profiler.configure(profiler_in.sample_rate, profiler_in.routes, profiler_in.interval_ms)
+    return _profiler_status()
+
+@router.get("/profiler/flamegraph", response_class=PlainTextResponse)
+def read_flamegraph(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Collected samples as collapsed stacks, for flamegraph.pl or speedscope.
+    """
+    return profiler.collapsed()
+
+@router.delete("/profiler/samples", response_model=ProfilerStatus)
+def reset_profiler(
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Discard the collected samples.
+    """
+    profiler.reset()
+    return _profiler_status()
@@ -2,47 +2,71 @@ from datetime import timedelta, datetime
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 
 from app.api.deps import get_db, get_current_user, oauth2_scheme
+from app.core import auth_cache, revocation
 from app.core.config import settings
-from app.core.security import create_access_token, get_password_hash, verify_password
+from app.core.security import (
+    PasswordHasherBusy,
+    create_access_token,
+    get_password_hash_async,
+    hash_slot,
+    verify_password_async,
+)
+from app.crud import user as crud_user
+from app.db.session import DBSession, release_db, run_db
 from app.models.user import User
 from app.schemas.user import UserCreate, User as UserSchema
-from app.models.blacklisted_token import BlacklistedToken
 
 router = APIRouter()
 
+password_hasher_busy = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many concurrent authentication requests, please retry",
+    headers={"Retry-After": "1"},
+)
+
 @router.post("/register", response_model=UserSchema)
-def register(
+async def register(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     user_in: UserCreate,
 ) -> Any:
-    user = db.query(User).filter(User.username == user_in.username).first()
-    if user:
-        raise HTTPException(
-            status_code=400,
-            detail="The user with this username already exists in the system.",
-        )
-    
-    user = User(
-        username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+    try:
+        with hash_slot():
+            user = await run_db(db, crud_user.get_by_username, user_in.username)
+            if user:
+                raise HTTPException(
+                    status_code=400,
+                    detail="The user with this username already exists in the system.",
+                )
+            # Don't hold a pooled connection while waiting for bcrypt
+            await release_db(db)
+            hashed_password = await get_password_hash_async(user_in.password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy
+    return await run_db(
+        db, crud_user.create, username=user_in.username, hashed_password=hashed_password
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
 
 @router.post("/login")
-def login(
-    db: Session = Depends(get_db),
+async def login(
+    db: DBSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    try:
+        with hash_slot():
+            user = await run_db(db, crud_user.get_by_username, form_data.username)
+            user_id, hashed_password = (user.id, user.hashed_password) if user else (None, None)
+            # Don't hold a pooled connection while waiting for bcrypt
+            await release_db(db)
+            verified = user_id is not None and await verify_password_async(
+                form_data.password, hashed_password
+            )
+    except PasswordHasherBusy:
+        raise password_hasher_busy
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -52,7 +76,7 @@ def login(
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": create_access_token(
-            data={"sub": str(user.id)}, expires_delta=access_token_expires
+            data={"sub": str(user_id)}, expires_delta=access_token_expires
         ),
         "token_type": "bearer",
     }
@@ -67,24 +91,22 @@ def read_users_me(
     return current_user 
 
 @router.post("/logout")
-def logout(
+async def logout(
     current_user: User = Depends(get_current_user),
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ) -> Any:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        expiry = datetime.fromtimestamp(payload.get("exp"))
+        expiry = datetime.utcfromtimestamp(payload.get("exp"))
+        jti = revocation.token_id(token, payload)
         
-        blacklisted_token = BlacklistedToken(
-            token=token,
-            expires_at=expiry,
-            user_id=current_user.id
+        await run_db(
+            db, revocation.revoke, jti=jti, expires_at=expiry, user_id=current_user.id
         )
-        db.add(blacklisted_token)
-        db.commit()
+        auth_cache.invalidate_token(token)
         return {"message": "Successfully logged out"}
     except JWTError:
         raise HTTPException(
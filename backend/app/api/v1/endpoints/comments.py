@@ -1,167 +1,255 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_read_db, get_current_user
+from app.core import feed_cache, http_cache
+from app.core.pagination import InvalidCursor
+from app.core.serialization import json_response
+from app.crud import comment as crud_comment
+from app.crud import reaction as crud_reaction
+from app.db.session import DBSession, run_db
 from app.models.user import User
-from app.models.comment import Comment, CommentLike, CommentDislike
-from app.schemas.comment import CommentCreate, CommentUpdate, Comment as CommentSchema, CommentWithStats
+from app.schemas.batch import BatchItemResult
+from app.schemas.comment import (
+    CommentBatchCreate,
+    CommentCreate,
+    CommentSummary,
+    CommentUpdate,
+    Comment as CommentSchema,
+    CommentWithStats,
+)
+from app.schemas.reaction import ReactionBatchGet, ReactionBatchWrite, ReactionState
 
 router = APIRouter()
 
+def _tree_response(
+    request: Request, viewer: User, comments: List[CommentWithStats], next_cursor: Optional[str]
+) -> Response:
+    tag = http_cache.etag(
+        request.url.path, request.url.query, viewer.id, crud_comment.tree_version(comments), next_cursor
+    )
+    headers = http_cache.cache_headers(tag, private=True)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if http_cache.is_fresh(request, tag):
+        return http_cache.not_modified(headers)
+    return json_response(List[CommentWithStats], comments, headers=headers)
+
 @router.get("/post/{post_id}", response_model=List[CommentWithStats])
-def read_comments(
+async def read_comments(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: DBSession = Depends(get_read_db),
     post_id: int,
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=100),
+    max_depth: Optional[int] = Query(None, ge=0),
+    replies_limit: Optional[int] = Query(None, ge=0),
     current_user: User = Depends(get_current_user),
 ) -> Any:
-    comments = db.query(Comment).filter(
-        Comment.post_id == post_id,
-        Comment.parent_id == None
-    ).offset(skip).limit(limit).all()
-    
-    def process_comment(comment):
-        comment_dict = CommentWithStats.from_orm(comment)
-        comment_dict.likes_count = len(comment.likes)
-        comment_dict.dislikes_count = len(comment.dislikes)
-        comment_dict.is_liked = any(like.user_id == current_user.id for like in comment.likes)
-        comment_dict.is_disliked = any(dislike.user_id == current_user.id for dislike in comment.dislikes)
-
-        if comment.replies:
-            comment_dict.replies = [process_comment(reply) for reply in comment.replies]
-        
-        return comment_dict
-    
-    return [process_comment(comment) for comment in comments]
+    """
+    Retrieve the comment threads of a post.
+
+    `max_depth` and `replies_limit` bound how much of each thread is loaded;
+    the remainder can be streamed with `GET /comments/{comment_id}/replies`.
+    """
+    try:
+        comments, next_cursor = await run_db(
+            db,
+            crud_comment.get_comment_tree,
+            post_id=post_id,
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
+            max_depth=max_depth,
+            replies_limit=replies_limit,
+            viewer_id=current_user.id,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return _tree_response(request, current_user, comments, next_cursor)
+
+@router.get("/{comment_id}/replies", response_model=List[CommentWithStats])
+async def read_replies(
+    *,
+    request: Request,
+    db: DBSession = Depends(get_read_db),
+    comment_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    max_depth: Optional[int] = Query(None, ge=0),
+    replies_limit: Optional[int] = Query(None, ge=0),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Retrieve the replies of a comment, paged like the top-level threads.
+    """
+    parent = await run_db(db, crud_comment.get, comment_id)
+    if not parent:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    try:
+        replies, next_cursor = await run_db(
+            db,
+            crud_comment.get_comment_tree,
+            post_id=parent.post_id,
+            parent_id=comment_id,
+            cursor=cursor,
+            limit=limit,
+            max_depth=max_depth,
+            replies_limit=replies_limit,
+            viewer_id=current_user.id,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return _tree_response(request, current_user, replies, next_cursor)
+
+@router.get("/search", response_model=List[CommentSummary])
+async def search_comments(
+    *,
+    db: DBSession = Depends(get_read_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Search comments by content, best match first. Pass the `X-Next-Cursor`
+    response header back as `cursor` to fetch the next page.
+    """
+    try:
+        comments, next_cursor = await run_db(db, crud_comment.search, query=q, cursor=cursor, limit=limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return json_response(List[CommentSummary], comments, headers=headers)
+
+@router.post("/reactions:batchGet", response_model=List[ReactionState])
+async def batch_get_comment_reactions(
+    *,
+    db: DBSession = Depends(get_read_db),
+    batch: ReactionBatchGet,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Reaction counts and the viewer's flags for up to 200 comments, in the
+    order of `ids`. Unknown ids are left out.
+    """
+    return await run_db(db, crud_reaction.get_comment_states, ids=batch.ids, user_id=current_user.id)
+
+@router.post("/reactions:batchWrite", response_model=List[BatchItemResult])
+async def batch_write_comment_reactions(
+    *,
+    db: DBSession = Depends(get_db),
+    batch: ReactionBatchWrite,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Like or dislike many comments in one transaction. The result lists the
+    outcome of every operation in request order; when a comment appears
+    more than once the last operation wins.
+    """
+    result = await run_db(db, crud_comment.react_many, user_id=current_user.id, operations=batch.operations)
+    await feed_cache.invalidate()
+    return result
+
+@router.post("/batch", response_model=List[BatchItemResult])
+async def create_comments(
+    *,
+    db: DBSession = Depends(get_db),
+    batch: CommentBatchCreate,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Create many comments, possibly on different posts, in one transaction.
+
+    Every item carries a `client_id` unique per author; retrying a batch
+    reports the comments it already created as `duplicate` with their ids
+    instead of creating them twice.
+    """
+    result = await run_db(db, crud_comment.create_many, author_id=current_user.id, items=batch.comments)
+    await feed_cache.invalidate()
+    return result
 
 @router.post("/post/{post_id}", response_model=CommentSchema)
-def create_comment(
+async def create_comment(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     post_id: int,
     comment_in: CommentCreate,
     current_user: User = Depends(get_current_user),
 ) -> Any:
-    comment = Comment(
-        **comment_in.dict(),
-        post_id=post_id,
-        author_id=current_user.id,
+    result = await run_db(
+        db, crud_comment.create, comment_in=comment_in, post_id=post_id, author_id=current_user.id
     )
-    db.add(comment)
-    db.commit()
-    db.refresh(comment)
-    return comment
+    await feed_cache.invalidate()
+    return result
 
 @router.put("/{comment_id}", response_model=CommentSchema)
-def update_comment(
+async def update_comment(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     comment_id: int,
     comment_in: CommentUpdate,
     current_user: User = Depends(get_current_user),
 ) -> Any:
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await run_db(db, crud_comment.get, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     if comment.author_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    for field, value in comment_in.dict(exclude_unset=True).items():
-        setattr(comment, field, value)
-    
-    db.add(comment)
-    db.commit()
-    db.refresh(comment)
-    return comment
+    result = await run_db(db, crud_comment.update, comment, comment_in)
+    await feed_cache.invalidate()
+    return result
 
 @router.delete("/{comment_id}", response_model=CommentSchema)
-def delete_comment(
+async def delete_comment(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     comment_id: int,
     current_user: User = Depends(get_current_user),
 ) -> Any:
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await run_db(db, crud_comment.get, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     if comment.author_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    db.delete(comment)
-    db.commit()
-    return comment
+    result = await run_db(db, crud_comment.remove, comment)
+    await feed_cache.invalidate()
+    return result
 
 @router.post("/{comment_id}/like", response_model=CommentWithStats)
-def like_comment(
+async def like_comment(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     comment_id: int,
     current_user: User = Depends(get_current_user),
 ) -> Any:
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await run_db(db, crud_comment.get, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
-    
-    dislike = db.query(CommentDislike).filter(
-        CommentDislike.comment_id == comment_id,
-        CommentDislike.user_id == current_user.id
-    ).first()
-    if dislike:
-        db.delete(dislike)
-    
-    like = db.query(CommentLike).filter(
-        CommentLike.comment_id == comment_id,
-        CommentLike.user_id == current_user.id
-    ).first()
-    if not like:
-        like = CommentLike(comment_id=comment_id, user_id=current_user.id)
-        db.add(like)
-    
-    db.commit()
-    db.refresh(comment)
-    
-    comment_dict = CommentWithStats.from_orm(comment)
-    comment_dict.likes_count = len(comment.likes)
-    comment_dict.dislikes_count = len(comment.dislikes)
-    comment_dict.is_liked = True
-    comment_dict.is_disliked = False
-    return comment_dict
+
+    result = await run_db(
+        db, crud_comment.react, comment_id=comment_id, user_id=current_user.id, is_like=True
+    )
+    await feed_cache.invalidate()
+    return result
 
 @router.post("/{comment_id}/dislike", response_model=CommentWithStats)
-def dislike_comment(
+async def dislike_comment(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     comment_id: int,
     current_user: User = Depends(get_current_user),
 ) -> Any:
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await run_db(db, crud_comment.get, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
-    like = db.query(CommentLike).filter(
-        CommentLike.comment_id == comment_id,
-        CommentLike.user_id == current_user.id
-    ).first()
-    if like:
-        db.delete(like)
-    
-    dislike = db.query(CommentDislike).filter(
-        CommentDislike.comment_id == comment_id,
-        CommentDislike.user_id == current_user.id
-    ).first()
-    if not dislike:
-        dislike = CommentDislike(comment_id=comment_id, user_id=current_user.id)
-        db.add(dislike)
-    
-    db.commit()
-    db.refresh(comment)
-    
-    comment_dict = CommentWithStats.from_orm(comment)
-    comment_dict.likes_count = len(comment.likes)
-    comment_dict.dislikes_count = len(comment.dislikes)
-    comment_dict.is_liked = False
-    comment_dict.is_disliked = True
-    return comment_dict 
\ No newline at end of file
+    result = await run_db(
+        db, crud_comment.react, comment_id=comment_id, user_id=current_user.id, is_like=False
+    )
+    await feed_cache.invalidate()
+    return result
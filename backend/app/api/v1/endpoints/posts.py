@@ -1,62 +1,215 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Any, List, Literal, Optional, Set
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
-from app.api.deps import get_db, get_current_user, get_current_user_optional
+from app.api.deps import get_db, get_read_db, get_current_user, get_current_user_optional
+from app.core import feed_cache, http_cache
+from app.core.pagination import InvalidCursor
+from app.core.serialization import dump_json, json_response
+from app.crud import post as crud_post
+from app.crud import reaction as crud_reaction
+from app.db.session import DBSession, run_db
 from app.models.user import User
-from app.models.post import Post, PostLike, PostDislike
-from app.schemas.post import PostCreate, PostUpdate, Post as PostSchema, PostWithStats
+from app.schemas.post import PostCreate, PostUpdate, Post as PostSchema, PostSummary, PostWithStats
+from app.schemas.batch import BatchItemResult
+from app.schemas.reaction import ReactionBatchGet, ReactionBatchWrite, ReactionState
 
 router = APIRouter()
 
-@router.get("/", response_model=List[PostWithStats])
-def read_posts(
-    db: Session = Depends(get_db),
+def parse_fields(fields: Optional[str] = None) -> Optional[Set[str]]:
+    if fields is None:
+        return None
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - crud_post.SUMMARY_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    # Clients always need the id to address the post
+    return selected | {"id"}
+
+@router.get("/", response_model=List[PostSummary])
+async def read_posts(
+    request: Request,
+    db: DBSession = Depends(get_read_db),
+    primary_db: DBSession = Depends(get_db),
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=100),
+    preview: int = Query(0, ge=0, le=5),
+    sort: Literal["new", "top", "hot"] = "new",
+    fields: Optional[Set[str]] = Depends(parse_fields),
     current_user: User = Depends(get_current_user_optional),
 ) -> Any:
     """
-    Retrieve posts.
-    """
-    posts = db.query(Post).offset(skip).limit(limit).all()
-    result = []
-    for post in posts:
-        post_dict = PostWithStats.from_orm(post)
-        post_dict.likes_count = len(post.likes)
-        post_dict.dislikes_count = len(post.dislikes)
-        if current_user:
-            post_dict.is_liked = any(like.user_id == current_user.id for like in post.likes)
-            post_dict.is_disliked = any(dislike.user_id == current_user.id for dislike in post.dislikes)
+    Retrieve posts without their comments, newest first by default.
+
+    `sort=top` orders them by likes minus dislikes, `sort=hot` by the same
+    score decayed with age.
+
+    `preview` adds up to that many top-level comments per post as
+    `comments_preview`. `fields` is a comma-separated subset of the post
+    fields to return. Pass the `X-Next-Cursor` response header back as
+    `cursor` to fetch the next page.
+
+    Responses carry an ETag; send it back as `If-None-Match` to get a 304
+    while the page is unchanged.
+    """
+    viewer_id = current_user.id if current_user else None
+    try:
+        if feed_cache.backend is None:
+            posts, next_cursor = await run_db(
+                db,
+                crud_post.get_feed,
+                cursor=cursor,
+                skip=skip,
+                limit=limit,
+                viewer_id=viewer_id,
+                fields=fields,
+                preview=preview,
+                sort=sort,
+            )
+            body = None
+            tag = http_cache.etag(request.url.query, viewer_id, crud_post.page_version(posts), next_cursor)
         else:
-            post_dict.is_liked = False
-            post_dict.is_disliked = False
-        result.append(post_dict)
+            page = await _cached_feed(
+                primary_db, cursor=cursor, skip=skip, limit=limit, preview=preview, fields=fields, sort=sort
+            )
+            body, tag, next_cursor = page.body, page.etag, page.next_cursor
+            if viewer_id is not None and (fields is None or fields & {"is_liked", "is_disliked"}):
+                reactions = await run_db(
+                    db, crud_reaction.get_post_reactions, user_id=viewer_id, post_ids=page.post_ids
+                )
+                body = feed_cache.overlay(page, reactions)
+                tag = http_cache.etag(page.etag, viewer_id, sorted(reactions.items()))
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    headers = http_cache.cache_headers(tag, private=current_user is not None)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if http_cache.is_fresh(request, tag):
+        return http_cache.not_modified(headers)
+    if body is None:
+        return json_response(List[PostSummary], posts, include=fields, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+async def _cached_feed(db: DBSession, **params: Any) -> feed_cache.CachedPage:
+    """
+    The anonymous feed page for `params`, rendered once per cache generation.
+
+    Pages are rendered from the primary: a lagging replica could return data
+    from before the write that started the current generation, which would
+    then be served for the whole generation.
+    """
+    key = feed_cache.page_key(**params)
+    page = await feed_cache.get_page(key)
+    if page is None:
+        generation = await feed_cache.backend.generation()
+        posts, next_cursor = await run_db(db, crud_post.get_feed, **params)
+        page = feed_cache.CachedPage.render(
+            body=dump_json(List[PostSummary], posts, include=params["fields"]),
+            etag=http_cache.etag(key, crud_post.page_version(posts), next_cursor),
+            next_cursor=next_cursor,
+            post_ids=[post.id for post in posts],
+        )
+        await feed_cache.set_page(key, page, generation)
+    return page
+
+@router.post("/reactions:batchGet", response_model=List[ReactionState])
+async def batch_get_post_reactions(
+    *,
+    db: DBSession = Depends(get_read_db),
+    batch: ReactionBatchGet,
+    current_user: User = Depends(get_current_user_optional),
+) -> Any:
+    """
+    Reaction counts and the viewer's flags for up to 200 posts, in the order
+    of `ids`. Unknown ids are left out.
+    """
+    return await run_db(
+        db,
+        crud_reaction.get_post_states,
+        ids=batch.ids,
+        user_id=current_user.id if current_user else None,
+    )
+
+@router.post("/reactions:batchWrite", response_model=List[BatchItemResult])
+async def batch_write_post_reactions(
+    *,
+    db: DBSession = Depends(get_db),
+    batch: ReactionBatchWrite,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Like or dislike many posts in one transaction. The result lists the
+    outcome of every operation in request order; when a post appears more
+    than once the last operation wins.
+    """
+    result = await run_db(db, crud_post.react_many, user_id=current_user.id, operations=batch.operations)
+    await feed_cache.invalidate()
     return result
 
+@router.get("/search", response_model=List[PostSummary])
+async def search_posts(
+    *,
+    db: DBSession = Depends(get_read_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user_optional),
+) -> Any:
+    """
+    Search posts by title and body, best match first. Pass the
+    `X-Next-Cursor` response header back as `cursor` to fetch the next page.
+    """
+    try:
+        posts, next_cursor = await run_db(
+            db,
+            crud_post.search,
+            query=q,
+            cursor=cursor,
+            limit=limit,
+            viewer_id=current_user.id if current_user else None,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return json_response(List[PostSummary], posts, headers=headers)
+
+@router.get("/{post_id}", response_model=PostWithStats)
+async def read_post(
+    *,
+    db: DBSession = Depends(get_db),
+    post_id: int,
+    current_user: User = Depends(get_current_user_optional),
+) -> Any:
+    """
+    Retrieve a post with its comments. Read from the primary, so a post is
+    found right after it was created.
+    """
+    post = await run_db(
+        db, crud_post.get_post_with_stats, post_id, viewer_id=current_user.id if current_user else None
+    )
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return post
+
 @router.post("/", response_model=PostSchema)
-def create_post(
+async def create_post(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     post_in: PostCreate,
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
     Create new post.
     """
-    post = Post(
-        **post_in.dict(),
-        author_id=current_user.id,
-    )
-    db.add(post)
-    db.commit()
-    db.refresh(post)
-    return post
+    result = await run_db(db, crud_post.create, post_in=post_in, author_id=current_user.id)
+    await feed_cache.invalidate()
+    return result
 
 @router.put("/{post_id}", response_model=PostSchema)
-def update_post(
+async def update_post(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     post_id: int,
     post_in: PostUpdate,
     current_user: User = Depends(get_current_user),
@@ -64,111 +217,65 @@ def update_post(
     """
     Update a post.
     """
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await run_db(db, crud_post.get, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post.author_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    for field, value in post_in.dict(exclude_unset=True).items():
-        setattr(post, field, value)
-    
-    db.add(post)
-    db.commit()
-    db.refresh(post)
-    return post
+    result = await run_db(db, crud_post.update, post, post_in)
+    await feed_cache.invalidate()
+    return result
 
 @router.delete("/{post_id}", response_model=PostSchema)
-def delete_post(
+async def delete_post(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     post_id: int,
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
     Delete a post.
     """
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await run_db(db, crud_post.get, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post.author_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
     
-    db.delete(post)
-    db.commit()
-    return post
+    result = await run_db(db, crud_post.remove, post)
+    await feed_cache.invalidate()
+    return result
 
-@router.post("/{post_id}/like", response_model=PostWithStats)
-def like_post(
+@router.post("/{post_id}/like", response_model=PostSummary)
+async def like_post(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     post_id: int,
     current_user: User = Depends(get_current_user),
 ) -> Any:
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await run_db(db, crud_post.get, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    dislike = db.query(PostDislike).filter(
-        PostDislike.post_id == post_id,
-        PostDislike.user_id == current_user.id
-    ).first()
-    if dislike:
-        db.delete(dislike)
-    
-    like = db.query(PostLike).filter(
-        PostLike.post_id == post_id,
-        PostLike.user_id == current_user.id
-    ).first()
-    if not like:
-        like = PostLike(post_id=post_id, user_id=current_user.id)
-        db.add(like)
-    
-    db.commit()
-    db.refresh(post)
-    
-    post_dict = PostWithStats.from_orm(post)
-    post_dict.likes_count = len(post.likes)
-    post_dict.dislikes_count = len(post.dislikes)
-    post_dict.is_liked = True
-    post_dict.is_disliked = False
-    return post_dict
-
-@router.post("/{post_id}/dislike", response_model=PostWithStats)
-def dislike_post(
+    result = await run_db(db, crud_post.react, post_id=post_id, user_id=current_user.id, is_like=True)
+    await feed_cache.invalidate()
+    return result
+
+@router.post("/{post_id}/dislike", response_model=PostSummary)
+async def dislike_post(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     post_id: int,
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
     Dislike a post.
     """
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await run_db(db, crud_post.get, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-    
-    like = db.query(PostLike).filter(
-        PostLike.post_id == post_id,
-        PostLike.user_id == current_user.id
-    ).first()
-    if like:
-        db.delete(like)
-    
-    dislike = db.query(PostDislike).filter(
-        PostDislike.post_id == post_id,
-        PostDislike.user_id == current_user.id
-    ).first()
-    if not dislike:
-        dislike = PostDislike(post_id=post_id, user_id=current_user.id)
-        db.add(dislike)
-    
-    db.commit()
-    db.refresh(post)
-    
-    post_dict = PostWithStats.from_orm(post)
-    post_dict.likes_count = len(post.likes)
-    post_dict.dislikes_count = len(post.dislikes)
-    post_dict.is_liked = False
-    post_dict.is_disliked = True
-    return post_dict 
\ No newline at end of file
+
+    result = await run_db(db, crud_post.react, post_id=post_id, user_id=current_user.id, is_like=False)
+    await feed_cache.invalidate()
+    return result
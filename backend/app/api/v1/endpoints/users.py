@@ -0,0 +1,84 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.deps import get_read_db, get_current_user_optional
+from app.core.pagination import InvalidCursor
+from app.core.serialization import json_response
+from app.crud import comment as crud_comment
+from app.crud import post as crud_post
+from app.crud import user as crud_user
+from app.db.session import DBSession, run_db
+from app.models.user import User
+from app.schemas.comment import CommentSummary
+from app.schemas.post import PostSummary
+from app.schemas.user import UserProfile
+
+router = APIRouter()
+
+@router.get("/{user_id}", response_model=UserProfile)
+async def read_user_profile(
+    *,
+    db: DBSession = Depends(get_read_db),
+    user_id: int,
+) -> Any:
+    """
+    A user with their post, comment and received-like counts.
+    """
+    profile = await run_db(db, crud_user.get_profile, user_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="User not found")
+    return profile
+
+@router.get("/{user_id}/posts", response_model=List[PostSummary])
+async def read_user_posts(
+    *,
+    db: DBSession = Depends(get_read_db),
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    current_user: User = Depends(get_current_user_optional),
+) -> Any:
+    """
+    A user's posts, newest first. Pass the `X-Next-Cursor` response header
+    back as `cursor` to fetch the next page.
+    """
+    try:
+        posts, next_cursor = await run_db(
+            db,
+            crud_post.get_feed,
+            cursor=cursor,
+            limit=limit,
+            viewer_id=current_user.id if current_user else None,
+            author_id=user_id,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # An empty page is the only one that could belong to an unknown user
+    if not posts and not await run_db(db, crud_user.exists, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return json_response(List[PostSummary], posts, headers=headers)
+
+@router.get("/{user_id}/comments", response_model=List[CommentSummary])
+async def read_user_comments(
+    *,
+    db: DBSession = Depends(get_read_db),
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+) -> Any:
+    """
+    A user's comments, newest first. Pass the `X-Next-Cursor` response
+    header back as `cursor` to fetch the next page. Like the profile, it
+    needs no login.
+    """
+    try:
+        comments, next_cursor = await run_db(
+            db, crud_comment.get_by_author, author_id=user_id, cursor=cursor, limit=limit
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not comments and not await run_db(db, crud_user.exists, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return json_response(List[CommentSummary], comments, headers=headers)
@@ -0,0 +1,56 @@
+"""
+Per-process caches for request authentication.
+
+`token_cache` maps an access token that passed signature validation to its
+user id and token id; `user_cache` keeps a detached snapshot
+of each recently seen user. Together they let `get_current_user` resolve a
+warm token without touching the database. Entries are dropped on logout and
+whenever a user row is updated or deleted through the ORM; the TTL bounds
+staleness across worker processes.
+"""
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+token_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+user_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def cache_user(user: User) -> None:
+    snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(snapshot)
+    user_cache.set(user.id, snapshot)
+
+
+def get_cached_user(db: Session, user_id: int) -> Optional[User]:
+    """
+    Attach a copy of the cached user to `db` without emitting SQL.
+    """
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        return None
+    return db.merge(snapshot, load=False)
+
+
+def invalidate_token(token: str) -> None:
+    token_cache.pop(token)
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.pop(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+
+
+def stats() -> Dict[str, Any]:
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
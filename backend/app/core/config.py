@@ -10,12 +10,69 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    # Serve requests through SQLAlchemy's asyncio extension; ASYNC_DATABASE_URL
+    # defaults to DATABASE_URL with its driver swapped (asyncpg, aiosqlite)
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # PostgreSQL only; unset leaves the server default
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None
+    # Share one session between all dependencies of a request
+    DB_SESSION_PER_REQUEST: bool = False
+    # Log unindexed foreign keys and full table scans on start, see app.db.index_audit
+    DB_INDEX_AUDIT_ON_STARTUP: bool = False
+    # Comma separated replica URLs serving read-only endpoints, see app.db.replicas
+    READ_REPLICA_URLS: str = ""
+    REPLICA_HEALTH_CHECK_SECONDS: int = 10
+    # Count and time the SQL statements of every request, see app.db.query_metrics
+    DB_QUERY_METRICS: bool = False
+    # Warn about requests that issue more statements than this
+    DB_STATEMENT_BUDGET: int = 20
+    # Slowest statements of a request reported in Server-Timing and the warning
+    DB_SLOW_STATEMENTS: int = 3
 
     # JWT
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Password hashing pool, half the cores by default to leave room for requests
+    PASSWORD_HASH_WORKERS: int = max(1, (os.cpu_count() or 2) // 2)
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Authentication cache
+    AUTH_CACHE_SIZE: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 60
+
+    # How long shared caches may keep anonymous read responses
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 5
+
+    # Anonymous feed page cache: "memory", "redis" (needs the redis package) or "none"
+    FEED_CACHE_BACKEND: str = "memory"
+    FEED_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    FEED_CACHE_SIZE: int = 1000
+    FEED_CACHE_TTL_SECONDS: int = 10
+
+    # Most operations accepted by one batch write request
+    BULK_MAX_OPERATIONS: int = 100
+
+    # Sampling profiler, see app.core.profiling; changed at runtime through
+    # /admin/profiler. PROFILER_ROUTES is a comma separated list of route
+    # templates, PROFILER_OUTPUT_PATH receives the collapsed stacks on shutdown
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_ROUTES: str = ""
+    PROFILER_INTERVAL_MS: int = 10
+    PROFILER_OUTPUT_PATH: Optional[str] = None
+
+    # Token revocation. Other workers accept a revoked token until their next
+    # sync, so this is also the longest a logout takes to apply everywhere
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 10
+    TOKEN_REVOCATION_PURGE_BATCH_SIZE: int = 1000
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,182 @@
+"""
+Shared cache of anonymous feed pages.
+
+`GET /posts/` is the same for every anonymous visitor, so its rendered pages
+are cached by query parameters. Logged-in viewers are served the same page
+with their own `is_liked`/`is_disliked` flags laid over it, which costs one
+indexed lookup of their reactions on the page's posts. The offsets of the
+flags in the rendered body are kept with the page, so they are spliced in
+without parsing it again.
+
+Every write that shows up in the feed calls `invalidate`, which bumps a
+generation number that is part of each key; pages rendered from data read
+before the bump are stored under the old generation and never served.
+
+Backends:
+
+- `MemoryFeedCache`: an in-process `TTLCache`. Invalidation only reaches the
+  worker that handled the write; the others catch up within
+  `FEED_CACHE_TTL_SECONDS`.
+- `RedisFeedCache`: any client implementing the asyncio redis-py API
+  (`redis.asyncio`, fakeredis, ...), shared by all workers.
+"""
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+# Anonymous pages render both flags as false
+_FALSE = b"false"
+
+
+def _flag_offsets(body: bytes, name: str, count: int) -> List[int]:
+    """
+    Offset of the value of `name` in each of the `count` posts of `body`, or
+    -1 for every post when the field was left out. Quotes inside strings are
+    escaped, so the key can only match where it is a key.
+    """
+    marker = b'"' + name.encode() + b'":'
+    offsets = []
+    position = body.find(marker)
+    while position != -1:
+        offsets.append(position + len(marker))
+        position = body.find(marker, position + len(marker))
+    return offsets if len(offsets) == count else [-1] * count
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    etag: str
+    next_cursor: Optional[str]
+    post_ids: List[int]
+    liked_offsets: List[int]
+    disliked_offsets: List[int]
+
+    @classmethod
+    def render(cls, body: bytes, etag: str, next_cursor: Optional[str], post_ids: List[int]) -> "CachedPage":
+        return cls(
+            body,
+            etag,
+            next_cursor,
+            post_ids,
+            _flag_offsets(body, "is_liked", len(post_ids)),
+            _flag_offsets(body, "is_disliked", len(post_ids)),
+        )
+
+    def dumps(self) -> bytes:
+        header = json.dumps(
+            [self.etag, self.next_cursor, self.post_ids, self.liked_offsets, self.disliked_offsets]
+        )
+        return header.encode() + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, data: bytes) -> "CachedPage":
+        header, body = data.split(b"\n", 1)
+        return cls(body, *json.loads(header))
+
+
+class MemoryFeedCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self._pages = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generation = 0
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._pages.get((self._generation, key))
+
+    async def set(self, key: str, value: bytes, generation: int) -> None:
+        self._pages.set((generation, key), value)
+
+    async def invalidate(self) -> None:
+        self._generation += 1
+        self._pages.clear()
+
+
+class RedisFeedCache:
+    def __init__(self, client: Any, ttl: int, prefix: str = "feed"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def generation(self) -> int:
+        return int(await self.client.get(f"{self.prefix}:generation") or 0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(f"{self.prefix}:{await self.generation()}:{key}")
+
+    async def set(self, key: str, value: bytes, generation: int) -> None:
+        await self.client.set(f"{self.prefix}:{generation}:{key}", value, ex=self.ttl)
+
+    async def invalidate(self) -> None:
+        # Pages of older generations are left to expire
+        await self.client.incr(f"{self.prefix}:generation")
+
+
+def _create_backend():
+    if settings.FEED_CACHE_BACKEND == "memory":
+        return MemoryFeedCache(settings.FEED_CACHE_SIZE, settings.FEED_CACHE_TTL_SECONDS)
+    if settings.FEED_CACHE_BACKEND == "redis":
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("FEED_CACHE_BACKEND=redis requires the redis package")
+        return RedisFeedCache(redis.from_url(settings.FEED_CACHE_REDIS_URL), settings.FEED_CACHE_TTL_SECONDS)
+    return None
+
+
+# None when FEED_CACHE_BACKEND is "none"
+backend = _create_backend()
+
+
+# Part of every key and bumped whenever the layout of `CachedPage` changes,
+# so workers of two releases sharing a Redis never read each other's pages
+PAGE_FORMAT = 2
+
+
+def page_key(**params: Any) -> str:
+    values = {name: sorted(value) if isinstance(value, (set, frozenset)) else value for name, value in params.items()}
+    return json.dumps(
+        {"format": PAGE_FORMAT, **values},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+async def get_page(key: str) -> Optional[CachedPage]:
+    data = await backend.get(key)
+    return CachedPage.loads(data) if data is not None else None
+
+
+async def set_page(key: str, page: CachedPage, generation: int) -> None:
+    await backend.set(key, page.dumps(), generation)
+
+
+async def invalidate() -> None:
+    if backend is not None:
+        await backend.invalidate()
+
+
+def overlay(page: CachedPage, reactions: Dict[int, bool]) -> bytes:
+    """
+    The page body with the viewer's `reactions` (post id to is_like) applied.
+    """
+    pieces = []
+    start = 0
+    for post_id, liked_at, disliked_at in zip(page.post_ids, page.liked_offsets, page.disliked_offsets):
+        is_like = reactions.get(post_id)
+        if is_like is None:
+            continue
+        offset = liked_at if is_like else disliked_at
+        if offset == -1:
+            continue
+        pieces.append(page.body[start:offset])
+        pieces.append(b"true")
+        start = offset + len(_FALSE)
+    if not pieces:
+        return page.body
+    pieces.append(page.body[start:])
+    return b"".join(pieces)
@@ -0,0 +1,47 @@
+"""
+HTTP validation caching helpers.
+
+Read endpoints derive a weak ETag from the versioning fields of their result
+set (ids, `updated_at`, reaction counters and the viewer's flags) and answer
+`If-None-Match` with 304 before anything is serialized. Anonymous responses
+are `public` so a CDN may keep them for `HTTP_CACHE_MAX_AGE_SECONDS`;
+responses computed for a user are `private` and always revalidated.
+`Vary: Authorization` keeps the two apart.
+"""
+import hashlib
+from typing import Any, Dict
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+
+def etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def cache_headers(tag: str, private: bool) -> Dict[str, str]:
+    if private:
+        cache_control = "private, no-cache"
+    else:
+        cache_control = f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}"
+    return {"ETag": tag, "Cache-Control": cache_control, "Vary": "Authorization"}
+
+
+def is_fresh(request: Request, tag: str) -> bool:
+    """
+    Whether `If-None-Match` lists `tag`, compared weakly as RFC 9110 asks
+    for GET.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = tag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
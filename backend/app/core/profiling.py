@@ -0,0 +1,171 @@
+"""
+Sampling profiler for live traffic.
+
+A request is profiled when it matches one of the configured route templates
+or falls in the random `sample_rate` fraction. While at least one profiled
+request is in flight, a background thread takes the stack of every busy
+thread every `interval_ms` through `sys._current_frames`, so the profiled
+code runs untouched. A thread is busy when its stack passes through this
+project's code; idle threadpool workers and the idle event loop are skipped.
+Stacks of other requests served at the same time are sampled too, so
+profile one route at a time for a clean picture.
+
+Samples are aggregated as collapsed stacks, one `frame;frame;frame count`
+line per distinct stack, the input of flamegraph.pl and speedscope. They are
+served by `/admin/profiler/flamegraph` and, with `PROFILER_OUTPUT_PATH`,
+written to disk on shutdown.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.routing import Match
+
+from app.core.config import settings
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _in_project(filename: str) -> bool:
+    return filename.startswith(PROJECT_ROOT) and "site-packages" not in filename
+
+
+def _short_path(filename: str) -> str:
+    if _in_project(filename):
+        return os.path.relpath(filename, PROJECT_ROOT)
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.rpartition(marker)[2]
+    return os.path.basename(filename)
+
+
+class Profiler:
+    def __init__(self, sample_rate: float, routes: List[str], interval_ms: int):
+        self._lock = threading.Lock()
+        self._busy = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Frame labels by code object, built once per function
+        self._labels: Dict[Any, str] = {}
+        self.sample_rate = sample_rate
+        self.routes = routes
+        self.interval_ms = interval_ms
+        self.in_flight = 0
+        self.requests = 0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+    def configure(self, sample_rate: float, routes: List[str], interval_ms: int) -> None:
+        self.sample_rate = sample_rate
+        self.routes = routes
+        self.interval_ms = interval_ms
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or bool(self.routes)
+
+    def wants(self, scope: Dict[str, Any]) -> bool:
+        """
+        Whether the request of ASGI `scope` should be profiled.
+        """
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.routes and "app" in scope:
+            for route in scope["app"].router.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    return getattr(route, "path", None) in self.routes
+        return False
+
+    def begin(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+            self._busy.set()
+
+    def end(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if not self.in_flight:
+                self._busy.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._busy.wait()
+            time.sleep(self.interval_ms / 1000)
+            self.sample()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _stack(self, frame) -> Optional[Tuple[str, ...]]:
+        codes = []
+        busy = False
+        while frame is not None:
+            codes.append(frame.f_code)
+            busy = busy or _in_project(frame.f_code.co_filename)
+            frame = frame.f_back
+        if not busy:
+            return None
+        return tuple(self._label(code) for code in reversed(codes))
+
+    def sample(self) -> None:
+        me = threading.get_ident()
+        stacks = [self._stack(frame) for ident, frame in sys._current_frames().items() if ident != me]
+        with self._lock:
+            for stack in stacks:
+                if stack is not None:
+                    self.stacks[stack] += 1
+                    self.samples += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks.clear()
+            self.requests = 0
+            self.samples = 0
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.collapsed())
+
+
+profiler = Profiler(
+    settings.PROFILER_SAMPLE_RATE,
+    [route for route in settings.PROFILER_ROUTES.split(",") if route],
+    settings.PROFILER_INTERVAL_MS,
+)
+
+
+class ProfilingMiddleware:
+    """
+    Keeps the sampler running while profiled requests are in flight.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiler.enabled or not profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler.begin()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.end()
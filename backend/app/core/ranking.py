@@ -0,0 +1,25 @@
+"""
+Feed ranking scores.
+
+`top` orders posts by their net score, likes minus dislikes. `hot` uses the
+classic Reddit formula: the order of magnitude of the net score plus the
+post's age in units of `DECAY_SECONDS`. Newer posts simply start from a
+higher offset, so a post's hot score never has to be recomputed as time
+passes; it only changes when one of its reactions does. Both are stored on
+`posts` and kept current by `app.crud.post.increment_counters`, which lets
+a ranked page be read as an index range scan.
+"""
+import math
+from datetime import datetime
+
+EPOCH = datetime(2024, 1, 1)
+# A post needs ten times the net score of one posted this much later to
+# rank level with it
+DECAY_SECONDS = 45000
+
+
+def hot_score(likes: int, dislikes: int, created_at: datetime) -> float:
+    score = likes - dislikes
+    order = math.log10(max(abs(score), 1))
+    sign = (score > 0) - (score < 0)
+    return round(sign * order + (created_at - EPOCH).total_seconds() / DECAY_SECONDS, 7)
@@ -0,0 +1,150 @@
+"""
+In-process set of revoked access tokens.
+
+Tokens are identified by their `jti` claim (tokens issued before the claim
+existed fall back to a SHA-256 of the raw token), so each live revocation
+costs one short string and one float. The set is loaded from
+`blacklisted_tokens` at startup and kept in sync by `maintain`, which also
+prunes expired entries and deletes expired rows in batches.
+
+A logout takes effect at once on the worker that served it. Other workers
+only learn of it at their next sync, so a revoked token keeps working there
+for up to `TOKEN_REVOCATION_SYNC_SECONDS`; lower the setting to shorten the
+window at the cost of more frequent queries.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.blacklisted_token import BlacklistedToken
+
+logger = logging.getLogger(__name__)
+
+
+def token_id(token: str, payload: Dict[str, Any]) -> str:
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+def _timestamp(value: datetime) -> float:
+    # Stored datetimes are naive UTC, like every other timestamp column
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationList:
+    def __init__(self):
+        self._expiry: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._synced_at: Optional[datetime] = None
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._expiry[jti] = _timestamp(expires_at)
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._expiry
+
+    def prune(self) -> int:
+        """
+        Forget revocations of tokens that have expired anyway.
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        with self._lock:
+            expired = [jti for jti, expires_at in self._expiry.items() if expires_at <= now]
+            for jti in expired:
+                del self._expiry[jti]
+        return len(expired)
+
+    def sync(self, db: Session) -> int:
+        """
+        Load revocations recorded since the last sync (everything unexpired on
+        the first call), including those written by other processes.
+        """
+        now = datetime.utcnow()
+        stmt = select(BlacklistedToken.jti, BlacklistedToken.expires_at).where(
+            BlacklistedToken.expires_at > now
+        )
+        if self._synced_at is not None:
+            # Overlap covers transactions that committed after our last read
+            overlap = timedelta(seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS * 2)
+            stmt = stmt.where(BlacklistedToken.created_at >= self._synced_at - overlap)
+        rows = db.execute(stmt).all()
+        with self._lock:
+            for jti, expires_at in rows:
+                self._expiry[jti] = _timestamp(expires_at)
+        self._synced_at = now
+        return len(rows)
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+
+revoked_tokens = RevocationList()
+
+
+def revoke(db: Session, *, jti: str, expires_at: datetime, user_id: int) -> None:
+    """
+    Record a revocation in `blacklisted_tokens` and in this process's set.
+    """
+    db.add(BlacklistedToken(jti=jti, expires_at=expires_at, user_id=user_id))
+    db.commit()
+    revoked_tokens.add(jti, expires_at)
+
+
+def purge_expired(db: Session, batch_size: int = 1000) -> int:
+    """
+    Delete expired rows from `blacklisted_tokens` in batches of `batch_size`.
+    """
+    now = datetime.utcnow()
+    deleted = 0
+    while True:
+        batch = (
+            select(BlacklistedToken.id)
+            .where(BlacklistedToken.expires_at <= now)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = db.execute(
+            delete(BlacklistedToken)
+            .where(BlacklistedToken.id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def refresh() -> None:
+    """
+    Sync and prune the revocation set and purge expired rows.
+    """
+    db = SessionLocal()
+    try:
+        revoked_tokens.sync(db)
+        revoked_tokens.prune()
+        purged = purge_expired(db, settings.TOKEN_REVOCATION_PURGE_BATCH_SIZE)
+        if purged:
+            logger.info("Purged %d expired revoked tokens", purged)
+    finally:
+        db.close()
+
+
+async def maintain() -> None:
+    """
+    Background job running `refresh` every `TOKEN_REVOCATION_SYNC_SECONDS`.
+    """
+    while True:
+        await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_SECONDS)
+        try:
+            await run_in_threadpool(refresh)
+        except Exception:
+            logger.exception("Token revocation maintenance failed")
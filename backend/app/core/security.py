@@ -1,3 +1,7 @@
+import asyncio
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from jose import jwt, JWTError
@@ -19,6 +23,76 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+class PasswordHasherBusy(Exception):
+    """
+    Raised when too many password hashes are already queued.
+    """
+
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_pending = 0
+
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _hash_executor
+
+
+def start_hash_pool() -> None:
+    """
+    Start the hashing workers up front, while the server process is still
+    small and has few threads to fork.
+    """
+    executor = _get_hash_executor()
+    for _ in range(settings.PASSWORD_HASH_WORKERS):
+        executor.submit(int)
+
+
+@contextmanager
+def hash_slot():
+    """
+    Reserve one of the `PASSWORD_HASH_MAX_PENDING` hashing slots of this
+    process for the duration of the block, or raise `PasswordHasherBusy`.
+
+    Endpoints take the slot before any database work, so a request that is
+    turned away has not touched the connection pool.
+    """
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    _hash_pending += 1
+    try:
+        yield
+    finally:
+        _hash_pending -= 1
+
+
+async def _run_in_hash_pool(func, *args):
+    """
+    Run a bcrypt call in the dedicated process pool so it neither blocks the
+    event loop nor occupies the threadpool shared by sync endpoints. Callers
+    bound the calls in flight with `hash_slot`.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), func, *args)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
 def create_access_token(
     data: Dict[str, Any],
     expires_delta: Optional[timedelta] = None
@@ -30,7 +104,8 @@ def create_access_token(
         )
         to_encode.update({
             "exp": expire,
-            "iat": datetime.now(timezone.utc)
+            "iat": datetime.now(timezone.utc),
+            "jti": uuid.uuid4().hex,
         })
         
         return jwt.encode(
@@ -0,0 +1,64 @@
+"""
+Fast JSON path for read-heavy endpoints.
+
+FastAPI validates whatever an endpoint returns against its `response_model`
+and runs it through `jsonable_encoder` before `json.dumps`. For schemas
+assembled from database rows that is redundant work. `construct` builds
+schemas from trusted ORM objects without validation and `json_response`
+serializes them to bytes with pydantic-core in a single pass; endpoints keep
+`response_model` for the OpenAPI schema only.
+"""
+from functools import lru_cache
+from typing import Any, AbstractSet, Dict, Optional, Type, TypeVar
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def construct(model: Type[M], obj: Any, **values: Any) -> M:
+    """
+    Build `model` from the attributes of `obj` plus `values`, skipping
+    validation. Only use it for data read from the database, and pass
+    nested schemas in `values` so no relationship is lazy loaded.
+    """
+    # Loaded ORM attributes sit in the instance dict; reading them there
+    # skips the attribute instrumentation
+    state = vars(obj)
+    for name in model.model_fields:
+        if name in values:
+            continue
+        if name in state:
+            values[name] = state[name]
+        elif hasattr(obj, name):
+            values[name] = getattr(obj, name)
+    return model.model_construct(**values)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(type_: Any) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+def dump_json(type_: Any, content: Any, *, include: Optional[AbstractSet[str]] = None) -> bytes:
+    """
+    Serialize `content` as `type_`; `include` limits each item of a list to
+    the given fields.
+    """
+    return type_adapter(type_).dump_json(
+        content, include={"__all__": include} if include is not None else None
+    )
+
+
+def json_response(
+    type_: Any,
+    content: Any,
+    *,
+    include: Optional[AbstractSet[str]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Serialize `content` as `type_` straight to a JSON response.
+    """
+    return Response(dump_json(type_, content, include=include), media_type="application/json", headers=headers)
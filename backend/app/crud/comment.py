@@ -0,0 +1,438 @@
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import bindparam, func, literal, null, select, update as sql_update
+from sqlalchemy.orm import Session, aliased, contains_eager
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.core.serialization import construct
+from app.crud import reaction as crud_reaction
+from app.crud import user as crud_user
+from app.db import fulltext
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.reaction import CommentReaction
+from app.schemas.batch import BatchItemResult
+from app.schemas.comment import (
+    CommentBatchItem,
+    CommentCreate,
+    CommentSummary,
+    CommentUpdate,
+    Comment as CommentSchema,
+    CommentWithStats,
+)
+from app.schemas.reaction import ReactionWrite
+from app.schemas.user import User as UserSchema
+
+
+def _comment_stats_columns(viewer_id: Optional[int]):
+    child = aliased(Comment)
+    reply_count = (
+        select(func.count(child.id))
+        .where(child.post_id == Comment.post_id, child.parent_id == Comment.id)
+        .correlate(Comment)
+        .scalar_subquery()
+    )
+    if viewer_id is None:
+        viewer_reaction = null()
+    else:
+        viewer_reaction = (
+            select(CommentReaction.is_like)
+            .where(CommentReaction.comment_id == Comment.id, CommentReaction.user_id == viewer_id)
+            .correlate(Comment)
+            .scalar_subquery()
+        )
+    return (
+        reply_count.label("reply_count"),
+        viewer_reaction.label("viewer_reaction"),
+    )
+
+
+def _with_stats(row) -> CommentWithStats:
+    return construct(
+        CommentWithStats,
+        row.Comment,
+        author=construct(UserSchema, row.Comment.author),
+        replies=[],
+        reply_count=row.reply_count,
+        is_liked=row.viewer_reaction is not None and bool(row.viewer_reaction),
+        is_disliked=row.viewer_reaction is not None and not row.viewer_reaction,
+    )
+
+
+def get_comment_with_stats(
+    db: Session, comment_id: int, viewer_id: Optional[int] = None
+) -> Optional[CommentWithStats]:
+    """
+    Load a single comment with its stats; `replies` is left empty and
+    `reply_count` tells the client whether there is more to fetch.
+    """
+    stmt = (
+        select(Comment, *_comment_stats_columns(viewer_id))
+        .join(Comment.author)
+        .options(contains_eager(Comment.author))
+        .where(Comment.id == comment_id)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        return None
+    return _with_stats(row)
+
+
+def get_comment_tree(
+    db: Session,
+    *,
+    post_id: int,
+    parent_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    max_depth: Optional[int] = None,
+    replies_limit: Optional[int] = None,
+    viewer_id: Optional[int] = None,
+) -> Tuple[List[CommentWithStats], Optional[str]]:
+    """
+    Load a page of comment threads of a post in a single statement.
+
+    The page consists of the direct children of `parent_id` (top-level
+    comments when None), ordered by `(created_at, id)` and addressed by
+    `cursor`. Their descendants are collected with a recursive CTE down to
+    `max_depth` levels below the page. With `replies_limit` each step of the
+    CTE only follows the first replies of every comment, read through the
+    thread index, so the rest of a large thread is never touched; clients
+    fetch it through the replies of that comment. Reaction counts and the
+    viewer's flags are aggregated in SQL and the tree is assembled in memory
+    in O(n).
+
+    Returns the page and the cursor of the next page, if any.
+    """
+    def roots(size: int):
+        stmt = (
+            select(Comment.id)
+            .where(
+                Comment.post_id == post_id,
+                Comment.parent_id == parent_id if parent_id is not None else Comment.parent_id.is_(None),
+            )
+            .order_by(Comment.created_at, Comment.id)
+            .limit(size)
+        )
+        if cursor:
+            after = decode_cursor(cursor, (datetime, int))
+            stmt = stmt.where(keyset_filter((Comment.created_at, Comment.id), after))
+        elif skip:
+            stmt = stmt.offset(skip)
+        return stmt.subquery()
+
+    page_roots = roots(limit)
+    # One root past the page tells whether there is a next page
+    has_more = select(func.count()).select_from(roots(limit + 1)).scalar_subquery() > limit
+
+    tree = select(page_roots.c.id, literal(0).label("depth")).cte("comment_tree", recursive=True)
+    if replies_limit is None:
+        descendants = (
+            select(Comment.id, (tree.c.depth + 1).label("depth"))
+            .join(tree, Comment.parent_id == tree.c.id)
+            .where(Comment.post_id == post_id)
+        )
+    else:
+        reply = aliased(Comment)
+        first_replies = (
+            select(reply.id)
+            .where(reply.post_id == post_id, reply.parent_id == tree.c.id)
+            .order_by(reply.created_at, reply.id)
+            .limit(replies_limit)
+        )
+        descendants = (
+            select(Comment.id, (tree.c.depth + 1).label("depth"))
+            .select_from(tree)
+            .join(Comment, Comment.id.in_(first_replies))
+        )
+    if max_depth is not None:
+        descendants = descendants.where(tree.c.depth < max_depth)
+    tree = tree.union_all(descendants)
+
+    stmt = (
+        select(Comment, tree.c.depth, *_comment_stats_columns(viewer_id), has_more.label("has_more"))
+        .join(tree, tree.c.id == Comment.id)
+        .join(Comment.author)
+        .options(contains_eager(Comment.author))
+        .order_by(tree.c.depth, Comment.created_at, Comment.id)
+    )
+
+    page: List[CommentWithStats] = []
+    nodes: Dict[int, CommentWithStats] = {}
+    last_root = None
+    more = False
+    for row in db.execute(stmt):
+        comment = row.Comment
+        node = _with_stats(row)
+        nodes[comment.id] = node
+        if row.depth == 0:
+            last_root = comment
+            more = row.has_more
+            page.append(node)
+        else:
+            nodes[comment.parent_id].replies.append(node)
+
+    next_cursor = None
+    if more and last_root is not None:
+        next_cursor = encode_cursor((last_root.created_at, last_root.id))
+    return page, next_cursor
+
+
+def tree_version(comments: List[CommentWithStats]) -> Tuple:
+    """
+    Counterpart of `app.crud.post.page_version` for comment trees.
+    """
+    return tuple(
+        (
+            comment.id,
+            comment.updated_at,
+            comment.author.updated_at,
+            comment.likes_count,
+            comment.dislikes_count,
+            comment.reply_count,
+            comment.is_liked,
+            comment.is_disliked,
+            tree_version(comment.replies),
+        )
+        for comment in comments
+    )
+
+
+def get_by_author(
+    db: Session, *, author_id: int, cursor: Optional[str] = None, limit: int = 100
+) -> Tuple[List[CommentSummary], Optional[str]]:
+    """
+    An author's comments, newest first, paginated by an opaque `cursor` over
+    `(created_at, id)`.
+    """
+    stmt = (
+        select(Comment)
+        .join(Comment.author)
+        .options(contains_eager(Comment.author))
+        .where(Comment.author_id == author_id)
+        .order_by(Comment.created_at.desc(), Comment.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        after = decode_cursor(cursor, (datetime, int))
+        stmt = stmt.where(keyset_filter((Comment.created_at, Comment.id), after, descending=True))
+
+    comments = db.scalars(stmt).all()
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = encode_cursor((comments[-1].created_at, comments[-1].id))
+    summaries = [construct(CommentSummary, comment, author=construct(UserSchema, comment.author)) for comment in comments]
+    return summaries, next_cursor
+
+
+def search(
+    db: Session, *, query: str, cursor: Optional[str] = None, limit: int = 20
+) -> Tuple[List[CommentSummary], Optional[str]]:
+    """
+    Comments matching `query`, best match first, see `app.crud.post.search`.
+    """
+    if not query.split():
+        return [], None
+    matches = fulltext.matches(db, Comment.__table__, query)
+    stmt = (
+        select(Comment, matches.c.rank)
+        .join(matches, matches.c.id == Comment.id)
+        .join(Comment.author)
+        .options(contains_eager(Comment.author))
+        .order_by(matches.c.rank.desc(), Comment.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        after = decode_cursor(cursor, (float, int))
+        stmt = stmt.where(keyset_filter((matches.c.rank, Comment.id), after, descending=True))
+
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor((rows[-1].rank, rows[-1].Comment.id))
+    comments = [
+        construct(CommentSummary, row.Comment, author=construct(UserSchema, row.Comment.author)) for row in rows
+    ]
+    return comments, next_cursor
+
+
+def increment_counters(
+    db: Session, comment_ids: Union[int, Sequence[int]], likes: int = 0, dislikes: int = 0
+) -> None:
+    """
+    Atomically shift the reaction counters of one or more comments, see
+    `app.crud.post.increment_counters`.
+    """
+    if not likes and not dislikes:
+        return
+    author_ids = db.scalars(
+        sql_update(Comment)
+        .where(Comment.id.in_([comment_ids] if isinstance(comment_ids, int) else comment_ids))
+        .values(
+            likes_count=Comment.likes_count + likes,
+            dislikes_count=Comment.dislikes_count + dislikes,
+            updated_at=Comment.updated_at,
+        )
+        .returning(Comment.author_id)
+    ).all()
+    if likes:
+        for author_id, count in Counter(author_ids).items():
+            crud_user.increment_aggregates(db, author_id, likes=likes * count)
+
+
+def increment_comment_counts(db: Session, counts: Dict[int, int]) -> None:
+    """
+    Atomically shift the comment counters of posts, `counts` mapping post
+    ids to deltas, in one executemany.
+    """
+    counts = {post_id: delta for post_id, delta in counts.items() if delta}
+    if not counts:
+        return
+    posts = Post.__table__
+    db.connection().execute(
+        posts.update()
+        .where(posts.c.id == bindparam("post_id"))
+        .values(comment_count=posts.c.comment_count + bindparam("delta"), updated_at=posts.c.updated_at),
+        [{"post_id": post_id, "delta": delta} for post_id, delta in counts.items()],
+    )
+
+
+def get(db: Session, comment_id: int) -> Optional[Comment]:
+    return db.get(Comment, comment_id)
+
+
+def create(db: Session, *, comment_in: CommentCreate, post_id: int, author_id: int) -> CommentSchema:
+    comment = Comment(**comment_in.dict(), post_id=post_id, author_id=author_id)
+    db.add(comment)
+    crud_user.increment_aggregates(db, author_id, comments=1)
+    increment_comment_counts(db, {post_id: 1})
+    db.commit()
+    db.refresh(comment)
+    return CommentSchema.from_orm(comment)
+
+
+def update(db: Session, comment: Comment, comment_in: CommentUpdate) -> CommentSchema:
+    for field, value in comment_in.dict(exclude_unset=True).items():
+        setattr(comment, field, value)
+    db.add(comment)
+    db.commit()
+    db.refresh(comment)
+    return CommentSchema.from_orm(comment)
+
+
+def remove(db: Session, comment: Comment) -> CommentSchema:
+    deleted = CommentSchema.from_orm(comment)
+    crud_user.increment_aggregates(db, comment.author_id, comments=-1, likes=-comment.likes_count)
+    increment_comment_counts(db, {comment.post_id: -1})
+    db.delete(comment)
+    db.commit()
+    return deleted
+
+
+def react(db: Session, *, comment_id: int, user_id: int, is_like: bool) -> CommentWithStats:
+    """
+    Set the user's reaction on a comment, adjust the counters and return the
+    comment as the user now sees it.
+    """
+    previous = crud_reaction.set_comment_reaction(
+        db, comment_id=comment_id, user_id=user_id, is_like=is_like
+    )
+    increment_counters(db, comment_id, **crud_reaction.counter_deltas(previous, is_like))
+    db.commit()
+    return get_comment_with_stats(db, comment_id, viewer_id=user_id)
+
+
+def react_many(db: Session, *, user_id: int, operations: Sequence[ReactionWrite]) -> List[BatchItemResult]:
+    """
+    Apply a batch of comment reactions in one transaction, see
+    `app.crud.reaction.apply_batch`.
+    """
+    results = crud_reaction.apply_batch(
+        db,
+        target_model=Comment,
+        upsert_many=crud_reaction.set_comment_reactions,
+        increment_counters=increment_counters,
+        user_id=user_id,
+        operations=operations,
+    )
+    db.commit()
+    return results
+
+
+def create_many(db: Session, *, author_id: int, items: Sequence[CommentBatchItem]) -> List[BatchItemResult]:
+    """
+    Create a batch of comments with one multi-row
+    `INSERT ... ON CONFLICT DO NOTHING` in a single transaction.
+
+    `client_id` makes replays idempotent: an item whose `client_id` the
+    author already used, in an earlier request or earlier in this batch, is
+    reported as a duplicate carrying the id of the existing comment. Items
+    whose post or parent comment does not exist are reported as not found,
+    replies to a comment of another post as invalid.
+    """
+    results = [BatchItemResult(index=index, status="duplicate") for index in range(len(items))]
+    first: Dict[str, int] = {}
+    for index, item in enumerate(items):
+        first.setdefault(item.client_id, index)
+
+    post_ids = {item.post_id for item in items}
+    parent_ids = {item.parent_id for item in items if item.parent_id is not None}
+    posts = set(db.scalars(select(Post.id).where(Post.id.in_(post_ids))))
+    parents = dict(
+        db.execute(select(Comment.id, Comment.post_id).where(Comment.id.in_(parent_ids))).all()
+    ) if parent_ids else {}
+
+    now = datetime.utcnow()
+    rows = []
+    for client_id, index in first.items():
+        item = items[index]
+        if item.post_id not in posts or (item.parent_id is not None and item.parent_id not in parents):
+            results[index].status = "not_found"
+        elif item.parent_id is not None and parents[item.parent_id] != item.post_id:
+            results[index].status = "invalid"
+        else:
+            rows.append(
+                {
+                    "content": item.content,
+                    "post_id": item.post_id,
+                    "parent_id": item.parent_id,
+                    "author_id": author_id,
+                    "client_id": client_id,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+
+    created = {}
+    if rows:
+        stmt = (
+            crud_reaction.dialect_insert(db, Comment)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["author_id", "client_id"])
+            .returning(Comment.client_id, Comment.id)
+        )
+        created = dict(db.execute(stmt).all())
+        crud_user.increment_aggregates(db, author_id, comments=len(created))
+        post_ids = {row["client_id"]: row["post_id"] for row in rows}
+        increment_comment_counts(db, Counter(post_ids[client_id] for client_id in created))
+    existing = dict(
+        db.execute(
+            select(Comment.client_id, Comment.id).where(
+                Comment.author_id == author_id, Comment.client_id.in_(list(first))
+            )
+        ).all()
+    )
+    db.commit()
+
+    for index, item in enumerate(items):
+        result = results[index]
+        if item.client_id in created and first[item.client_id] == index:
+            result.status = "created"
+        if result.status in ("created", "duplicate"):
+            result.id = existing.get(item.client_id)
+    return results
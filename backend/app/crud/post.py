@@ -0,0 +1,408 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import AbstractSet, Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import bindparam, func, null, select, update as sql_update
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core import ranking
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.core.serialization import construct
+from app.crud import reaction as crud_reaction
+from app.crud import user as crud_user
+from app.db import fulltext
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.reaction import PostReaction
+from app.schemas.batch import BatchItemResult
+from app.schemas.comment import CommentSummary
+from app.schemas.post import PostCreate, PostUpdate, Post as PostSchema, PostSummary, PostWithStats
+from app.schemas.reaction import ReactionWrite
+from app.schemas.user import User as UserSchema
+
+# Fields `get_feed` can be limited to
+SUMMARY_FIELDS = frozenset(PostSummary.model_fields)
+
+# Sort key of each feed order, each backed by an index, and the types of its
+# cursor values
+FEED_SORTS = {
+    "new": (Post.created_at, Post.id),
+    "top": (Post.score, Post.id),
+    "hot": (Post.hot_score, Post.id),
+}
+_CURSOR_TYPES = {"new": (datetime, int), "top": (int, int), "hot": (float, int)}
+
+
+def _post_stats_columns(viewer_id: Optional[int]):
+    """
+    The viewer's reaction to each post of the current page.
+
+    The subquery is bounded to a single post and user, so the database
+    resolves it as a unique index lookup per row instead of scanning every
+    reaction. Reaction counts are read from the denormalized counter columns
+    on `posts`.
+    """
+    if viewer_id is None:
+        viewer_reaction = null()
+    else:
+        viewer_reaction = (
+            select(PostReaction.is_like)
+            .where(PostReaction.post_id == Post.id, PostReaction.user_id == viewer_id)
+            .correlate(Post)
+            .scalar_subquery()
+        )
+    return (viewer_reaction.label("viewer_reaction"),)
+
+
+def _comment_previews(db: Session, post_ids: Sequence[int], size: int) -> Dict[int, List[CommentSummary]]:
+    """
+    The first `size` top-level comments of each post, in one statement.
+    """
+    ranked = (
+        select(
+            Comment.id,
+            func.row_number()
+            .over(partition_by=Comment.post_id, order_by=(Comment.created_at, Comment.id))
+            .label("position"),
+        )
+        .where(Comment.post_id.in_(post_ids), Comment.parent_id.is_(None))
+        .subquery()
+    )
+    comments = db.scalars(
+        select(Comment)
+        .join(ranked, ranked.c.id == Comment.id)
+        .options(joinedload(Comment.author))
+        .where(ranked.c.position <= size)
+        .order_by(Comment.created_at, Comment.id)
+    ).all()
+    previews: Dict[int, List[CommentSummary]] = defaultdict(list)
+    for comment in comments:
+        previews[comment.post_id].append(
+            construct(CommentSummary, comment, author=construct(UserSchema, comment.author))
+        )
+    return previews
+
+
+def _attach_comments(db: Session, posts: Sequence[Post]) -> None:
+    """
+    Load the comments of every post on the page in one statement and wire up
+    `post.comments` and `comment.replies` in memory so serialization never
+    falls back to lazy loading.
+    """
+    if not posts:
+        return
+    comments = db.scalars(
+        select(Comment)
+        .options(joinedload(Comment.author))
+        .where(Comment.post_id.in_([post.id for post in posts]))
+        .order_by(Comment.created_at, Comment.id)
+    ).all()
+
+    by_post: Dict[int, List[Comment]] = defaultdict(list)
+    by_parent: Dict[int, List[Comment]] = defaultdict(list)
+    for comment in comments:
+        by_post[comment.post_id].append(comment)
+        if comment.parent_id is not None:
+            by_parent[comment.parent_id].append(comment)
+    for comment in comments:
+        set_committed_value(comment, "replies", by_parent.get(comment.id, []))
+    for post in posts:
+        set_committed_value(post, "comments", by_post.get(post.id, []))
+
+
+def _with_stats(row) -> PostWithStats:
+    post_dict = PostWithStats.from_orm(row.Post)
+    post_dict.is_liked = row.viewer_reaction is not None and bool(row.viewer_reaction)
+    post_dict.is_disliked = row.viewer_reaction is not None and not row.viewer_reaction
+    return post_dict
+
+
+def _summary(row, previews: Optional[Dict[int, List[CommentSummary]]]) -> PostSummary:
+    post = row.Post
+    viewer_reaction = row._mapping.get("viewer_reaction")
+    return construct(
+        PostSummary,
+        post,
+        author=construct(UserSchema, post.author),
+        is_liked=viewer_reaction is not None and bool(viewer_reaction),
+        is_disliked=viewer_reaction is not None and not viewer_reaction,
+        comments_preview=previews.get(post.id, []) if previews is not None else None,
+    )
+
+
+def get_feed(
+    db: Session,
+    *,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    viewer_id: Optional[int] = None,
+    fields: Optional[AbstractSet[str]] = None,
+    preview: int = 0,
+    sort: str = "new",
+    author_id: Optional[int] = None,
+) -> Tuple[List[PostSummary], Optional[str]]:
+    """
+    Return a page of posts with their author, counters, the viewer's
+    reaction flags and optionally a preview of the first `preview` top-level
+    comments, using a fixed number of statements regardless of the page
+    size. `sort` is one of `FEED_SORTS`.
+
+    When `fields` is given, stats outside of it are not computed and keep
+    their defaults. `author_id` limits the page to one author's posts.
+
+    Pages are addressed by an opaque `cursor` over the sort key; `skip` is
+    only honoured for the first page to keep old OFFSET clients working.
+    Ranked orders move while reactions come in, so a post can show up on
+    two pages of the same walk or on none.
+    Returns the page and the cursor of the next page, if any.
+    """
+    wanted = SUMMARY_FIELDS if fields is None else fields
+    columns = []
+    if viewer_id is not None and wanted & {"is_liked", "is_disliked"}:
+        columns.extend(_post_stats_columns(viewer_id))
+    keys = FEED_SORTS[sort]
+    stmt = (
+        select(Post, *columns)
+        .join(Post.author)
+        .options(contains_eager(Post.author))
+        .order_by(*(key.desc() for key in keys))
+        .limit(limit + 1)
+    )
+    if author_id is not None:
+        stmt = stmt.where(Post.author_id == author_id)
+    if cursor:
+        after = decode_cursor(cursor, _CURSOR_TYPES[sort])
+        stmt = stmt.where(keyset_filter(keys, after, descending=True))
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].Post
+        next_cursor = encode_cursor([getattr(last, key.key) for key in keys])
+
+    previews = None
+    if preview and "comments_preview" in wanted:
+        previews = _comment_previews(db, [row.Post.id for row in rows], preview) if rows else {}
+    return [_summary(row, previews) for row in rows], next_cursor
+
+
+def search(
+    db: Session,
+    *,
+    query: str,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    viewer_id: Optional[int] = None,
+) -> Tuple[List[PostSummary], Optional[str]]:
+    """
+    Posts whose title or body match `query`, best match first, served from
+    the full-text index (see `app.db.fulltext`). Title matches rank above
+    body matches.
+
+    Pages are addressed by an opaque `cursor` over `(rank, id)`. Returns the
+    page and the cursor of the next page, if any.
+    """
+    if not query.split():
+        return [], None
+    matches = fulltext.matches(db, Post.__table__, query)
+    stmt = (
+        select(Post, matches.c.rank, *_post_stats_columns(viewer_id))
+        .join(matches, matches.c.id == Post.id)
+        .join(Post.author)
+        .options(contains_eager(Post.author))
+        .order_by(matches.c.rank.desc(), Post.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        after = decode_cursor(cursor, (float, int))
+        stmt = stmt.where(keyset_filter((matches.c.rank, Post.id), after, descending=True))
+
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor((rows[-1].rank, rows[-1].Post.id))
+    return [_summary(row, None) for row in rows], next_cursor
+
+
+def page_version(posts: Sequence[PostSummary]) -> Tuple:
+    """
+    Everything of a feed page that changes when it should be resent: edits,
+    reaction counters, comments and the viewer's flags.
+    """
+    return tuple(
+        (
+            post.id,
+            post.updated_at,
+            post.author.updated_at,
+            post.likes_count,
+            post.dislikes_count,
+            post.comment_count,
+            post.is_liked,
+            post.is_disliked,
+            tuple(
+                (comment.id, comment.updated_at, comment.likes_count, comment.dislikes_count)
+                for comment in post.comments_preview or ()
+            ),
+        )
+        for post in posts
+    )
+
+
+def get_post_summary(
+    db: Session, post_id: int, viewer_id: Optional[int] = None
+) -> Optional[PostSummary]:
+    stmt = (
+        select(Post, *_post_stats_columns(viewer_id))
+        .join(Post.author)
+        .options(contains_eager(Post.author))
+        .where(Post.id == post_id)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        return None
+    return _summary(row, None)
+
+
+def get_post_with_stats(
+    db: Session, post_id: int, viewer_id: Optional[int] = None
+) -> Optional[PostWithStats]:
+    stmt = (
+        select(Post, *_post_stats_columns(viewer_id))
+        .join(Post.author)
+        .options(contains_eager(Post.author))
+        .where(Post.id == post_id)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        return None
+    _attach_comments(db, [row.Post])
+    return _with_stats(row)
+
+
+def increment_counters(
+    db: Session, post_ids: Union[int, Sequence[int]], likes: int = 0, dislikes: int = 0
+) -> None:
+    """
+    Atomically shift the reaction counters of one or more posts with
+    `UPDATE ... SET n = n + delta`, so concurrent reactions never lose updates.
+    `updated_at` is left alone as it tracks edits of the post itself.
+
+    Also shifts the authors' `likes_received` and the ranking scores:
+    `score` in the same statement, `hot_score` in a second one from the
+    counters it returned. The rows stay locked until commit, so the last
+    writer always computes from the latest counters.
+    """
+    if not likes and not dislikes:
+        return
+    rows = db.execute(
+        sql_update(Post)
+        .where(Post.id.in_([post_ids] if isinstance(post_ids, int) else post_ids))
+        .values(
+            likes_count=Post.likes_count + likes,
+            dislikes_count=Post.dislikes_count + dislikes,
+            score=Post.score + likes - dislikes,
+            updated_at=Post.updated_at,
+        )
+        .returning(Post.id, Post.author_id, Post.likes_count, Post.dislikes_count, Post.created_at)
+    ).all()
+    update_hot_scores(db, rows)
+    if likes:
+        for author_id, count in Counter(row.author_id for row in rows).items():
+            crud_user.increment_aggregates(db, author_id, likes=likes * count)
+
+
+def update_hot_scores(db: Session, rows: Sequence) -> None:
+    """
+    Store the hot score of every post in `rows`, which carry its `id`,
+    `likes_count`, `dislikes_count` and `created_at`, in one executemany.
+    """
+    if not rows:
+        return
+    posts = Post.__table__
+    db.connection().execute(
+        posts.update()
+        .where(posts.c.id == bindparam("post_id"))
+        .values(hot_score=bindparam("hot"), updated_at=posts.c.updated_at),
+        [
+            {"post_id": row.id, "hot": ranking.hot_score(row.likes_count, row.dislikes_count, row.created_at)}
+            for row in rows
+        ],
+    )
+
+
+def get(db: Session, post_id: int) -> Optional[Post]:
+    return db.get(Post, post_id)
+
+
+def _to_schema(db: Session, post: Post) -> PostSchema:
+    _attach_comments(db, [post])
+    return PostSchema.from_orm(post)
+
+
+def create(db: Session, *, post_in: PostCreate, author_id: int) -> PostSchema:
+    post = Post(**post_in.dict(), author_id=author_id)
+    db.add(post)
+    crud_user.increment_aggregates(db, author_id, posts=1)
+    db.commit()
+    db.refresh(post)
+    return _to_schema(db, post)
+
+
+def update(db: Session, post: Post, post_in: PostUpdate) -> PostSchema:
+    for field, value in post_in.dict(exclude_unset=True).items():
+        setattr(post, field, value)
+    db.add(post)
+    db.commit()
+    db.refresh(post)
+    return _to_schema(db, post)
+
+
+def remove(db: Session, post: Post) -> PostSchema:
+    deleted = _to_schema(db, post)
+    crud_user.increment_aggregates(db, post.author_id, posts=-1, likes=-post.likes_count)
+    # The post's comments go with it
+    removed: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+    for comment in post.comments:
+        removed[comment.author_id][0] += 1
+        removed[comment.author_id][1] += comment.likes_count
+    for author_id, (comments, likes) in removed.items():
+        crud_user.increment_aggregates(db, author_id, comments=-comments, likes=-likes)
+    db.delete(post)
+    db.commit()
+    return deleted
+
+
+def react(db: Session, *, post_id: int, user_id: int, is_like: bool) -> PostSummary:
+    """
+    Set the user's reaction on a post, adjust the counters and return the
+    post as the user now sees it.
+    """
+    previous = crud_reaction.set_post_reaction(
+        db, post_id=post_id, user_id=user_id, is_like=is_like
+    )
+    increment_counters(db, post_id, **crud_reaction.counter_deltas(previous, is_like))
+    db.commit()
+    return get_post_summary(db, post_id, viewer_id=user_id)
+
+
+def react_many(db: Session, *, user_id: int, operations: Sequence[ReactionWrite]) -> List[BatchItemResult]:
+    """
+    Apply a batch of post reactions in one transaction, see
+    `app.crud.reaction.apply_batch`.
+    """
+    results = crud_reaction.apply_batch(
+        db,
+        target_model=Post,
+        upsert_many=crud_reaction.set_post_reactions,
+        increment_counters=increment_counters,
+        user_id=user_id,
+        operations=operations,
+    )
+    db.commit()
+    return results
@@ -0,0 +1,221 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, null, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.reaction import PostReaction, CommentReaction
+from app.schemas.batch import BatchItemResult
+from app.schemas.reaction import ReactionState, ReactionWrite
+
+
+def dialect_insert(db: Session, model):
+    """
+    Dialect-specific INSERT construct that supports `ON CONFLICT`.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def _upsert(db: Session, model, target_column: str, target_id: int, user_id: int, is_like: bool) -> Optional[bool]:
+    """
+    Set the user's reaction on a target with a single
+    `INSERT ... ON CONFLICT DO UPDATE` and return the previous reaction
+    (None if there was none).
+
+    The update only fires when the reaction actually flips, so no row comes
+    back for a repeated click. Inserted rows are told apart from flipped ones
+    by their `created_at`, which only equals this statement's timestamp for
+    a fresh row.
+    """
+    now = datetime.utcnow()
+    stmt = dialect_insert(db, model).values(
+        user_id=user_id,
+        is_like=is_like,
+        created_at=now,
+        updated_at=now,
+        **{target_column: target_id},
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", target_column],
+        set_={"is_like": stmt.excluded.is_like, "updated_at": stmt.excluded.updated_at},
+        where=model.is_like != stmt.excluded.is_like,
+    ).returning(model.created_at)
+
+    row = db.execute(stmt).first()
+    if row is None:
+        return is_like
+    if row.created_at == now:
+        return None
+    return not is_like
+
+
+def _upsert_many(
+    db: Session, model, target_column: str, user_id: int, reactions: Dict[int, bool]
+) -> Dict[int, Optional[bool]]:
+    """
+    Multi-row variant of `_upsert` for `reactions` (target id to is_like):
+    one `INSERT ... ON CONFLICT DO UPDATE` for the whole batch. Returns the
+    previous reaction of every target whose reaction changed (None for new
+    ones); unchanged targets are left out.
+    """
+    if not reactions:
+        return {}
+    now = datetime.utcnow()
+    stmt = dialect_insert(db, model).values(
+        [
+            {
+                "user_id": user_id,
+                "is_like": is_like,
+                "created_at": now,
+                "updated_at": now,
+                target_column: target_id,
+            }
+            for target_id, is_like in reactions.items()
+        ]
+    )
+    target = getattr(model, target_column)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", target_column],
+        set_={"is_like": stmt.excluded.is_like, "updated_at": stmt.excluded.updated_at},
+        where=model.is_like != stmt.excluded.is_like,
+    ).returning(target, model.created_at)
+
+    changed = {}
+    for target_id, created_at in db.execute(stmt):
+        changed[target_id] = None if created_at == now else not reactions[target_id]
+    return changed
+
+
+def set_post_reaction(db: Session, *, post_id: int, user_id: int, is_like: bool) -> Optional[bool]:
+    return _upsert(db, PostReaction, "post_id", post_id, user_id, is_like)
+
+
+def set_comment_reaction(db: Session, *, comment_id: int, user_id: int, is_like: bool) -> Optional[bool]:
+    return _upsert(db, CommentReaction, "comment_id", comment_id, user_id, is_like)
+
+
+def get_post_reactions(db: Session, *, user_id: int, post_ids: Sequence[int]) -> Dict[int, bool]:
+    """
+    The user's reactions on the given posts, as post id to is_like.
+    """
+    if not post_ids:
+        return {}
+    rows = db.execute(
+        select(PostReaction.post_id, PostReaction.is_like).where(
+            PostReaction.user_id == user_id, PostReaction.post_id.in_(post_ids)
+        )
+    )
+    return {post_id: is_like for post_id, is_like in rows}
+
+
+def set_post_reactions(db: Session, *, user_id: int, reactions: Dict[int, bool]) -> Dict[int, Optional[bool]]:
+    return _upsert_many(db, PostReaction, "post_id", user_id, reactions)
+
+
+def set_comment_reactions(db: Session, *, user_id: int, reactions: Dict[int, bool]) -> Dict[int, Optional[bool]]:
+    return _upsert_many(db, CommentReaction, "comment_id", user_id, reactions)
+
+
+def apply_batch(
+    db: Session,
+    *,
+    target_model,
+    upsert_many: Callable[..., Dict[int, Optional[bool]]],
+    increment_counters: Callable[..., None],
+    user_id: int,
+    operations: Sequence[ReactionWrite],
+) -> List[BatchItemResult]:
+    """
+    Apply a batch of reactions of one user in the current transaction: one
+    existence check, one multi-row upsert and one counter update per
+    distinct delta (at most four). Returns the outcome of each operation.
+
+    When a batch reacts to the same target more than once the last
+    operation wins and the earlier ones are reported as superseded.
+    """
+    results = [BatchItemResult(index=index, status="superseded", id=op.id) for index, op in enumerate(operations)]
+    last: Dict[int, int] = {op.id: index for index, op in enumerate(operations)}
+    existing = set(db.scalars(select(target_model.id).where(target_model.id.in_(last))))
+
+    reactions = {}
+    for target_id, index in last.items():
+        if target_id in existing:
+            reactions[target_id] = operations[index].is_like
+        else:
+            results[index].status = "not_found"
+    changed = upsert_many(db, user_id=user_id, reactions=reactions)
+
+    by_delta: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for target_id, is_like in reactions.items():
+        result = results[last[target_id]]
+        if target_id not in changed:
+            result.status = "unchanged"
+            continue
+        previous = changed[target_id]
+        result.status = "created" if previous is None else "updated"
+        deltas = counter_deltas(previous, is_like)
+        by_delta[deltas["likes"], deltas["dislikes"]].append(target_id)
+    for (likes, dislikes), target_ids in by_delta.items():
+        increment_counters(db, target_ids, likes=likes, dislikes=dislikes)
+    return results
+
+
+def _states(
+    db: Session, model, reaction_model, target_column: str, ids: Sequence[int], user_id: Optional[int]
+) -> List[ReactionState]:
+    """
+    Reaction counters and the user's reaction for every existing target in
+    `ids`, in one statement, in the order the ids were given.
+    """
+    stmt = select(model.id, model.likes_count, model.dislikes_count)
+    if user_id is None:
+        stmt = stmt.add_columns(null().label("is_like"))
+    else:
+        stmt = stmt.add_columns(reaction_model.is_like).outerjoin(
+            reaction_model,
+            and_(getattr(reaction_model, target_column) == model.id, reaction_model.user_id == user_id),
+        )
+    rows = {row.id: row for row in db.execute(stmt.where(model.id.in_(set(ids))))}
+    states = []
+    for target_id in dict.fromkeys(ids):
+        row = rows.get(target_id)
+        if row is None:
+            continue
+        states.append(
+            ReactionState(
+                id=row.id,
+                likes_count=row.likes_count,
+                dislikes_count=row.dislikes_count,
+                is_liked=row.is_like is True,
+                is_disliked=row.is_like is False,
+            )
+        )
+    return states
+
+
+def get_post_states(db: Session, *, ids: Sequence[int], user_id: Optional[int] = None) -> List[ReactionState]:
+    return _states(db, Post, PostReaction, "post_id", ids, user_id)
+
+
+def get_comment_states(db: Session, *, ids: Sequence[int], user_id: Optional[int] = None) -> List[ReactionState]:
+    return _states(db, Comment, CommentReaction, "comment_id", ids, user_id)
+
+
+def counter_deltas(previous: Optional[bool], is_like: bool) -> Dict[str, int]:
+    """
+    Counter changes caused by moving a reaction from `previous` to `is_like`,
+    as keyword arguments for `increment_counters`.
+    """
+    if previous == is_like:
+        return {}
+    deltas = {"likes": 0, "dislikes": 0}
+    deltas["likes" if is_like else "dislikes"] += 1
+    if previous is not None:
+        deltas["likes" if previous else "dislikes"] -= 1
+    return deltas
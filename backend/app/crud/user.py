@@ -0,0 +1,52 @@
+from typing import Optional
+
+from sqlalchemy import select, update as sql_update
+from sqlalchemy.orm import Session
+
+from app.core.serialization import construct
+from app.models.user import User
+from app.schemas.user import UserProfile
+
+
+def get_by_username(db: Session, username: str) -> Optional[User]:
+    return db.scalars(select(User).where(User.username == username)).first()
+
+
+def exists(db: Session, user_id: int) -> bool:
+    return db.scalar(select(User.id).where(User.id == user_id)) is not None
+
+
+def create(db: Session, *, username: str, hashed_password: str) -> User:
+    user = User(username=username, hashed_password=hashed_password)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def get_profile(db: Session, user_id: int) -> Optional[UserProfile]:
+    user = db.get(User, user_id)
+    if user is None:
+        return None
+    return construct(UserProfile, user)
+
+
+def increment_aggregates(db: Session, user_id: int, *, posts: int = 0, comments: int = 0, likes: int = 0) -> None:
+    """
+    Atomically shift the profile aggregates of a user in the current
+    transaction, see `app.crud.post.increment_counters`. Every write that
+    creates or deletes posts and comments, or changes their likes, calls
+    this; `reconcile_counters.py` rebuilds the aggregates from scratch.
+    """
+    if not posts and not comments and not likes:
+        return
+    db.execute(
+        sql_update(User)
+        .where(User.id == user_id)
+        .values(
+            post_count=User.post_count + posts,
+            comment_count=User.comment_count + comments,
+            likes_received=User.likes_received + likes,
+            updated_at=User.updated_at,
+        )
+    )
@@ -0,0 +1,82 @@
+"""
+Bulk loading of plain rows, bypassing the ORM.
+
+Postgres with psycopg2 gets `COPY ... FROM STDIN` and every other database
+one executemany `INSERT` per `chunk_size` rows, so memory stays flat
+however many rows are streamed in. Rows carry their own ids so related rows
+can reference them without reading them back; call `reset_sequence` once a
+table is loaded.
+"""
+import io
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+from sqlalchemy import Table, func, select, text
+from sqlalchemy.engine import Connection
+
+
+def chunked(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def next_id(connection: Connection, table: Table) -> int:
+    return (connection.scalar(select(func.max(table.c.id))) or 0) + 1
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (
+        str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def _copy(connection: Connection, table: Table, columns: Sequence[str], rows: List[Dict[str, Any]]) -> None:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(row[column]) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def load(connection: Connection, table: Table, rows: Iterable[Dict[str, Any]], chunk_size: int = 5000) -> int:
+    """
+    Insert `rows`, dicts with the same keys, into `table`. Returns the
+    number of rows loaded.
+    """
+    use_copy = connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2"
+    loaded = 0
+    for chunk in chunked(rows, chunk_size):
+        columns = list(chunk[0])
+        if use_copy:
+            _copy(connection, table, columns, chunk)
+        else:
+            connection.execute(table.insert(), chunk)
+        loaded += len(chunk)
+    return loaded
+
+
+def reset_sequence(connection: Connection, table: Table) -> None:
+    """
+    Move the id sequence of `table` past the explicit ids loaded into it.
+    SQLite needs nothing, it continues from the largest rowid.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"coalesce((SELECT max(id) FROM {table.name}), 0) + 1, false)"
+            )
+        )
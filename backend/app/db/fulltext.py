@@ -0,0 +1,97 @@
+"""
+Full-text search indexes and matching.
+
+Postgres keeps a stored generated `search_vector` tsvector column on every
+searchable table with a GIN index over it. The column is left out of the
+models so SQLAlchemy never reads or writes it.
+
+SQLite has no tsvector. Each searchable table gets an external-content FTS5
+table, `<table>_fts`, whose rowid is the row's id. Triggers keep it in sync.
+
+`searchable` registers the DDL so `Base.metadata.create_all` creates both.
+The Alembic migration issues the same statements for existing databases.
+"""
+from typing import Dict, List
+
+from sqlalchemy import DDL, Double, Table, cast, column, event, func, literal, literal_column, select, table
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import Session
+
+# Text search configuration of the generated columns; changing it needs a
+# migration that recreates them
+LANGUAGE = "english"
+
+# bm25 weight of each setweight() class, so SQLite ranks title matches above
+# body matches like Postgres does
+_SQLITE_WEIGHTS = {"A": 10.0, "B": 4.0, "C": 2.0, "D": 1.0}
+
+
+def postgres_ddl(name: str, weights: Dict[str, str]) -> List[str]:
+    vector = " || ".join(
+        f"setweight(to_tsvector('{LANGUAGE}', coalesce({column_name}, '')), '{weight}')"
+        for column_name, weight in weights.items()
+    )
+    return [
+        f"ALTER TABLE {name} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX ix_{name}_search_vector ON {name} USING gin (search_vector)",
+    ]
+
+
+def sqlite_ddl(name: str, weights: Dict[str, str]) -> List[str]:
+    columns = ", ".join(weights)
+    new = ", ".join(f"new.{column_name}" for column_name in weights)
+    old = ", ".join(f"old.{column_name}" for column_name in weights)
+    delete = f"INSERT INTO {name}_fts({name}_fts, rowid, {columns}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {name}_fts(rowid, {columns}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE {name}_fts USING fts5({columns}, content='{name}', content_rowid='id')",
+        f"CREATE TRIGGER {name}_fts_ai AFTER INSERT ON {name} BEGIN {insert} END",
+        f"CREATE TRIGGER {name}_fts_ad AFTER DELETE ON {name} BEGIN {delete} END",
+        f"CREATE TRIGGER {name}_fts_au AFTER UPDATE OF {columns} ON {name} BEGIN {delete} {insert} END",
+        # Index the rows that already exist
+        f"INSERT INTO {name}_fts({name}_fts) VALUES ('rebuild')",
+    ]
+
+
+def searchable(target: Table, weights: Dict[str, str]) -> None:
+    """
+    Make the `weights` columns of `target` (column name to Postgres weight
+    class, A to D) searchable with `matches`.
+    """
+    target.info["search_weights"] = weights
+    for statement in postgres_ddl(target.name, weights):
+        event.listen(target, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in sqlite_ddl(target.name, weights):
+        event.listen(target, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        target, "after_drop", DDL(f"DROP TABLE IF EXISTS {target.name}_fts").execute_if(dialect="sqlite")
+    )
+
+
+def matches(db: Session, target: Table, query: str):
+    """
+    Subquery of the `(id, rank)` of the rows of `target` matching the user
+    supplied `query`, higher ranks first.
+
+    The rank is a double on both dialects so the value a cursor carries
+    compares equal to the stored one; Postgres' `ts_rank_cd` returns a
+    float4, which a float8 cursor value would not match on ties.
+    """
+    weights = target.info["search_weights"]
+    if db.get_bind().dialect.name == "sqlite":
+        fts = table(f"{target.name}_fts", column("rowid"))
+        # Quote every term so FTS5 operators in user input are taken literally
+        terms = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+        bm25 = func.bm25(literal_column(fts.name), *(_SQLITE_WEIGHTS[weight] for weight in weights.values()))
+        return (
+            select(fts.c.rowid.label("id"), (-bm25).label("rank"))
+            .where(literal_column(fts.name).op("MATCH")(terms))
+            .subquery()
+        )
+    vector = literal_column(f"{target.name}.search_vector")
+    tsquery = func.websearch_to_tsquery(cast(literal(LANGUAGE), REGCONFIG), query)
+    return (
+        select(target.c.id, cast(func.ts_rank_cd(vector, tsquery), Double).label("rank"))
+        .where(vector.op("@@")(tsquery))
+        .subquery()
+    )
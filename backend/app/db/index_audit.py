@@ -0,0 +1,146 @@
+"""
+Index audit of the live database.
+
+- `unindexed_foreign_keys` lists foreign key columns that no index, primary
+  key or unique constraint starts with. Deleting a parent row, or joining
+  from it, then reads the whole child table.
+- `slow_plans` runs the application's main read paths, captures their
+  statements and reports every plan step that reads a whole table. On
+  Postgres the plans are taken with sequential scans disabled, so a Seq Scan
+  that remains means there is no usable index rather than a small table.
+  On SQLite an index scan followed by a sort counts too, as the query reads
+  the whole index in the wrong order before it can apply its LIMIT.
+
+Run it with `python index_audit.py`, or on every start with
+`DB_INDEX_AUDIT_ON_STARTUP=true`, which logs the findings as warnings.
+"""
+import json
+import logging
+import re
+from typing import Callable, Dict, List, NamedTuple
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# `SCAN <table> [AS <alias>] [USING [COVERING] INDEX <index>]`
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?( USING (?:COVERING )?INDEX \w+)?$")
+# An index scan whose order the query can't use reads the whole index
+_SQLITE_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+class Finding(NamedTuple):
+    check: str
+    table: str
+    detail: str
+
+    def __str__(self) -> str:
+        return f"[{self.check}] {self.table}: {self.detail}"
+
+
+def unindexed_foreign_keys(bind: Engine) -> List[Finding]:
+    inspector = inspect(bind)
+    findings = []
+    for table in inspector.get_table_names():
+        prefixes = [index["column_names"] for index in inspector.get_indexes(table)]
+        prefixes += [constraint["column_names"] for constraint in inspector.get_unique_constraints(table)]
+        prefixes.append(inspector.get_pk_constraint(table)["constrained_columns"])
+        for foreign_key in inspector.get_foreign_keys(table):
+            columns = foreign_key["constrained_columns"]
+            if not any(prefix[: len(columns)] == columns for prefix in prefixes):
+                findings.append(
+                    Finding(
+                        "foreign_key",
+                        table,
+                        f"({', '.join(columns)}) references {foreign_key['referred_table']} without an index",
+                    )
+                )
+    return findings
+
+
+def _read_paths(db: Session) -> Dict[str, Callable[[], object]]:
+    from app.crud import comment as crud_comment
+    from app.crud import post as crud_post
+    from app.crud import reaction as crud_reaction
+    from app.models.post import Post
+    from app.models.user import User
+
+    user_id = db.scalar(select(func.min(User.id))) or 1
+    post_id = db.scalar(select(func.min(Post.id))) or 1
+    return {
+        "feed": lambda: crud_post.get_feed(db, limit=20, viewer_id=user_id, preview=3),
+        "feed sort=top": lambda: crud_post.get_feed(db, limit=20, sort="top"),
+        "feed sort=hot": lambda: crud_post.get_feed(db, limit=20, sort="hot"),
+        "author posts": lambda: crud_post.get_feed(db, limit=20, author_id=user_id),
+        "post": lambda: crud_post.get_post_with_stats(db, post_id, viewer_id=user_id),
+        "comment tree": lambda: crud_comment.get_comment_tree(db, post_id=post_id, limit=20, viewer_id=user_id),
+        "author comments": lambda: crud_comment.get_by_author(db, author_id=user_id, limit=20),
+        "post reactions": lambda: crud_reaction.get_post_states(db, ids=[post_id], user_id=user_id),
+    }
+
+
+def _scanned_tables(connection: Connection, statement: str, parameters, tables: List[str]) -> List[str]:
+    if connection.dialect.name == "sqlite":
+        plan = [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+        sorted_after = _SQLITE_SORT in plan
+        scans = (_SQLITE_SCAN.match(step) for step in plan)
+        return [
+            scan.group(1)
+            for scan in scans
+            if scan and scan.group(1) in tables and (not scan.group(2) or sorted_after)
+        ]
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scanned = []
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan":
+                scanned.append(node["Relation Name"])
+            nodes.extend(node.get("Plans", ()))
+        return scanned
+    return []
+
+
+def slow_plans(bind: Engine) -> List[Finding]:
+    tables = inspect(bind).get_table_names()
+    findings = []
+    with bind.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+                captured.append((statement, parameters))
+
+        db = Session(bind=connection)
+        for name, read in _read_paths(db).items():
+            captured.clear()
+            event.listen(connection, "before_cursor_execute", capture)
+            try:
+                read()
+            finally:
+                event.remove(connection, "before_cursor_execute", capture)
+            for statement, parameters in captured:
+                for table in _scanned_tables(connection, statement, parameters, tables):
+                    findings.append(Finding("plan", table, f"{name} reads the whole table"))
+        db.close()
+        connection.rollback()
+    return list(dict.fromkeys(findings))
+
+
+def audit(bind: Engine) -> List[Finding]:
+    return unindexed_foreign_keys(bind) + slow_plans(bind)
+
+
+def log_findings(bind: Engine) -> None:
+    findings = audit(bind)
+    for finding in findings:
+        logger.warning("Index audit: %s", finding)
+    if not findings:
+        logger.info("Index audit: no findings")
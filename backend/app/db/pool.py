@@ -0,0 +1,107 @@
+"""
+Connection pool instrumentation.
+
+`instrument` derives a pool class that times every checkout, so pool
+starvation shows up as wait time instead of unexplained latency. Totals are
+kept per engine in `PoolMetrics`; the wait of the current request is added to
+the `RequestScope` installed by `app.db.session.DatabaseRequestMiddleware`.
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class RequestScope:
+    """
+    Database state of one HTTP request.
+    """
+
+    def __init__(self):
+        self.db: Any = None
+        # Session of get_read_db, on a replica when there are any
+        self.read_db: Any = None
+        self.pool_wait = 0.0
+        self.checkouts = 0
+        # Filled in by app.db.query_metrics when DB_QUERY_METRICS is on
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+
+
+request_scope: ContextVar[Optional[RequestScope]] = ContextVar("request_scope", default=None)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, wait: float, overflowed: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            if overflowed:
+                self.overflow_events += 1
+        scope = request_scope.get()
+        if scope is not None:
+            scope.pool_wait += wait
+            scope.checkouts += 1
+
+    def record_timeout(self, wait: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def stats(self, pool: QueuePool) -> Dict[str, Any]:
+        with self._lock:
+            checkouts = self.checkouts
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "checkouts": checkouts,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_total, 6),
+                "wait_seconds_max": round(self.wait_max, 6),
+                "wait_seconds_avg": round(self.wait_total / checkouts, 6) if checkouts else 0.0,
+            }
+
+
+class _InstrumentedPool:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        overflow = self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - started)
+            raise
+        # Past pool_size, every new connection is an overflow connection
+        overflowed = self.overflow() > max(0, overflow)
+        self.metrics.record_checkout(time.perf_counter() - started, overflowed)
+        return connection
+
+
+def instrument(pool_class: Type[QueuePool], metrics: PoolMetrics) -> Type[QueuePool]:
+    """
+    Subclass `pool_class` to report checkouts to `metrics`. `Pool.recreate`
+    reuses the class, so the metrics survive `Engine.dispose`.
+    """
+    return type(
+        f"Instrumented{pool_class.__name__}",
+        (_InstrumentedPool, pool_class),
+        {"metrics": metrics},
+    )
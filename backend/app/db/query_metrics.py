@@ -0,0 +1,178 @@
+"""
+SQL statement metrics per request.
+
+With `DB_QUERY_METRICS` enabled, `instrument` hooks the cursor events of an
+engine and adds the count and duration of every statement to the
+`RequestScope` of the request that issued it, keeping the slowest few.
+`app.db.session.DatabaseRequestMiddleware` then reports them as
+`Server-Timing` entries, warns about requests that issue more than
+`DB_STATEMENT_BUDGET` statements and records them per route in `metrics`,
+which `/metrics` serves in the Prometheus text format.
+"""
+import heapq
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.pool import RequestScope, request_scope
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the statements per request histogram
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# Characters that can't appear in a Server-Timing description
+_UNSAFE = re.compile(r'[^\x20-\x7e]|["\\]')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    scope = request_scope.get()
+    if scope is None:
+        return
+    scope.statements += 1
+    scope.db_time += elapsed
+    if len(scope.slowest) < settings.DB_SLOW_STATEMENTS:
+        heapq.heappush(scope.slowest, (elapsed, statement))
+    else:
+        heapq.heappushpop(scope.slowest, (elapsed, statement))
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def instrument(bind: Engine) -> None:
+    """
+    Attribute the statements of `bind`, a sync engine or the `sync_engine` of
+    an async one, to the current request.
+    """
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+    event.listen(bind, "handle_error", _handle_error)
+
+
+def slowest(scope: RequestScope) -> List[Tuple[float, str]]:
+    return sorted(scope.slowest, reverse=True)
+
+
+def _describe(statement: str, length: int = 80) -> str:
+    return _UNSAFE.sub(" ", " ".join(statement.split()))[:length]
+
+
+def server_timing(scope: RequestScope) -> List[str]:
+    """
+    `Server-Timing` entries of the request: the total database time with the
+    statement count, then each of the slowest statements.
+    """
+    entries = [f'db;dur={scope.db_time * 1000:.2f};desc="statements: {scope.statements}"']
+    entries.extend(
+        f'db-statement;dur={elapsed * 1000:.2f};desc="{_describe(statement)}"'
+        for elapsed, statement in slowest(scope)
+    )
+    return entries
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class QueryMetrics:
+    """
+    Totals per route since the process started.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def record(self, method: str, route: str, scope: RequestScope, over_budget: bool) -> None:
+        with self._lock:
+            totals = self._routes.setdefault(
+                (method, route),
+                {
+                    "requests": 0,
+                    "statements": 0,
+                    "db_seconds": 0.0,
+                    "over_budget": 0,
+                    "buckets": [0] * len(STATEMENT_BUCKETS),
+                },
+            )
+            totals["requests"] += 1
+            totals["statements"] += scope.statements
+            totals["db_seconds"] += scope.db_time
+            totals["over_budget"] += over_budget
+            for i, bound in enumerate(STATEMENT_BUCKETS):
+                if scope.statements <= bound:
+                    totals["buckets"][i] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            routes = {key: {**totals, "buckets": list(totals["buckets"])} for key, totals in self._routes.items()}
+
+        lines = []
+
+        def counter(name: str, help_text: str, field: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, route), totals in routes.items():
+                lines.append(f'{name}{{method="{method}",route="{_label(route)}"}} {totals[field]}')
+
+        counter("http_requests_total", "Requests served.", "requests")
+        counter("db_statements_total", "SQL statements issued.", "statements")
+        counter("db_statement_seconds_total", "Time spent executing SQL statements.", "db_seconds")
+        counter(
+            "db_statement_budget_exceeded_total",
+            "Requests that issued more statements than DB_STATEMENT_BUDGET.",
+            "over_budget",
+        )
+
+        name = "db_statements_per_request"
+        lines.append(f"# HELP {name} SQL statements issued by one request.")
+        lines.append(f"# TYPE {name} histogram")
+        for (method, route), totals in routes.items():
+            labels = f'method="{method}",route="{_label(route)}"'
+            for bound, count in zip(STATEMENT_BUCKETS, totals["buckets"]):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {totals["requests"]}')
+            lines.append(f"{name}_sum{{{labels}}} {totals['statements']}")
+            lines.append(f"{name}_count{{{labels}}} {totals['requests']}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = QueryMetrics()
+
+
+def record(http_scope: Dict[str, Any], scope: RequestScope) -> None:
+    """
+    Add the finished request to `metrics` and warn if it went over the
+    statement budget.
+    """
+    # The route template rather than the path, so ids don't multiply the series
+    route = http_scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    over_budget = scope.statements > settings.DB_STATEMENT_BUDGET
+    if over_budget:
+        logger.warning(
+            "%s %s issued %d SQL statements (budget %d) in %.1fms; slowest: %s",
+            http_scope["method"],
+            path,
+            scope.statements,
+            settings.DB_STATEMENT_BUDGET,
+            scope.db_time * 1000,
+            "; ".join(f"{elapsed * 1000:.1f}ms {_describe(statement)}" for elapsed, statement in slowest(scope)),
+        )
+    metrics.record(http_scope["method"], path, scope, over_budget)
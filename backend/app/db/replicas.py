@@ -0,0 +1,107 @@
+"""
+Read replica routing.
+
+With `READ_REPLICA_URLS` set, `app.db.session.get_read_db` gives read-only
+endpoints a session on one of the replicas, taken round-robin among those
+that passed their last health check. `maintain` checks every replica each
+`REPLICA_HEALTH_CHECK_SECONDS`, and a replica that drops its connections is
+taken out at once. Without a healthy replica, reads go to the primary.
+
+Replicas lag behind the primary, so a client may not see its own write in
+a list read right after it. What must be up to date stays on the primary
+through `get_db`:
+
+- endpoints that write, or return what they just wrote such as `like_post`;
+- single-item reads such as `GET /posts/{post_id}`, which a client follows
+  up a create with and which would otherwise answer 404;
+- fills of the shared feed cache, which are served for a whole cache
+  generation;
+- authentication, so `/auth/me` and every permission check see a
+  deactivation at once. Warm tokens are resolved from `app.core.auth_cache`
+  without a query anyway.
+"""
+import asyncio
+import itertools
+import logging
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        if isinstance(engine, AsyncEngine):
+            self.session_factory = async_sessionmaker(engine, autoflush=False)
+            event.listen(engine.sync_engine, "handle_error", self._handle_error)
+        else:
+            self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            event.listen(engine, "handle_error", self._handle_error)
+
+    def _handle_error(self, context) -> None:
+        if context.is_disconnect and self.healthy:
+            logger.warning("Read replica %s lost its connection, routing reads elsewhere", self.name)
+            self.healthy = False
+
+    def _ping(self) -> None:
+        with self.engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+
+    async def check(self) -> bool:
+        try:
+            if isinstance(self.engine, AsyncEngine):
+                async with self.engine.connect() as connection:
+                    await connection.exec_driver_sql("SELECT 1")
+            else:
+                await run_in_threadpool(self._ping)
+        except Exception as e:
+            if self.healthy:
+                logger.warning("Read replica %s failed its health check: %s", self.name, e)
+            self.healthy = False
+        else:
+            if not self.healthy:
+                logger.info("Read replica %s is healthy again", self.name)
+            self.healthy = True
+        return self.healthy
+
+
+class ReplicaSet:
+    def __init__(self, replicas: List[Replica]):
+        self.replicas = replicas
+        self._turn = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        """
+        The next healthy replica, or None to use the primary.
+        """
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def check(self) -> None:
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def maintain(self) -> None:
+        while True:
+            await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_SECONDS)
+            await self.check()
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            if isinstance(replica.engine, AsyncEngine):
+                await replica.engine.dispose()
+            else:
+                replica.engine.dispose()
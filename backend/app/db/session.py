@@ -1,20 +1,260 @@
+from typing import Any, Callable, Dict, TypeVar, Union
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.db import query_metrics
+from app.db.pool import PoolMetrics, RequestScope, instrument, request_scope
+from app.db.replicas import Replica, ReplicaSet
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,
-)
+T = TypeVar("T")
+
+# Either a sync Session or, with DB_ASYNC enabled, an AsyncSession
+DBSession = Union[Session, AsyncSession]
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Pool metrics of every engine, by name
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Swap the sync driver of `url` for its asyncio counterpart.
+    """
+    parsed = make_url(url)
+    if parsed.drivername in ASYNC_DRIVERS.values():
+        return url
+    drivername = ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def engine_options(name: str, url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Pool and connection options from `Settings` for the engine `name`.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory databases live and die with their single connection
+        return {}
+
+    metrics = pool_metrics.setdefault(name, PoolMetrics())
+    options: Dict[str, Any] = dict(
+        poolclass=instrument(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS and parsed.get_backend_name() == "postgresql":
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options("primary", settings.DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    _async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(
+        _async_url, **engine_options("primary_async", _async_url, is_async=True)
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+_replica_urls = [url.strip() for url in settings.READ_REPLICA_URLS.split(",") if url.strip()]
+replicas = ReplicaSet(
+    [
+        Replica(f"replica{i}", create_engine(url, **engine_options(f"replica{i}", url)))
+        for i, url in enumerate(_replica_urls)
+    ]
+)
+async_replicas = ReplicaSet([])
+if settings.DB_ASYNC:
+    async_replicas = ReplicaSet(
+        [
+            Replica(
+                f"replica{i}_async",
+                create_async_engine(
+                    async_database_url(url),
+                    **engine_options(f"replica{i}_async", async_database_url(url), is_async=True),
+                ),
+            )
+            for i, url in enumerate(_replica_urls)
+        ]
+    )
+
+if settings.DB_QUERY_METRICS:
+    query_metrics.instrument(engine)
+    if async_engine is not None:
+        query_metrics.instrument(async_engine.sync_engine)
+    for replica in replicas.replicas:
+        query_metrics.instrument(replica.engine)
+    for replica in async_replicas.replicas:
+        query_metrics.instrument(replica.engine.sync_engine)
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Current state and checkout metrics of every instrumented pool.
+    """
+    engines = {"primary": engine, "primary_async": async_engine}
+    for replica in replicas.replicas + async_replicas.replicas:
+        engines[replica.name] = replica.engine
+    return {
+        name: metrics.stats(engines[name].pool)
+        for name, metrics in pool_metrics.items()
+        if engines.get(name) is not None
+    }
+
+
+async def run_db(db: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run `fn(session, *args, **kwargs)`, a synchronous unit of database work,
+    without blocking the event loop.
+
+    With an AsyncSession the function runs through `AsyncSession.run_sync`,
+    so its queries go through the async driver and concurrency is bounded by
+    the connection pool only. With a sync Session it runs in the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+async def release_db(db: DBSession) -> None:
+    """
+    Return the connection of `db` to the pool ahead of a long wait that
+    needs no database, such as hashing a password. Loaded objects are
+    detached; the session checks out a new connection if used again.
+    """
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+
+def get_sync_db():
+    scope = request_scope.get()
+    if settings.DB_SESSION_PER_REQUEST and scope is not None:
+        # Closed by DatabaseRequestMiddleware once the response is sent
+        if scope.db is None:
+            scope.db = SessionLocal()
+        yield scope.db
+        return
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    scope = request_scope.get()
+    if settings.DB_SESSION_PER_REQUEST and scope is not None:
+        if scope.db is None:
+            scope.db = AsyncSessionLocal()
+        yield scope.db
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+
+def get_sync_read_db():
+    replica = replicas.pick()
+    # Without a healthy replica, the session get_db would give
+    factory, slot = (replica.session_factory, "read_db") if replica is not None else (SessionLocal, "db")
+    scope = request_scope.get()
+    if settings.DB_SESSION_PER_REQUEST and scope is not None:
+        if getattr(scope, slot) is None:
+            setattr(scope, slot, factory())
+        yield getattr(scope, slot)
+        return
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    replica = async_replicas.pick()
+    factory, slot = (replica.session_factory, "read_db") if replica is not None else (AsyncSessionLocal, "db")
+    scope = request_scope.get()
+    if settings.DB_SESSION_PER_REQUEST and scope is not None:
+        if getattr(scope, slot) is None:
+            setattr(scope, slot, factory())
+        yield getattr(scope, slot)
+        return
+    async with factory() as db:
+        yield db
+
+
+# Session of the read-only endpoints: a healthy replica when there is one,
+# otherwise the same session as get_db
+get_read_db = get_async_read_db if settings.DB_ASYNC else get_sync_read_db
+
+
+class DatabaseRequestMiddleware:
+    """
+    Opens a `RequestScope` for every HTTP request.
+
+    The scope collects the request's pool checkout wait, reported as a
+    `Server-Timing: db-pool` entry, and with `DB_SESSION_PER_REQUEST` holds
+    the one session shared by every `get_db` dependency of the request. With
+    `DB_QUERY_METRICS` it also counts and times the request's statements,
+    see `app.db.query_metrics`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        db_scope = RequestScope()
+        token = request_scope.set(db_scope)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timings = []
+                if db_scope.checkouts:
+                    timings.append(f"db-pool;dur={db_scope.pool_wait * 1000:.2f}")
+                if settings.DB_QUERY_METRICS:
+                    timings.extend(query_metrics.server_timing(db_scope))
+                if timings:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", ", ".join(timings).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_scope.reset(token)
+            if settings.DB_QUERY_METRICS:
+                query_metrics.record(scope, db_scope)
+            for db in (db_scope.db, db_scope.read_db):
+                if isinstance(db, AsyncSession):
+                    await db.close()
+                elif db is not None:
+                    await run_in_threadpool(db.close)
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
+from app.db.fulltext import searchable
 from app.models.base import Base
 
 class Comment(Base):
@@ -11,7 +12,12 @@ class Comment(Base):
     content = Column(Text, nullable=False)
     post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
+    parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True, index=True)
+    # Idempotency key of comments created through the batch API
+    client_id = Column(String(64), nullable=True)
+    # Denormalized reaction counters, see app.crud.comment.increment_counters
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    dislikes_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -19,29 +25,15 @@ class Comment(Base):
     post = relationship("Post", back_populates="comments")
     author = relationship("User", back_populates="comments")
     parent = relationship("Comment", remote_side=[id], backref="replies")
-    likes = relationship("CommentLike", back_populates="comment", cascade="all, delete-orphan")
-    dislikes = relationship("CommentDislike", back_populates="comment", cascade="all, delete-orphan")
-
-class CommentLike(Base):
-    __tablename__ = "comment_likes"
-
-    id = Column(Integer, primary_key=True, index=True)
-    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-
-    # Relationships
-    comment = relationship("Comment", back_populates="likes")
-    user = relationship("User", back_populates="comment_likes")
-
-class CommentDislike(Base):
-    __tablename__ = "comment_dislikes"
-
-    id = Column(Integer, primary_key=True, index=True)
-    comment_id = Column(Integer, ForeignKey("comments.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-
-    # Relationships
-    comment = relationship("Comment", back_populates="dislikes")
-    user = relationship("User", back_populates="comment_dislikes") 
\ No newline at end of file
+    reactions = relationship("CommentReaction", back_populates="comment", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Keyset pagination of a post's threads and of a comment's replies
+        Index("ix_comments_post_id_parent_id_created_at_id", "post_id", "parent_id", "created_at", "id"),
+        Index("uq_comments_author_id_client_id", "author_id", "client_id", unique=True),
+        # Keyset pagination of an author's comments
+        Index("ix_comments_author_id_created_at_id", "author_id", "created_at", "id"),
+    )
+
+# Full-text search, see app.db.fulltext
+searchable(Comment.__table__, {"content": "A"})
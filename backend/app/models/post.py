@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Float, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
+from app.core.ranking import hot_score
+from app.db.fulltext import searchable
 from app.models.base import Base
 
+def _initial_hot_score(context) -> float:
+    created_at = context.get_current_parameters().get("created_at") or datetime.utcnow()
+    return hot_score(0, 0, created_at)
+
 class Post(Base):
     __tablename__ = "posts"
 
@@ -11,35 +17,31 @@ class Post(Base):
     title = Column(String, nullable=False)
     body = Column(Text, nullable=False)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Denormalized reaction counters, see app.crud.post.increment_counters
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    dislikes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Denormalized comment counter, see app.crud.comment.increment_comment_counts
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Ranking scores derived from the counters, see app.core.ranking
+    score = Column(Integer, nullable=False, default=0, server_default="0")
+    hot_score = Column(Float, nullable=False, default=_initial_hot_score, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     author = relationship("User", back_populates="posts")
     comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
-    likes = relationship("PostLike", back_populates="post", cascade="all, delete-orphan")
-    dislikes = relationship("PostDislike", back_populates="post", cascade="all, delete-orphan")
-
-class PostLike(Base):
-    __tablename__ = "post_likes"
-
-    id = Column(Integer, primary_key=True, index=True)
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-
-    # Relationships
-    post = relationship("Post", back_populates="likes")
-    user = relationship("User", back_populates="post_likes")
-
-class PostDislike(Base):
-    __tablename__ = "post_dislikes"
-
-    id = Column(Integer, primary_key=True, index=True)
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-
-    # Relationships
-    post = relationship("Post", back_populates="dislikes")
-    user = relationship("User", back_populates="post_dislikes") 
\ No newline at end of file
+    reactions = relationship("PostReaction", back_populates="post", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Keyset pagination of the feed on (created_at, id)
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        # Keyset pagination of an author's posts
+        Index("ix_posts_author_id_created_at_id", "author_id", "created_at", "id"),
+        # Keyset pagination of the top and hot feeds
+        Index("ix_posts_score_id", "score", "id"),
+        Index("ix_posts_hot_score_id", "hot_score", "id"),
+    )
+
+# Full-text search, see app.db.fulltext
+searchable(Post.__table__, {"title": "A", "body": "B"})
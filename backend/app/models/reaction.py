@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -13,6 +13,13 @@ class PostReaction(BaseModel):
     user = relationship("User", back_populates="post_reactions")
     post = relationship("Post", back_populates="reactions")
 
+    __table_args__ = (
+        # One reaction per user and post, the conflict target of the toggle upsert
+        Index("uq_post_reactions_user_id_post_id", "user_id", "post_id", unique=True),
+        # A post's reactions: cascading deletes and counter reconciliation
+        Index("ix_post_reactions_post_id_is_like", "post_id", "is_like"),
+    )
+
 class CommentReaction(BaseModel):
     __tablename__ = "comment_reactions"
 
@@ -22,4 +29,12 @@ class CommentReaction(BaseModel):
 
     # Relationships
     user = relationship("User", back_populates="comment_reactions")
-    comment = relationship("Comment", back_populates="reactions") 
\ No newline at end of file
+    comment = relationship("Comment", back_populates="reactions")
+
+    __table_args__ = (
+        # One reaction per user and comment, the conflict target of the toggle upsert
+        Index("uq_comment_reactions_user_id_comment_id", "user_id", "comment_id", unique=True),
+        # A comment's reactions: cascading deletes and counter reconciliation
+        Index("ix_comment_reactions_comment_id_is_like", "comment_id", "is_like"),
+    )
+ 
\ No newline at end of file
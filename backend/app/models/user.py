@@ -14,11 +14,15 @@ class User(Base):
     is_superuser = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Denormalized profile aggregates, see app.crud.user.increment_aggregates
+    post_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    likes_received = Column(Integer, nullable=False, default=0, server_default="0")
 
-    posts = relationship("Post", back_populates="author")
-    comments = relationship("Comment", back_populates="author")
-    post_likes = relationship("PostLike", back_populates="user")
-    post_dislikes = relationship("PostDislike", back_populates="user")
-    comment_likes = relationship("CommentLike", back_populates="user")
-    comment_dislikes = relationship("CommentDislike", back_populates="user")
+    # Unbounded; page through them with app.crud.post.get_feed and
+    # app.crud.comment.get_by_author instead of loading them
+    posts = relationship("Post", back_populates="author", lazy="write_only")
+    comments = relationship("Comment", back_populates="author", lazy="write_only")
+    post_reactions = relationship("PostReaction", back_populates="user")
+    comment_reactions = relationship("CommentReaction", back_populates="user")
     blacklisted_tokens = relationship("BlacklistedToken", back_populates="user") 
\ No newline at end of file
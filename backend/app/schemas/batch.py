@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: Literal["created", "updated", "unchanged", "superseded", "duplicate", "not_found", "invalid"]
+    id: Optional[int] = None
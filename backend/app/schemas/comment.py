@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from app.core.config import settings
 from .user import User
 
 class CommentBase(BaseModel):
@@ -10,6 +11,14 @@ class CommentBase(BaseModel):
 class CommentCreate(CommentBase):
     pass
 
+class CommentBatchItem(CommentCreate):
+    post_id: int
+    # Chosen by the client; replaying the same item is reported as a duplicate
+    client_id: str = Field(..., min_length=1, max_length=64)
+
+class CommentBatchCreate(BaseModel):
+    comments: List[CommentBatchItem] = Field(..., min_length=1, max_length=settings.BULK_MAX_OPERATIONS)
+
 class CommentUpdate(BaseModel):
     content: Optional[str] = None
 
@@ -23,6 +32,11 @@ class CommentInDBBase(CommentBase):
     class Config:
         from_attributes = True
 
+class CommentSummary(CommentInDBBase):
+    author: User
+    likes_count: int = 0
+    dislikes_count: int = 0
+
 class Comment(CommentInDBBase):
     author: User
     replies: List["Comment"] = []
@@ -30,5 +44,7 @@ class Comment(CommentInDBBase):
     dislikes_count: int = 0
 
 class CommentWithStats(Comment):
+    replies: List["CommentWithStats"] = []
+    reply_count: int = 0
     is_liked: Optional[bool] = None
     is_disliked: Optional[bool] = None 
\ No newline at end of file
@@ -2,7 +2,7 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 from .user import User
-from .comment import Comment
+from .comment import Comment, CommentSummary
 
 class PostBase(BaseModel):
     title: str
@@ -24,6 +24,15 @@ class PostInDBBase(PostBase):
     class Config:
         from_attributes = True
 
+class PostSummary(PostInDBBase):
+    author: User
+    likes_count: int = 0
+    dislikes_count: int = 0
+    comment_count: int = 0
+    is_liked: Optional[bool] = None
+    is_disliked: Optional[bool] = None
+    comments_preview: Optional[List[CommentSummary]] = None
+
 class Post(PostInDBBase):
     author: User
     likes_count: int = 0
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class ProfilerSettings(BaseModel):
+    # Fraction of all requests to profile
+    sample_rate: float = Field(0.0, ge=0.0, le=1.0)
+    # Route templates to always profile, e.g. "/api/v1/posts/{post_id}"
+    routes: List[str] = []
+    interval_ms: int = Field(10, ge=1, le=1000)
+
+class ProfilerStatus(ProfilerSettings):
+    enabled: bool
+    in_flight: int
+    requests: int
+    samples: int
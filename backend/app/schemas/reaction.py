@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import List
+from app.core.config import settings
+
+class ReactionBatchGet(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=200)
+
+class ReactionState(BaseModel):
+    id: int
+    likes_count: int
+    dislikes_count: int
+    is_liked: bool = False
+    is_disliked: bool = False
+
+class ReactionWrite(BaseModel):
+    id: int
+    is_like: bool
+
+class ReactionBatchWrite(BaseModel):
+    operations: List[ReactionWrite] = Field(..., min_length=1, max_length=settings.BULK_MAX_OPERATIONS)
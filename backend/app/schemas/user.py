@@ -24,5 +24,11 @@ class UserInDBBase(UserBase):
 class User(UserInDBBase):
     pass
 
+class UserProfile(User):
+    post_count: int = 0
+    comment_count: int = 0
+    # Likes on the user's posts and comments
+    likes_received: int = 0
+
 class UserInDB(UserInDBBase):
     hashed_password: str 
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Copy the legacy like and dislike tables (`post_likes`, `post_dislikes`,
+`comment_likes`, `comment_dislikes`) into `post_reactions` and
+`comment_reactions`.
+
+    python backfill_reactions.py [--batch-size 10000]
+
+Migration b7f04e2d9c51 copies the rows that exist when it runs. Instances
+still on the old code keep writing to the legacy tables until they are
+replaced, so run this once the rollout is done, then
+`reconcile_counters.py` to bring the counters in line.
+
+Each id range is copied and committed on its own, so the command can run
+against a live database without holding long locks. Duplicate rows for the
+same user collapse into one. A legacy row only replaces a reaction already
+in the new tables when it is newer than that reaction's `updated_at`, so a
+like or dislike set through the new code after the legacy one is kept. The
+existing row's `created_at` is left alone. Re-running it is a no-op.
+"""
+import argparse
+import logging
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from app.db.session import engine
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+BATCH_SIZE = 10000
+
+LEGACY_TABLES = (
+    ("post_likes", "post_reactions", "post_id", True),
+    ("post_dislikes", "post_reactions", "post_id", False),
+    ("comment_likes", "comment_reactions", "comment_id", True),
+    ("comment_dislikes", "comment_reactions", "comment_id", False),
+)
+
+
+def copy_batch(connection: Connection, source: str, target: str, fk: str, is_like: bool, start: int, end: int) -> int:
+    """
+    Upsert the rows of `source` with `start <= id < end` into `target`.
+    """
+    flag = "true" if is_like else "false"
+    result = connection.execute(
+        text(
+            f"INSERT INTO {target} (user_id, {fk}, is_like, created_at, updated_at) "
+            f"SELECT user_id, {fk}, {flag}, max(created_at), max(created_at) FROM {source} "
+            f"WHERE id >= :start AND id < :end "
+            f"GROUP BY user_id, {fk} "
+            f"ON CONFLICT (user_id, {fk}) DO UPDATE SET "
+            f"is_like = excluded.is_like, updated_at = excluded.updated_at "
+            f"WHERE excluded.updated_at > {target}.updated_at"
+        ),
+        {"start": start, "end": end},
+    )
+    return result.rowcount
+
+
+def backfill(source: str, target: str, fk: str, is_like: bool, batch_size: int) -> int:
+    with engine.connect() as connection:
+        max_id = connection.execute(text(f"SELECT max(id) FROM {source}")).scalar() or 0
+    copied = 0
+    for start in range(0, max_id + 1, batch_size):
+        with engine.begin() as connection:
+            copied += copy_batch(connection, source, target, fk, is_like, start, start + batch_size)
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    existing = set(inspect(engine).get_table_names())
+    for source, target, fk, is_like in LEGACY_TABLES:
+        if source not in existing:
+            logging.info(f"No {source} table, skipping.")
+            continue
+        logging.info(f"Copying {source} into {target}...")
+        count = backfill(source, target, fk, is_like, args.batch_size)
+        logging.info(f"Copied {count} rows from {source}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Statement-count benchmark for the post feed.
+
+Seeds a throwaway SQLite database, loads feed pages of growing size and
+asserts that the number of SQL statements per page stays constant.
+
+    python -m benchmarks.feed_queries
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file.name}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from sqlalchemy import event
+
+from app.crud import post as crud_post
+from app.db.session import SessionLocal, engine
+from app.models.base import Base
+from app.models.blacklisted_token import BlacklistedToken  # noqa: F401 - registers the mapper
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.reaction import PostReaction
+from app.models.user import User
+
+PAGE_SIZES = (10, 50, 100)
+NUM_USERS = 20
+NUM_POSTS = max(PAGE_SIZES)
+
+
+class StatementCounter:
+    def __init__(self, bind):
+        self.bind = bind
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.bind, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._on_execute)
+
+
+def seed(db) -> User:
+    users = [User(username=f"user{i}", hashed_password="x") for i in range(NUM_USERS)]
+    db.add_all(users)
+    db.flush()
+    rng = random.Random(0)
+    for i in range(NUM_POSTS):
+        post = Post(title=f"Post {i}", body="body", author_id=rng.choice(users).id)
+        db.add(post)
+        db.flush()
+        root = Comment(content="root", post_id=post.id, author_id=rng.choice(users).id)
+        db.add(root)
+        db.flush()
+        db.add(Comment(content="reply", post_id=post.id, parent_id=root.id, author_id=rng.choice(users).id))
+        for n, user in enumerate(rng.sample(users, 7)):
+            db.add(PostReaction(post_id=post.id, user_id=user.id, is_like=n < 5))
+    db.commit()
+    return users[0]
+
+
+def main() -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        viewer = seed(db)
+        counts = {}
+        for size in PAGE_SIZES:
+            db.expire_all()
+            with StatementCounter(engine) as counter:
+                start = time.perf_counter()
+                page, _ = crud_post.get_feed(db, limit=size, viewer_id=viewer.id)
+                elapsed = time.perf_counter() - start
+            assert len(page) == size
+            counts[size] = counter.count
+            print(f"page_size={size:<4} statements={counter.count:<3} elapsed={elapsed * 1000:.1f}ms")
+    finally:
+        db.close()
+        engine.dispose()
+        os.unlink(_db_file.name)
+
+    if len(set(counts.values())) != 1:
+        print(f"FAIL: statements per page grow with page size: {counts}")
+        return 1
+    print("OK: statements per page are constant")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Reproducible load test of the API.
+
+Boots `main:app` in-process, seeds it with the bulk seeder unless it already
+holds posts, and drives a weighted mix of requests through httpx's ASGI
+transport from `--concurrency` virtual users:
+
+- feed_anonymous: `GET /posts/` without a token
+- feed_authenticated: `GET /posts/` as a logged-in user
+- comment_thread: `GET /comments/post/{id}` of a recent post
+- like_toggle: like or dislike a recent post
+- login: `POST /auth/login`
+
+Reports throughput, p50/p95/p99 latency and SQL statements per request for
+every scenario. `--output` saves the results as JSON; `--baseline` compares
+against an earlier file, so a regression can be traced to a commit.
+
+Runs against a throwaway SQLite database unless DATABASE_URL is set, e.g. to
+a local Postgres.
+
+    python -m benchmarks.load_test [--requests 2000] [--concurrency 16] [--output results.json]
+                                   [--baseline previous.json] [--users 200] [--posts 2000] [--seed 0]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file.name}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+from faker import Faker
+from sqlalchemy import event, func, select
+
+import main
+import seed_from_csv
+from app.core.config import settings
+from app.db import bulk
+from app.db.session import SessionLocal, async_engine, engine
+from app.models.post import Post
+from app.models.user import User
+from reconcile_counters import BATCH_SIZE, reconcile_users
+
+API = settings.API_V1_STR
+# Relative weight of each scenario in the mix
+SCENARIOS = {
+    "feed_anonymous": 30,
+    "feed_authenticated": 25,
+    "comment_thread": 20,
+    "like_toggle": 15,
+    "login": 10,
+}
+# Requests spread over this many logged-in users and recent posts
+ACTIVE_USERS = 20
+RECENT_POSTS = 200
+
+# seed_from_csv logs at INFO, which would print every request
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Statements issued on behalf of the current request, see `timed_request`
+_statements: ContextVar[Optional[List[int]]] = ContextVar("statements", default=None)
+
+
+def _count_statement(*args) -> None:
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def seed(users: int, posts: int) -> None:
+    with engine.connect() as connection:
+        if connection.scalar(select(func.count(Post.id))):
+            print("database already seeded, reusing it")
+            return
+        seed_from_csv.seed_initial(connection)
+        hasher = seed_from_csv.Hasher(workers=1, fast=True)
+        try:
+            seed_from_csv.generate_users(connection, users, hasher, chunk_size=5000)
+        finally:
+            hasher.close()
+        options = argparse.Namespace(
+            chunk_size=5000,
+            comments_per_post=4.0,
+            reply_ratio=0.5,
+            reactions_per_post=10.0,
+            reactions_per_comment=2.0,
+        )
+        seed_from_csv.generate_posts(connection, posts, seed_from_csv.TextPool(Faker()), options)
+        for table in (seed_from_csv.users_table, seed_from_csv.posts_table, seed_from_csv.comments_table):
+            bulk.reset_sequence(connection, table)
+        connection.commit()
+    db = SessionLocal()
+    try:
+        reconcile_users(db, BATCH_SIZE)
+    finally:
+        db.close()
+
+
+def targets() -> Dict[str, list]:
+    with engine.connect() as connection:
+        usernames = connection.scalars(select(User.username).order_by(User.id).limit(ACTIVE_USERS)).all()
+        post_ids = connection.scalars(select(Post.id).order_by(Post.created_at.desc()).limit(RECENT_POSTS)).all()
+    return {"usernames": list(usernames), "post_ids": list(post_ids)}
+
+
+async def login(client: httpx.AsyncClient, username: str) -> httpx.Response:
+    return await client.post(
+        f"{API}/auth/login", data={"username": username, "password": seed_from_csv.TEST_PASSWORD}
+    )
+
+
+async def timed_request(client: httpx.AsyncClient, scenario: str, rng: random.Random, tokens: Dict[str, str], data: Dict[str, list]):
+    username = rng.choice(data["usernames"])
+    headers = {"Authorization": f"Bearer {tokens[username]}"}
+    post_id = rng.choice(data["post_ids"])
+
+    counter = [0]
+    reset = _statements.set(counter)
+    started = time.perf_counter()
+    try:
+        if scenario == "feed_anonymous":
+            response = await client.get(f"{API}/posts/?limit=20")
+        elif scenario == "feed_authenticated":
+            response = await client.get(f"{API}/posts/?limit=20", headers=headers)
+        elif scenario == "comment_thread":
+            response = await client.get(f"{API}/comments/post/{post_id}?limit=20", headers=headers)
+        elif scenario == "like_toggle":
+            action = rng.choice(("like", "dislike"))
+            response = await client.post(f"{API}/posts/{post_id}/{action}", headers=headers)
+        else:
+            response = await login(client, username)
+    finally:
+        _statements.reset(reset)
+    return time.perf_counter() - started, counter[0], response.status_code
+
+
+async def virtual_user(
+    client: httpx.AsyncClient, queue: asyncio.Queue, seed: int, tokens: Dict[str, str], data: Dict[str, list], samples: Dict[str, list]
+) -> None:
+    rng = random.Random(seed)
+    while True:
+        try:
+            scenario = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        elapsed, statements, status = await timed_request(client, scenario, rng, tokens, data)
+        samples[scenario].append((elapsed, statements, status))
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(samples: List[tuple], duration: float) -> dict:
+    latencies = [elapsed for elapsed, _, _ in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, _, status in samples if status >= 400),
+        "throughput_rps": round(len(samples) / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "statements_per_request": round(statistics.mean(statements for _, statements, _ in samples), 2),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    for handler in main.app.router.on_startup:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+    data = targets()
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            tokens = {}
+            for username in data["usernames"]:
+                response = await login(client, username)
+                response.raise_for_status()
+                tokens[username] = response.json()["access_token"]
+
+            rng = random.Random(args.seed)
+            mix = rng.choices(list(SCENARIOS), weights=list(SCENARIOS.values()), k=args.requests)
+            queue: asyncio.Queue = asyncio.Queue()
+            for scenario in mix:
+                queue.put_nowait(scenario)
+            samples: Dict[str, list] = {scenario: [] for scenario in SCENARIOS}
+
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(virtual_user(client, queue, args.seed + i, tokens, data, samples) for i in range(args.concurrency))
+            )
+            duration = time.perf_counter() - started
+    finally:
+        for handler in main.app.router.on_shutdown:
+            result = handler()
+            if asyncio.iscoroutine(result):
+                await result
+
+    return {
+        "overall": summarize([sample for scenario in samples.values() for sample in scenario], duration),
+        "endpoints": {scenario: summarize(values, duration) for scenario, values in samples.items() if values},
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results: dict, baseline: Optional[dict]) -> None:
+    print(f"{'scenario':<20} {'req':>6} {'err':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'stmts':>6}")
+    rows = {**results["endpoints"], "overall": results["overall"]}
+    for name, row in rows.items():
+        line = (
+            f"{name:<20} {row['requests']:>6} {row['errors']:>5} {row['throughput_rps']:>8.1f} "
+            f"{row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms "
+            f"{row['statements_per_request']:>6.1f}"
+        )
+        previous = (baseline or {}).get("endpoints", {}).get(name) if name != "overall" else (baseline or {}).get("overall")
+        if previous:
+            line += (
+                f"   p95 {row['p95_ms'] - previous['p95_ms']:+.1f}ms"
+                f" stmts {row['statements_per_request'] - previous['statements_per_request']:+.1f}"
+            )
+        print(line)
+
+
+def main_() -> int:
+    parser = argparse.ArgumentParser(description="Load test of the API")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results written by an earlier run")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    Faker.seed(args.seed)
+    event.listen(engine, "before_cursor_execute", _count_statement)
+    if async_engine is not None:
+        event.listen(async_engine.sync_engine, "before_cursor_execute", _count_statement)
+    try:
+        seed(args.users, args.posts)
+        results = asyncio.run(run(args))
+    finally:
+        if os.path.exists(_db_file.name):
+            os.unlink(_db_file.name)
+
+    results["meta"] = {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "database": engine.dialect.name,
+        "db_async": settings.DB_ASYNC,
+        "python": platform.python_version(),
+        **{name: getattr(args, name) for name in ("requests", "concurrency", "users", "posts", "seed")},
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_())
@@ -0,0 +1,136 @@
+"""
+Feed latency during a login storm.
+
+Boots `main:app` in-process against a throwaway SQLite database and measures
+`GET /posts/` latency, first on an idle server and then while a burst of
+concurrent logins keeps the password hashing pool saturated. With hashing
+offloaded to its own process pool the p99 should stay roughly flat; logins
+beyond the pool's queue limit are answered with 503.
+
+    python -m benchmarks.login_storm [--logins 200] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file.name}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+
+import main
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.session import SessionLocal
+from app.models.post import Post
+from app.models.user import User
+
+PASSWORD = "benchmark-password"
+API = settings.API_V1_STR
+
+
+def seed(num_users: int = 20, num_posts: int = 100) -> None:
+    db = SessionLocal()
+    try:
+        hashed_password = get_password_hash(PASSWORD)
+        users = [User(username=f"user{i}", hashed_password=hashed_password) for i in range(num_users)]
+        db.add_all(users)
+        db.flush()
+        db.add_all(
+            Post(title=f"Post {i}", body="body", author_id=users[i % num_users].id)
+            for i in range(num_posts)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def sample_feed(client: httpx.AsyncClient, stop: asyncio.Event, latencies: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(f"{API}/posts/?limit=20")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+
+async def login_storm(client: httpx.AsyncClient, logins: int, concurrency: int, statuses: Counter) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login(i: int) -> None:
+        async with semaphore:
+            response = await client.post(
+                f"{API}/auth/login", data={"username": f"user{i % 20}", "password": PASSWORD}
+            )
+            statuses[response.status_code] += 1
+
+    await asyncio.gather(*(login(i) for i in range(logins)))
+
+
+async def measure(client: httpx.AsyncClient, storm=None) -> list:
+    latencies: list = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_feed(client, stop, latencies))
+    if storm is None:
+        await asyncio.sleep(2)
+    else:
+        await storm
+    stop.set()
+    await sampler
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    print(
+        f"{label:<14} n={len(latencies):<5} "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:7.1f}ms"
+    )
+
+
+async def run(logins: int, concurrency: int) -> None:
+    for handler in main.app.router.on_startup:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        report("idle", await measure(client))
+        statuses: Counter = Counter()
+        started = time.perf_counter()
+        report("login storm", await measure(client, login_storm(client, logins, concurrency, statuses)))
+        elapsed = time.perf_counter() - started
+        print(f"logins: {dict(statuses)} in {elapsed:.1f}s")
+    for handler in main.app.router.on_shutdown:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+
+
+def main_() -> int:
+    parser = argparse.ArgumentParser(description="Feed latency during a login storm")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    seed()
+    try:
+        asyncio.run(run(args.logins, args.concurrency))
+    finally:
+        os.unlink(_db_file.name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_())
@@ -0,0 +1,136 @@
+"""
+Micro-benchmark of the feed's response serialization.
+
+Loads one 100-post feed page from a throwaway SQLite database and turns the
+same rows into a response body through both paths:
+
+- default: `PostSummary.from_orm` per post, then FastAPI's response_model
+  validation, `jsonable_encoder` and `json.dumps`;
+- fast: `app.core.serialization.construct` per post and a single
+  `TypeAdapter.dump_json` call.
+
+    python -m benchmarks.serialization [--rounds 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file.name}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager
+
+from app.core.serialization import json_response
+from app.crud import post as crud_post
+from app.db.session import SessionLocal, engine
+from app.models.base import Base
+from app.models.blacklisted_token import BlacklistedToken  # noqa: F401 - registers the mapper
+from app.models.comment import Comment  # noqa: F401 - registers the mapper
+from app.models.post import Post
+from app.models.user import User
+from app.schemas.post import PostSummary
+
+PAGE_SIZE = 100
+
+
+def seed(db) -> User:
+    users = [User(username=f"user{i}", hashed_password="x") for i in range(20)]
+    db.add_all(users)
+    db.flush()
+    db.add_all(
+        Post(title=f"Post {i}", body="body " * 50, author_id=users[i % len(users)].id, likes_count=i)
+        for i in range(PAGE_SIZE)
+    )
+    db.commit()
+    return users[0]
+
+
+def load_rows(db, viewer_id: int):
+    stmt = (
+        select(Post, *crud_post._post_stats_columns(viewer_id))
+        .join(Post.author)
+        .options(contains_eager(Post.author))
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(PAGE_SIZE)
+    )
+    return db.execute(stmt).all()
+
+
+def default_path(rows, field, loop) -> bytes:
+    page = []
+    for row in rows:
+        summary = PostSummary.from_orm(row.Post)
+        summary.is_liked = row.viewer_reaction is not None and bool(row.viewer_reaction)
+        summary.is_disliked = row.viewer_reaction is not None and not row.viewer_reaction
+        page.append(summary)
+    content = loop.run_until_complete(
+        serialize_response(field=field, response_content=page, is_coroutine=True)
+    )
+    return JSONResponse(content).body
+
+
+def fast_path(rows) -> bytes:
+    page = [crud_post._summary(row, None) for row in rows]
+    return json_response(List[PostSummary], page).body
+
+
+def measure(fn, rounds: int) -> List[float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Feed serialization micro-benchmark")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    loop = asyncio.new_event_loop()
+    try:
+        viewer = seed(db)
+        rows = load_rows(db, viewer.id)
+        field = create_response_field(name="Response_read_posts", type_=List[PostSummary])
+
+        if json.loads(default_path(rows, field, loop)) != json.loads(fast_path(rows)):
+            print("FAIL: both paths must produce the same document")
+            return 1
+
+        results = {
+            "default": measure(lambda: default_path(rows, field, loop), args.rounds),
+            "fast": measure(lambda: fast_path(rows), args.rounds),
+        }
+    finally:
+        loop.close()
+        db.close()
+        engine.dispose()
+        os.unlink(_db_file.name)
+
+    for label, samples in results.items():
+        print(
+            f"{label:<8} page={PAGE_SIZE} "
+            f"median={statistics.median(samples) * 1000:6.2f}ms "
+            f"min={min(samples) * 1000:6.2f}ms"
+        )
+    speedup = statistics.median(results["default"]) / statistics.median(results["fast"])
+    print(f"fast path is {speedup:.1f}x faster")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
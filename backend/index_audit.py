@@ -0,0 +1,28 @@
+"""
+Report foreign keys without an index and read queries whose plan reads a
+whole table, see app.db.index_audit.
+
+    python index_audit.py
+
+Exits with status 1 when anything is found, so it can gate a deployment.
+"""
+import logging
+import sys
+
+from app.db.index_audit import audit
+from app.db.session import engine
+from app.models import blacklisted_token, comment, post, reaction, user  # noqa: F401 - register mappers
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+
+def main():
+    logging.info("Auditing indexes...")
+    findings = audit(engine)
+    for finding in findings:
+        logging.warning(finding)
+    logging.info(f"{len(findings)} findings.")
+    return 1 if findings else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
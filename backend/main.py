@@ -1,11 +1,17 @@
+import asyncio
 from typing import Union
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from app.core import revocation, security
+from app.core.profiling import ProfilingMiddleware, profiler
 from app.core.config import settings
 from app.models.base import Base
-from app.db.session import engine
-from app.api.v1.endpoints import auth, posts, comments
+from app.db import index_audit, query_metrics
+from app.db.session import DatabaseRequestMiddleware, async_engine, async_replicas, engine, replicas
+from app.api.v1.endpoints import admin, auth, posts, comments, users
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -23,11 +29,67 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "ETag"],
 )
+app.add_middleware(DatabaseRequestMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(posts.router, prefix=f"{settings.API_V1_STR}/posts", tags=["posts"])
 app.include_router(comments.router, prefix=f"{settings.API_V1_STR}/comments", tags=["comments"])
+app.include_router(users.router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
+app.include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
+
+@app.on_event("startup")
+async def start_token_revocation():
+    await run_in_threadpool(revocation.refresh)
+    app.state.revocation_task = asyncio.create_task(revocation.maintain())
+
+@app.on_event("shutdown")
+async def stop_token_revocation():
+    app.state.revocation_task.cancel()
+
+@app.on_event("startup")
+def start_password_hash_pool():
+    security.start_hash_pool()
+
+@app.on_event("shutdown")
+def stop_password_hash_pool():
+    security.shutdown_hash_pool()
+
+@app.on_event("startup")
+async def audit_indexes():
+    if settings.DB_INDEX_AUDIT_ON_STARTUP:
+        await run_in_threadpool(index_audit.log_findings, engine)
+
+@app.on_event("startup")
+async def start_replica_health_checks():
+    read_replicas = async_replicas if settings.DB_ASYNC else replicas
+    if read_replicas:
+        await read_replicas.check()
+        app.state.replica_task = asyncio.create_task(read_replicas.maintain())
+
+@app.on_event("shutdown")
+async def stop_replica_health_checks():
+    read_replicas = async_replicas if settings.DB_ASYNC else replicas
+    if read_replicas:
+        app.state.replica_task.cancel()
+        await read_replicas.dispose()
+
+@app.on_event("shutdown")
+def write_profile():
+    if settings.PROFILER_OUTPUT_PATH and profiler.samples:
+        profiler.dump(settings.PROFILER_OUTPUT_PATH)
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
+if settings.DB_QUERY_METRICS:
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        return PlainTextResponse(query_metrics.metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 async def root():
@@ -0,0 +1,123 @@
+"""
+Rebuild the denormalized reaction counters on posts and comments from the
+reaction tables, the comment counters and ranking scores of posts, and the
+profile aggregates of users from their posts and comments.
+
+    python reconcile_counters.py [--batch-size 10000]
+
+Counters are recomputed with one set-based UPDATE per id range, so the
+command can run against a live database without holding long locks.
+"""
+import argparse
+import logging
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.crud import post as crud_post
+from app.db.session import SessionLocal
+from app.models import blacklisted_token  # noqa: F401 - register mappers
+from app.models.user import User
+from app.models.post import Post
+from app.models.comment import Comment
+from app.models.reaction import PostReaction, CommentReaction
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+BATCH_SIZE = 10000
+
+
+def _count(model, fk, target, is_like: bool):
+    return (
+        select(func.count(model.id))
+        .where(fk == target.id, model.is_like == is_like)
+        .correlate(target)
+        .scalar_subquery()
+    )
+
+
+def reconcile(db: Session, target, model, fk, batch_size: int) -> int:
+    max_id = db.scalar(select(func.max(target.id))) or 0
+    updated = 0
+    for start in range(0, max_id + 1, batch_size):
+        result = db.execute(
+            update(target)
+            .where(target.id >= start, target.id < start + batch_size)
+            .values(
+                likes_count=_count(model, fk, target, True),
+                dislikes_count=_count(model, fk, target, False),
+                updated_at=target.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if target is Post:
+            rows = db.execute(
+                update(Post)
+                .where(Post.id >= start, Post.id < start + batch_size)
+                .values(
+                    score=Post.likes_count - Post.dislikes_count,
+                    comment_count=select(func.count(Comment.id))
+                    .where(Comment.post_id == Post.id)
+                    .correlate(Post)
+                    .scalar_subquery(),
+                    updated_at=Post.updated_at,
+                )
+                .returning(Post.id, Post.likes_count, Post.dislikes_count, Post.created_at)
+                .execution_options(synchronize_session=False)
+            ).all()
+            crud_post.update_hot_scores(db, rows)
+        db.commit()
+        updated += result.rowcount
+    return updated
+
+
+def _authored(aggregate, target):
+    return select(aggregate).where(target.author_id == User.id).correlate(User).scalar_subquery()
+
+
+def reconcile_users(db: Session, batch_size: int) -> int:
+    max_id = db.scalar(select(func.max(User.id))) or 0
+    updated = 0
+    for start in range(0, max_id + 1, batch_size):
+        result = db.execute(
+            update(User)
+            .where(User.id >= start, User.id < start + batch_size)
+            .values(
+                post_count=_authored(func.count(Post.id), Post),
+                comment_count=_authored(func.count(Comment.id), Comment),
+                likes_received=(
+                    _authored(func.coalesce(func.sum(Post.likes_count), 0), Post)
+                    + _authored(func.coalesce(func.sum(Comment.likes_count), 0), Comment)
+                ),
+                updated_at=User.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        updated += result.rowcount
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        logging.info("Reconciling post counters...")
+        count = reconcile(db, Post, PostReaction, PostReaction.post_id, args.batch_size)
+        logging.info(f"Reconciled {count} posts.")
+
+        logging.info("Reconciling comment counters...")
+        count = reconcile(db, Comment, CommentReaction, CommentReaction.comment_id, args.batch_size)
+        logging.info(f"Reconciled {count} comments.")
+
+        logging.info("Reconciling user aggregates...")
+        count = reconcile_users(db, args.batch_size)
+        logging.info(f"Reconciled {count} users.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
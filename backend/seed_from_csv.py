@@ -1,129 +1,375 @@
+"""
+Seed the database in bulk from CSV files and synthetic data.
+
+    python seed_from_csv.py [--users-csv app/scripts/users.csv] [--posts-csv app/scripts/posts.csv]
+                            [--synthetic-users N] [--synthetic-posts N]
+                            [--comments-per-post 4] [--reply-ratio 0.5]
+                            [--reactions-per-post 10] [--reactions-per-comment 2]
+                            [--fast-test-data] [--hash-workers N] [--chunk-size 5000] [--random-seed N]
+
+Always creates the `fromSeeder` user with its first post, then:
+
+1. streams `users.csv` (username, password, optional is_active and
+   is_superuser) and `posts.csv` (title, body, and author_id or
+   author_username, optional created_at) when they exist;
+2. generates `--synthetic-users` users and `--synthetic-posts` posts with
+   comment reply trees and reactions, numbers given as averages per post.
+
+Rows are written with COPY on Postgres and multi-row INSERTs elsewhere, see
+app.db.bulk. Passwords are hashed in a process pool. With --fast-test-data
+every loaded user gets TEST_PASSWORD and the hash is computed only once.
+Reaction and comment counters and ranking scores are computed while the
+rows are generated. Profile aggregates are rebuilt once at the end.
+"""
+import argparse
+import csv
+import logging
 import os
-import sys
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
 from faker import Faker
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.models.user import User
-from app.models.post import Post, PostLike, PostDislike
-from app.models.comment import Comment, CommentLike, CommentDislike
-from app.models.blacklisted_token import BlacklistedToken
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from app.core.ranking import hot_score
 from app.core.security import get_password_hash
-from app.schemas.user import UserCreate
-from app.schemas.post import PostCreate
-from sqlalchemy.exc import IntegrityError
+from app.db import bulk
+from app.db.session import SessionLocal, engine
+from app.models import blacklisted_token  # noqa: F401 - register mappers
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.reaction import PostReaction, CommentReaction
+from app.models.user import User
+from reconcile_counters import BATCH_SIZE, reconcile_users
 
-import logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-fake = Faker()
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "scripts")
+TEST_PASSWORD = "123123123aA"
+# Share of reactions that are likes
+LIKE_RATIO = 0.75
+# Synthetic posts are spread over this many days before now
+SYNTHETIC_DAYS = 30
 
-NUM_USERS = 1
-NUM_POSTS_PER_USER = 1
+users_table = User.__table__
+posts_table = Post.__table__
+comments_table = Comment.__table__
 
-def seed_users(db: Session, num_users: int = NUM_USERS):
-    users = []
-    try:
-        user_schema = UserCreate(
-            username="fromSeeder",
-            password="123123123aA",
-        )
-        hashed_password = get_password_hash(user_schema.password)
-        user = User(
-            username=user_schema.username,
-            hashed_password=hashed_password,
-            is_active=True,
-            is_superuser=False
-        )
-        db.add(user)
-        users.append(user)
-    except Exception as e:
-        logging.warning(f"Error creating initial user: {e}")
-
-    for _ in range(num_users - 1):
-        username = fake.user_name()
-        password = fake.password(length=8)
-        
-        try:
-            user_schema = UserCreate(
-                username=username,
-                password=password,
-            )
-            hashed_password = get_password_hash(user_schema.password)
-            user = User(
-                username=user_schema.username,
-                hashed_password=hashed_password,
-                is_active=True,
-                is_superuser=False
-            )
-            db.add(user)
-            users.append(user)
-        except Exception as e:
-            logging.warning(f"Skipping user due to error: {e}")
-            continue
-    
-    try:
-        db.commit()
-        logging.info(f"Successfully seeded {len(users)} users.")
-        return users
-    except IntegrityError as e:
-        db.rollback()
-        logging.error(f"Database error during user seeding: {e}")
-        return []
-
-def seed_posts(db: Session, users: list[User], posts_per_user: int = NUM_POSTS_PER_USER):
-    total_posts = 0
-    if users:
-        try:
-            post_schema = PostCreate(
-                title="Hello Seeders",
-                body="This is Seed's first post!",
+
+class Hasher:
+    """
+    Hashes passwords in a process pool, or hands out one shared hash of
+    TEST_PASSWORD in fast test data mode.
+    """
+
+    def __init__(self, workers: int, fast: bool):
+        self.shared = get_password_hash(TEST_PASSWORD) if fast else None
+        self.pool = None if fast else ProcessPoolExecutor(max_workers=workers)
+
+    def hash_all(self, passwords: List[str]) -> List[str]:
+        if self.shared is not None:
+            return [self.shared] * len(passwords)
+        return list(self.pool.map(get_password_hash, passwords, chunksize=16))
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def _bool(value: Optional[str], default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "t", "yes", "y")
+
+
+def _user_rows(records: List[dict], hasher: Hasher, first_id: int) -> List[dict]:
+    now = datetime.utcnow()
+    hashes = hasher.hash_all([record["password"] for record in records])
+    return [
+        {
+            "id": first_id + i,
+            "username": record["username"],
+            "hashed_password": hashed_password,
+            "is_active": _bool(record.get("is_active"), True),
+            "is_superuser": _bool(record.get("is_superuser"), False),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i, (record, hashed_password) in enumerate(zip(records, hashes))
+    ]
+
+
+def _post_row(
+    post_id: int,
+    title: str,
+    body: str,
+    author_id: int,
+    created_at: datetime,
+    likes: int = 0,
+    dislikes: int = 0,
+    comments: int = 0,
+) -> dict:
+    return {
+        "id": post_id,
+        "title": title,
+        "body": body,
+        "author_id": author_id,
+        "likes_count": likes,
+        "dislikes_count": dislikes,
+        "comment_count": comments,
+        "score": likes - dislikes,
+        "hot_score": hot_score(likes, dislikes, created_at),
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def seed_initial(connection: Connection) -> None:
+    if connection.scalar(select(users_table.c.id).where(users_table.c.username == "fromSeeder")):
+        logging.info("Initial user already exists.")
+        return
+    now = datetime.utcnow()
+    user_id = bulk.next_id(connection, users_table)
+    bulk.load(
+        connection,
+        users_table,
+        [
+            {
+                "id": user_id,
+                "username": "fromSeeder",
+                "hashed_password": get_password_hash(TEST_PASSWORD),
+                "is_active": True,
+                "is_superuser": False,
+                "created_at": now,
+                "updated_at": now,
+            }
+        ],
+    )
+    post_id = bulk.next_id(connection, posts_table)
+    bulk.load(
+        connection, posts_table, [_post_row(post_id, "Hello Seeders", "This is Seed's first post!", user_id, now)]
+    )
+    connection.commit()
+    logging.info("Seeded the initial user and post.")
+
+
+def load_users_csv(connection: Connection, path: str, hasher: Hasher, chunk_size: int) -> int:
+    loaded = 0
+    with open(path, newline="") as f:
+        for records in bulk.chunked(csv.DictReader(f), chunk_size):
+            first_id = bulk.next_id(connection, users_table)
+            loaded += bulk.load(connection, users_table, _user_rows(records, hasher, first_id), chunk_size)
+            connection.commit()
+            logging.info(f"Loaded {loaded} users from {path}.")
+    return loaded
+
+
+def load_posts_csv(connection: Connection, path: str, chunk_size: int) -> int:
+    user_ids: Optional[Dict[str, int]] = None
+    loaded = 0
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        if "author_id" not in reader.fieldnames:
+            user_ids = dict(connection.execute(select(users_table.c.username, users_table.c.id)).all())
+        for records in bulk.chunked(reader, chunk_size):
+            first_id = bulk.next_id(connection, posts_table)
+            now = datetime.utcnow()
+            rows = [
+                _post_row(
+                    first_id + i,
+                    record["title"],
+                    record["body"],
+                    int(record["author_id"]) if user_ids is None else user_ids[record["author_username"]],
+                    datetime.fromisoformat(record["created_at"]) if record.get("created_at") else now,
+                )
+                for i, record in enumerate(records)
+            ]
+            loaded += bulk.load(connection, posts_table, rows, chunk_size)
+            connection.commit()
+            logging.info(f"Loaded {loaded} posts from {path}.")
+    return loaded
+
+
+def generate_users(connection: Connection, count: int, hasher: Hasher, chunk_size: int) -> int:
+    loaded = 0
+    for start in range(0, count, chunk_size):
+        first_id = bulk.next_id(connection, users_table)
+        records = [
+            {"username": f"seed_user{first_id + i}", "password": TEST_PASSWORD}
+            for i in range(min(chunk_size, count - start))
+        ]
+        loaded += bulk.load(connection, users_table, _user_rows(records, hasher, first_id), chunk_size)
+        connection.commit()
+        logging.info(f"Generated {loaded} users.")
+    return loaded
+
+
+def _sample_size(average: float, limit: int) -> int:
+    """
+    A long-tailed count around `average`: most targets get few, some many.
+    """
+    if average <= 0:
+        return 0
+    return min(limit, int(random.expovariate(1 / average)))
+
+
+def _reactions(target_column: str, target_id: int, user_ids: List[int], average: float, at: datetime) -> List[dict]:
+    return [
+        {
+            "user_id": user_id,
+            target_column: target_id,
+            "is_like": random.random() < LIKE_RATIO,
+            "created_at": at,
+            "updated_at": at,
+        }
+        for user_id in random.sample(user_ids, _sample_size(average, len(user_ids)))
+    ]
+
+
+class TextPool:
+    """
+    Pre-generated Faker text; generating it per row dominates seeding time.
+    """
+
+    def __init__(self, fake: Faker, size: int = 500):
+        self.titles = [fake.sentence(nb_words=4).rstrip(".") for _ in range(size)]
+        self.bodies = [fake.paragraph(nb_sentences=5) for _ in range(size)]
+        self.comments = [fake.sentence(nb_words=12) for _ in range(size)]
+
+
+def _synthetic_chunk(
+    first_post_id: int,
+    first_comment_id: int,
+    count: int,
+    start: datetime,
+    step: timedelta,
+    user_ids: List[int],
+    text: TextPool,
+    args: argparse.Namespace,
+) -> Dict[str, List[dict]]:
+    now = datetime.utcnow()
+    chunk = {"posts": [], "comments": [], "post_reactions": [], "comment_reactions": []}
+    comment_id = first_comment_id
+    for i in range(count):
+        post_id = first_post_id + i
+        created_at = start + step * (i + random.random())
+
+        thread = []
+        at = created_at
+        for _ in range(_sample_size(args.comments_per_post, 1000)):
+            at = min(now, at + timedelta(seconds=random.randint(1, 3600)))
+            parent_id = random.choice(thread) if thread and random.random() < args.reply_ratio else None
+            reactions = _reactions("comment_id", comment_id, user_ids, args.reactions_per_comment, at)
+            likes = sum(reaction["is_like"] for reaction in reactions)
+            chunk["comments"].append(
+                {
+                    "id": comment_id,
+                    "content": random.choice(text.comments),
+                    "post_id": post_id,
+                    "author_id": random.choice(user_ids),
+                    "parent_id": parent_id,
+                    "likes_count": likes,
+                    "dislikes_count": len(reactions) - likes,
+                    "created_at": at,
+                    "updated_at": at,
+                }
             )
-            post = Post(
-                title=post_schema.title,
-                body=post_schema.body,
-                author_id=users[0].id
+            chunk["comment_reactions"].extend(reactions)
+            thread.append(comment_id)
+            comment_id += 1
+
+        reactions = _reactions("post_id", post_id, user_ids, args.reactions_per_post, created_at)
+        likes = sum(reaction["is_like"] for reaction in reactions)
+        chunk["posts"].append(
+            _post_row(
+                post_id,
+                random.choice(text.titles),
+                random.choice(text.bodies),
+                random.choice(user_ids),
+                created_at,
+                likes,
+                len(reactions) - likes,
+                len(thread),
             )
-            db.add(post)
-            total_posts += 1
-        except Exception as e:
-            logging.warning(f"Error creating initial post: {e}")
-            
-    for user in users:
-        for _ in range(posts_per_user - (1 if user == users[0] else 0)):
-            try:
-                post_schema = PostCreate(
-                    title=fake.sentence(nb_words=3).rstrip('.'),
-                    body=fake.paragraph(),
-                )
-                post = Post(
-                    title=post_schema.title,
-                    body=post_schema.body,
-                    author_id=user.id
-                )
-                db.add(post)
-                total_posts += 1
-            except Exception as e:
-                logging.warning(f"Skipping post due to error: {e}")
-                continue
-    
-    try:
-        db.commit()
-        logging.info(f"Successfully seeded {total_posts} posts.")
-    except IntegrityError as e:
-        db.rollback()
-        logging.error(f"Database error during post seeding: {e}")
+        )
+        chunk["post_reactions"].extend(reactions)
+    return chunk
+
+
+def generate_posts(connection: Connection, count: int, text: TextPool, args: argparse.Namespace) -> None:
+    user_ids = list(connection.scalars(select(users_table.c.id)))
+    if not user_ids:
+        logging.warning("No users to author synthetic posts.")
+        return
+    start = datetime.utcnow() - timedelta(days=SYNTHETIC_DAYS)
+    step = timedelta(days=SYNTHETIC_DAYS) / count
+    totals = dict.fromkeys(("posts", "comments", "post_reactions", "comment_reactions"), 0)
+    for offset in range(0, count, args.chunk_size):
+        chunk = _synthetic_chunk(
+            bulk.next_id(connection, posts_table),
+            bulk.next_id(connection, comments_table),
+            min(args.chunk_size, count - offset),
+            start + step * offset,
+            step,
+            user_ids,
+            text,
+            args,
+        )
+        for table in (posts_table, comments_table, PostReaction.__table__, CommentReaction.__table__):
+            totals[table.name] += bulk.load(connection, table, chunk[table.name], args.chunk_size)
+        connection.commit()
+        logging.info("Generated " + ", ".join(f"{total} {name}" for name, total in totals.items()) + ".")
+
 
 def main():
-    db = SessionLocal()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users-csv", default=os.path.join(SCRIPTS_DIR, "users.csv"))
+    parser.add_argument("--posts-csv", default=os.path.join(SCRIPTS_DIR, "posts.csv"))
+    parser.add_argument("--synthetic-users", type=int, default=0)
+    parser.add_argument("--synthetic-posts", type=int, default=0)
+    parser.add_argument("--comments-per-post", type=float, default=4.0)
+    parser.add_argument("--reply-ratio", type=float, default=0.5)
+    parser.add_argument("--reactions-per-post", type=float, default=10.0)
+    parser.add_argument("--reactions-per-comment", type=float, default=2.0)
+    parser.add_argument("--fast-test-data", action="store_true", help=f"give every user the password {TEST_PASSWORD}")
+    parser.add_argument("--hash-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--random-seed", type=int)
+    args = parser.parse_args()
+
+    random.seed(args.random_seed)
+    Faker.seed(args.random_seed)
+    hasher = Hasher(args.hash_workers, args.fast_test_data)
+    started = time.perf_counter()
     try:
         logging.info("Starting database seeding...")
-        users = seed_users(db)
-        if users:
-            logging.info("Seeding posts...")
-            seed_posts(db, users)
-        logging.info("Database seeding completed.")
+        with engine.connect() as connection:
+            seed_initial(connection)
+            if os.path.exists(args.users_csv):
+                load_users_csv(connection, args.users_csv, hasher, args.chunk_size)
+            if os.path.exists(args.posts_csv):
+                load_posts_csv(connection, args.posts_csv, args.chunk_size)
+            if args.synthetic_users:
+                generate_users(connection, args.synthetic_users, hasher, args.chunk_size)
+            if args.synthetic_posts:
+                generate_posts(connection, args.synthetic_posts, TextPool(Faker()), args)
+            for table in (users_table, posts_table, comments_table):
+                bulk.reset_sequence(connection, table)
+            connection.commit()
+    finally:
+        hasher.close()
+
+    logging.info("Rebuilding user aggregates...")
+    db = SessionLocal()
+    try:
+        reconcile_users(db, BATCH_SIZE)
     finally:
         db.close()
+    logging.info(f"Database seeding completed in {time.perf_counter() - started:.1f}s.")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
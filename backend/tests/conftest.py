@@ -0,0 +1,168 @@
+"""
+Test configuration.
+
+The application reads its settings and creates its engines at import time,
+so the environment is set up here, before anything under `app` is imported.
+Every test runs against the same throwaway SQLite database, emptied before
+each test, through one `client` that ran the startup handlers.
+"""
+import os
+import tempfile
+
+_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+os.environ["SECRET_KEY"] = "test-secret"
+os.environ["FEED_CACHE_BACKEND"] = "memory"
+os.environ["PASSWORD_HASH_WORKERS"] = "1"
+
+import asyncio
+from functools import partialmethod
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, Iterator, List
+
+import httpx
+import pytest
+from anyio.from_thread import BlockingPortal, start_blocking_portal
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import main
+from app.core import auth_cache, feed_cache, revocation
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash
+from app.db.session import SessionLocal, engine
+from app.models.base import Base
+from app.models.user import User
+
+API = settings.API_V1_STR
+PASSWORD = "Secret123aA!"
+# bcrypt is slow on purpose; hash once for every user the tests create
+PASSWORD_HASH = get_password_hash(PASSWORD)
+
+_usernames = count()
+
+
+class Client:
+    """
+    Synchronous client for `main.app`, which runs in the event loop of a
+    background thread like Starlette's `TestClient` (which needs an
+    older httpx than the one pinned).
+    """
+
+    def __init__(self, portal: BlockingPortal):
+        self.portal = portal
+        self.async_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://testserver")
+
+    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        return self.portal.call(lambda: self.async_client.request(method, url, **kwargs))
+
+    get = partialmethod(request, "GET")
+    post = partialmethod(request, "POST")
+    put = partialmethod(request, "PUT")
+    delete = partialmethod(request, "DELETE")
+
+    def run(self, fn: Callable[[httpx.AsyncClient], Awaitable[Any]]) -> Any:
+        """
+        Run `fn(async_client)` in the application's event loop, e.g. to send
+        concurrent requests.
+        """
+        return self.portal.call(fn, self.async_client)
+
+
+async def _run_handlers(handlers) -> None:
+    for handler in handlers:
+        result = handler()
+        if asyncio.iscoroutine(result):
+            await result
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[Client]:
+    with start_blocking_portal() as portal:
+        portal.call(_run_handlers, main.app.router.on_startup)
+        try:
+            yield Client(portal)
+        finally:
+            portal.call(_run_handlers, main.app.router.on_shutdown)
+    os.unlink(_db_file.name)
+
+
+@pytest.fixture(autouse=True)
+def clean_state(client: Client) -> Iterator[None]:
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    auth_cache.token_cache.clear()
+    auth_cache.user_cache.clear()
+    revocation.revoked_tokens = revocation.RevocationList()
+    if feed_cache.backend is not None:
+        client.portal.call(feed_cache.invalidate)
+    yield
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def make_user(db: Session) -> Callable[..., User]:
+    def make_user(username: str = None, *, is_superuser: bool = False, is_active: bool = True) -> User:
+        user = User(
+            username=username or f"user{next(_usernames)}",
+            hashed_password=PASSWORD_HASH,
+            is_superuser=is_superuser,
+            is_active=is_active,
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+
+    return make_user
+
+
+def auth(user: User) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+
+def create_post(client: Client, user: User, title: str = "Title", body: str = "Body") -> dict:
+    response = client.post(f"{API}/posts/", json={"title": title, "body": body}, headers=auth(user))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def create_comment(client: Client, user: User, post_id: int, content: str = "Comment", parent_id: int = None) -> dict:
+    response = client.post(
+        f"{API}/comments/post/{post_id}",
+        json={"content": content, "parent_id": parent_id},
+        headers=auth(user),
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+class StatementCounter:
+    """
+    Collects the SQL statements issued on `engine` inside a `with` block.
+    """
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "StatementCounter":
+        event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(engine, "before_cursor_execute", self._record)
+
+    def __len__(self) -> int:
+        return len(self.statements)
@@ -0,0 +1,32 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.crud import user as crud_user
+from app.db.session import async_database_url, run_db
+
+
+def test_async_database_url_swaps_the_driver():
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert (
+        async_database_url("postgresql://user:secret@db:5432/app")
+        == "postgresql+asyncpg://user:secret@db:5432/app"
+    )
+    assert async_database_url("postgresql+asyncpg://db/app") == "postgresql+asyncpg://db/app"
+
+
+def test_run_db_runs_sync_crud_on_an_async_session(client, make_user):
+    user = make_user()
+    async_engine = create_async_engine(async_database_url(settings.DATABASE_URL))
+
+    async def lookup():
+        async with async_sessionmaker(async_engine)() as db:
+            found = await run_db(db, crud_user.get_by_username, user.username)
+            return found.id
+
+    async def dispose():
+        await async_engine.dispose()
+
+    try:
+        assert client.portal.call(lookup) == user.id
+    finally:
+        client.portal.call(dispose)
@@ -0,0 +1,53 @@
+import asyncio
+
+from app.core import security
+from app.core.config import settings
+
+from conftest import API, PASSWORD, StatementCounter
+
+
+def _login(username, password=PASSWORD):
+    return {"username": username, "password": password}
+
+
+def test_register_and_login(client):
+    response = client.post(f"{API}/auth/register", json={"username": "newcomer", "password": PASSWORD})
+    assert response.status_code == 200, response.text
+
+    response = client.post(f"{API}/auth/login", data=_login("newcomer"))
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    me = client.get(f"{API}/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.json()["username"] == "newcomer"
+
+    assert client.post(f"{API}/auth/login", data=_login("newcomer", "wrong")).status_code == 401
+    assert client.post(f"{API}/auth/login", data=_login("nobody")).status_code == 401
+
+
+def test_busy_hasher_answers_503_before_touching_the_database(client, make_user, monkeypatch):
+    user = make_user()
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 1)
+
+    with security.hash_slot(), StatementCounter() as counter:
+        response = client.post(f"{API}/auth/login", data=_login(user.username))
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert len(counter) == 0
+
+
+def test_concurrent_logins_past_the_limit_are_turned_away(client, make_user, monkeypatch):
+    user = make_user()
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 2)
+
+    async def storm(async_client):
+        return await asyncio.gather(
+            *(async_client.post(f"{API}/auth/login", data=_login(user.username)) for _ in range(8))
+        )
+
+    statuses = sorted(response.status_code for response in client.run(storm))
+
+    assert 200 in statuses
+    assert 503 in statuses
+    assert set(statuses) == {200, 503}
+    assert security._hash_pending == 0
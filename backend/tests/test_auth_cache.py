@@ -0,0 +1,39 @@
+from app.core import auth_cache
+
+from conftest import API, auth
+
+
+def test_warm_token_is_served_from_the_cache(client, make_user):
+    user = make_user()
+    headers = auth(user)
+
+    client.get(f"{API}/auth/me", headers=headers)
+    client.get(f"{API}/auth/me", headers=headers)
+
+    stats = auth_cache.stats()
+    assert stats["tokens"]["size"] == 1
+    assert stats["tokens"]["hits"] >= 1
+    assert stats["users"]["size"] == 1
+
+
+def test_auth_cache_stats_are_exposed_to_superusers(client, make_user):
+    admin, user = make_user(is_superuser=True), make_user()
+
+    assert client.get(f"{API}/admin/auth-cache", headers=auth(user)).status_code == 400
+    response = client.get(f"{API}/admin/auth-cache", headers=auth(admin))
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"tokens", "users"}
+    assert response.json()["tokens"]["maxsize"] > 0
+
+
+def test_updating_a_user_drops_the_cached_copy(client, db, make_user):
+    user = make_user()
+    client.get(f"{API}/auth/me", headers=auth(user))
+    assert auth_cache.user_cache.get(user.id) is not None
+
+    user.is_active = False
+    db.commit()
+
+    assert auth_cache.user_cache.get(user.id) is None
+    assert client.get(f"{API}/auth/me", headers=auth(user)).json()["is_active"] is False
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+import backfill_reactions
+from app.db.session import engine
+from app.models.reaction import PostReaction
+
+from conftest import API, auth, create_post
+
+
+@pytest.fixture
+def legacy_tables():
+    with engine.begin() as connection:
+        for table in ("post_likes", "post_dislikes"):
+            connection.execute(
+                text(
+                    f"CREATE TABLE {table} "
+                    "(id INTEGER PRIMARY KEY, user_id INTEGER, post_id INTEGER, created_at DATETIME)"
+                )
+            )
+    yield
+    with engine.begin() as connection:
+        for table in ("post_likes", "post_dislikes"):
+            connection.execute(text(f"DROP TABLE {table}"))
+
+
+def _insert(table, rows):
+    with engine.begin() as connection:
+        connection.execute(
+            text(f"INSERT INTO {table} (user_id, post_id, created_at) VALUES (:user_id, :post_id, :created_at)"),
+            rows,
+        )
+
+
+def test_backfill_keeps_the_latest_reaction_and_can_be_rerun(client, db, make_user, legacy_tables):
+    alice, bob = make_user(), make_user()
+    post = create_post(client, alice)
+    earlier = datetime(2024, 1, 1)
+    later = earlier + timedelta(days=1)
+    _insert("post_likes", [
+        {"user_id": alice.id, "post_id": post["id"], "created_at": earlier},
+        {"user_id": alice.id, "post_id": post["id"], "created_at": earlier},
+        {"user_id": bob.id, "post_id": post["id"], "created_at": later},
+    ])
+    _insert("post_dislikes", [
+        {"user_id": alice.id, "post_id": post["id"], "created_at": later},
+        {"user_id": bob.id, "post_id": post["id"], "created_at": earlier},
+    ])
+
+    for _ in range(2):
+        for source, target, fk, is_like in backfill_reactions.LEGACY_TABLES[:2]:
+            backfill_reactions.backfill(source, target, fk, is_like, batch_size=1)
+
+        reactions = {
+            reaction.user_id: (reaction.is_like, reaction.created_at, reaction.updated_at)
+            for reaction in db.query(PostReaction).filter_by(post_id=post["id"])
+        }
+        assert reactions == {alice.id: (False, earlier, later), bob.id: (True, later, later)}
+        db.expire_all()
+
+
+def test_backfill_keeps_a_reaction_flipped_after_the_legacy_row(client, db, make_user, legacy_tables):
+    alice, bob = make_user(), make_user()
+    post = create_post(client, alice)
+    url = f"{API}/posts/{post['id']}"
+    client.post(f"{url}/like", headers=auth(bob))
+    client.post(f"{url}/dislike", headers=auth(bob))
+    # The first reaction predates the legacy like, the flip comes after it
+    first = datetime(2024, 1, 1)
+    db.query(PostReaction).filter_by(post_id=post["id"]).update({"created_at": first})
+    db.commit()
+    _insert("post_likes", [{"user_id": bob.id, "post_id": post["id"], "created_at": first + timedelta(days=1)}])
+
+    backfill_reactions.backfill("post_likes", "post_reactions", "post_id", True, batch_size=10)
+
+    db.expire_all()
+    reaction = db.query(PostReaction).filter_by(post_id=post["id"], user_id=bob.id).one()
+    assert (reaction.is_like, reaction.created_at) == (False, first)
@@ -0,0 +1,40 @@
+from conftest import API, StatementCounter, auth, create_comment, create_post
+
+
+def test_batch_get_returns_states_in_request_order(client, make_user):
+    alice, bob = make_user(), make_user()
+    first, second = create_post(client, alice), create_post(client, alice)
+    client.post(f"{API}/posts/{first['id']}/like", headers=auth(bob))
+    client.post(f"{API}/posts/{second['id']}/dislike", headers=auth(alice))
+
+    response = client.post(
+        f"{API}/posts/reactions:batchGet", json={"ids": [second["id"], 999, first["id"]]}, headers=auth(bob)
+    )
+
+    assert response.json() == [
+        {"id": second["id"], "likes_count": 0, "dislikes_count": 1, "is_liked": False, "is_disliked": False},
+        {"id": first["id"], "likes_count": 1, "dislikes_count": 0, "is_liked": True, "is_disliked": False},
+    ]
+
+
+def test_batch_get_is_one_statement_for_anonymous_callers(client, make_user):
+    alice = make_user()
+    ids = [create_post(client, alice)["id"] for _ in range(5)]
+
+    with StatementCounter() as counter:
+        response = client.post(f"{API}/posts/reactions:batchGet", json={"ids": ids})
+
+    assert [state["id"] for state in response.json()] == ids
+    assert len(counter) == 1
+
+
+def test_batch_get_of_comments_requires_a_user(client, make_user):
+    alice = make_user()
+    post = create_post(client, alice)
+    comment = create_comment(client, alice, post["id"])
+    url = f"{API}/comments/reactions:batchGet"
+
+    assert client.post(url, json={"ids": [comment["id"]]}).status_code == 401
+    response = client.post(url, json={"ids": [comment["id"]]}, headers=auth(alice))
+    assert response.json()[0]["id"] == comment["id"]
+    assert client.post(url, json={"ids": []}, headers=auth(alice)).status_code == 422
@@ -0,0 +1,52 @@
+import argparse
+import random
+from datetime import datetime
+
+from faker import Faker
+from sqlalchemy import func, select
+
+import seed_from_csv
+from app.db import bulk
+from app.db.session import engine
+from app.models.comment import Comment
+from app.models.post import Post
+from app.models.reaction import PostReaction
+
+
+def test_chunked_and_copy_values():
+    assert list(bulk.chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert bulk._copy_value(None) == "\\N"
+    assert bulk._copy_value(True) == "t"
+    assert bulk._copy_value("a\tb\nc\\") == "a\\tb\\nc\\\\"
+    assert bulk._copy_value(datetime(2024, 1, 2, 3, 4, 5)) == "2024-01-02T03:04:05"
+
+
+def test_synthetic_data_has_consistent_counters(db):
+    random.seed(7)
+    args = argparse.Namespace(
+        comments_per_post=3,
+        reply_ratio=0.5,
+        reactions_per_post=4,
+        reactions_per_comment=1,
+        chunk_size=7,
+    )
+    hasher = seed_from_csv.Hasher(workers=1, fast=True)
+    with engine.connect() as connection:
+        seed_from_csv.seed_initial(connection)
+        seed_from_csv.generate_users(connection, 10, hasher, args.chunk_size)
+        seed_from_csv.generate_posts(connection, 20, seed_from_csv.TextPool(Faker(), size=5), args)
+
+    assert db.scalar(select(func.count(Post.id))) == 21
+    likes = (
+        select(func.count(PostReaction.id))
+        .where(PostReaction.post_id == Post.id, PostReaction.is_like)
+        .correlate(Post)
+        .scalar_subquery()
+    )
+    comments = select(func.count(Comment.id)).where(Comment.post_id == Post.id).correlate(Post).scalar_subquery()
+    drifted = db.scalar(
+        select(func.count(Post.id)).where(
+            (Post.likes_count != likes) | (Post.comment_count != comments) | (Post.score != Post.likes_count - Post.dislikes_count)
+        )
+    )
+    assert drifted == 0
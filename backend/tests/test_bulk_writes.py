@@ -0,0 +1,60 @@
+from app.models.post import Post
+
+from conftest import API, auth, create_comment, create_post
+
+
+def test_batch_write_reports_every_operation(client, db, make_user):
+    alice, bob = make_user(), make_user()
+    liked, flipped, repeated = (create_post(client, alice) for _ in range(3))
+    client.post(f"{API}/posts/{flipped['id']}/like", headers=auth(bob))
+    client.post(f"{API}/posts/{repeated['id']}/like", headers=auth(bob))
+
+    response = client.post(
+        f"{API}/posts/reactions:batchWrite",
+        json={
+            "operations": [
+                {"id": liked["id"], "is_like": False},
+                {"id": flipped["id"], "is_like": False},
+                {"id": repeated["id"], "is_like": True},
+                {"id": 999, "is_like": True},
+                {"id": liked["id"], "is_like": True},
+            ]
+        },
+        headers=auth(bob),
+    )
+
+    assert [(result["index"], result["status"]) for result in response.json()] == [
+        (0, "superseded"),
+        (1, "updated"),
+        (2, "unchanged"),
+        (3, "not_found"),
+        (4, "created"),
+    ]
+    db.expire_all()
+    counts = {post.id: (post.likes_count, post.dislikes_count) for post in db.query(Post)}
+    assert counts == {liked["id"]: (1, 0), flipped["id"]: (0, 1), repeated["id"]: (1, 0)}
+
+
+def test_comment_batch_is_idempotent_per_client_id(client, make_user):
+    alice = make_user()
+    post, other = create_post(client, alice), create_post(client, alice)
+    parent = create_comment(client, alice, post["id"])
+    batch = {
+        "comments": [
+            {"client_id": "a", "post_id": post["id"], "content": "A"},
+            {"client_id": "b", "post_id": post["id"], "content": "B", "parent_id": parent["id"]},
+            {"client_id": "a", "post_id": post["id"], "content": "A twice"},
+            {"client_id": "c", "post_id": 999, "content": "C"},
+            {"client_id": "d", "post_id": other["id"], "content": "D", "parent_id": parent["id"]},
+        ]
+    }
+
+    first = client.post(f"{API}/comments/batch", json=batch, headers=auth(alice)).json()
+    replay = client.post(f"{API}/comments/batch", json=batch, headers=auth(alice)).json()
+
+    assert [result["status"] for result in first] == ["created", "created", "duplicate", "not_found", "invalid"]
+    assert first[2]["id"] == first[0]["id"]
+    assert [result["status"] for result in replay] == ["duplicate", "duplicate", "duplicate", "not_found", "invalid"]
+    assert [result["id"] for result in replay[:2]] == [result["id"] for result in first[:2]]
+    contents = [comment["content"] for comment in client.get(f"{API}/posts/{post['id']}").json()["comments"]]
+    assert sorted(contents) == ["A", "B", "Comment"]
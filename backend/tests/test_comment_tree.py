@@ -0,0 +1,79 @@
+from app.crud import comment as crud_comment
+
+from conftest import API, StatementCounter, auth, create_comment, create_post
+
+
+def test_tree_nests_replies(client, make_user):
+    user = make_user()
+    post = create_post(client, user)
+    root = create_comment(client, user, post["id"], "root")
+    reply = create_comment(client, user, post["id"], "reply", parent_id=root["id"])
+    create_comment(client, user, post["id"], "nested", parent_id=reply["id"])
+
+    response = client.get(f"{API}/comments/post/{post['id']}", headers=auth(user))
+
+    [tree] = response.json()
+    assert tree["content"] == "root"
+    assert tree["reply_count"] == 1
+    assert tree["replies"][0]["content"] == "reply"
+    assert tree["replies"][0]["replies"][0]["content"] == "nested"
+
+
+def test_max_depth_cuts_the_tree(client, make_user):
+    user = make_user()
+    post = create_post(client, user)
+    root = create_comment(client, user, post["id"])
+    reply = create_comment(client, user, post["id"], parent_id=root["id"])
+    create_comment(client, user, post["id"], parent_id=reply["id"])
+
+    response = client.get(f"{API}/comments/post/{post['id']}", params={"max_depth": 1}, headers=auth(user))
+
+    [tree] = response.json()
+    assert tree["replies"][0]["replies"] == []
+    assert tree["replies"][0]["reply_count"] == 1
+
+
+def test_replies_limit_keeps_the_first_replies_of_every_comment(client, make_user):
+    user = make_user()
+    post = create_post(client, user)
+    root = create_comment(client, user, post["id"])
+    replies = [create_comment(client, user, post["id"], f"reply {i}", parent_id=root["id"]) for i in range(4)]
+    for i in range(3):
+        create_comment(client, user, post["id"], f"nested {i}", parent_id=replies[0]["id"])
+
+    response = client.get(f"{API}/comments/post/{post['id']}", params={"replies_limit": 2}, headers=auth(user))
+
+    [tree] = response.json()
+    assert [reply["content"] for reply in tree["replies"]] == ["reply 0", "reply 1"]
+    assert tree["reply_count"] == 4
+    assert [reply["content"] for reply in tree["replies"][0]["replies"]] == ["nested 0", "nested 1"]
+
+
+def test_replies_limit_is_applied_while_walking_the_thread(client, db, make_user):
+    user = make_user()
+    post = create_post(client, user)
+    root = create_comment(client, user, post["id"])
+    for i in range(5):
+        create_comment(client, user, post["id"], parent_id=root["id"])
+
+    with StatementCounter() as counter:
+        crud_comment.get_comment_tree(db, post_id=post["id"], replies_limit=2)
+
+    [statement] = counter.statements
+    # The replies come from a LIMITed lookup per parent, not a window over the whole thread
+    assert "row_number" not in statement.lower()
+    assert "LIMIT" in statement
+
+
+def test_exactly_full_last_page_has_no_cursor(client, make_user):
+    user = make_user()
+    post = create_post(client, user)
+    for i in range(4):
+        create_comment(client, user, post["id"], f"comment {i}")
+    url = f"{API}/comments/post/{post['id']}"
+
+    first = client.get(url, params={"limit": 2}, headers=auth(user))
+    second = client.get(url, params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]}, headers=auth(user))
+
+    assert [comment["content"] for comment in second.json()] == ["comment 2", "comment 3"]
+    assert "X-Next-Cursor" not in second.headers
@@ -0,0 +1,84 @@
+import reconcile_counters
+from app.models.comment import Comment
+from app.models.post import Post
+
+from conftest import API, auth, create_comment, create_post
+
+
+def _post_counts(db, post_id):
+    db.expire_all()
+    post = db.get(Post, post_id)
+    return post.likes_count, post.dislikes_count, post.score
+
+
+def test_post_counters_follow_reactions(client, db, make_user):
+    alice, bob, carol = make_user(), make_user(), make_user()
+    post = create_post(client, alice)
+    url = f"{API}/posts/{post['id']}"
+
+    client.post(f"{url}/like", headers=auth(bob))
+    client.post(f"{url}/like", headers=auth(carol))
+    assert _post_counts(db, post["id"]) == (2, 0, 2)
+
+    # Repeating a reaction changes nothing, switching moves the count over
+    client.post(f"{url}/like", headers=auth(bob))
+    response = client.post(f"{url}/dislike", headers=auth(carol))
+    assert _post_counts(db, post["id"]) == (1, 1, 0)
+    assert response.json()["likes_count"] == 1
+    assert response.json()["dislikes_count"] == 1
+    assert response.json()["is_disliked"] is True
+
+
+def test_comment_counters_follow_reactions(client, db, make_user):
+    alice, bob = make_user(), make_user()
+    post = create_post(client, alice)
+    comment = create_comment(client, alice, post["id"])
+    url = f"{API}/comments/{comment['id']}"
+
+    client.post(f"{url}/dislike", headers=auth(bob))
+    client.post(f"{url}/dislike", headers=auth(bob))
+    response = client.post(f"{url}/like", headers=auth(bob))
+
+    assert response.json()["likes_count"] == 1
+    assert response.json()["dislikes_count"] == 0
+    db.expire_all()
+    stored = db.get(Comment, comment["id"])
+    assert (stored.likes_count, stored.dislikes_count) == (1, 0)
+
+
+def test_reconcile_rebuilds_drifted_counters(client, db, make_user):
+    alice, bob = make_user(), make_user()
+    post = create_post(client, alice)
+    client.post(f"{API}/posts/{post['id']}/like", headers=auth(bob))
+    stored = db.get(Post, post["id"])
+    stored.likes_count, stored.score, stored.comment_count = 7, 7, 3
+    db.commit()
+
+    reconcile_counters.reconcile(db, Post, reconcile_counters.PostReaction, reconcile_counters.PostReaction.post_id, 10)
+
+    assert _post_counts(db, post["id"]) == (1, 0, 1)
+    assert db.get(Post, post["id"]).comment_count == 0
+
+
+def test_post_comment_count_follows_comments(client, db, make_user):
+    alice = make_user()
+    post = create_post(client, alice)
+    other = create_post(client, alice)
+    first = create_comment(client, alice, post["id"])
+    create_comment(client, alice, post["id"], parent_id=first["id"])
+    client.post(
+        f"{API}/comments/batch",
+        json={
+            "comments": [
+                {"client_id": "a", "post_id": post["id"], "content": "A"},
+                {"client_id": "b", "post_id": other["id"], "content": "B"},
+                {"client_id": "a", "post_id": post["id"], "content": "A again"},
+            ]
+        },
+        headers=auth(alice),
+    )
+    client.delete(f"{API}/comments/{first['id']}", headers=auth(alice))
+
+    db.expire_all()
+    assert db.get(Post, post["id"]).comment_count == 2
+    assert db.get(Post, other["id"]).comment_count == 1
@@ -0,0 +1,37 @@
+from app.crud import post as crud_post
+
+from conftest import API, StatementCounter, auth, create_comment, create_post
+
+
+def test_feed_carries_author_counts_and_viewer_flags(client, make_user):
+    alice, bob = make_user("alice"), make_user("bob")
+    post = create_post(client, alice, "Hello")
+    create_comment(client, bob, post["id"])
+    create_comment(client, alice, post["id"])
+    client.post(f"{API}/posts/{post['id']}/like", headers=auth(bob))
+
+    response = client.get(f"{API}/posts/", headers=auth(bob))
+
+    assert response.status_code == 200
+    [item] = response.json()
+    assert item["author"]["username"] == "alice"
+    assert item["likes_count"] == 1
+    assert item["dislikes_count"] == 0
+    assert item["comment_count"] == 2
+    assert item["is_liked"] is True
+    assert item["is_disliked"] is False
+
+
+def test_feed_statement_count_does_not_grow_with_page_size(client, db, make_user):
+    users = [make_user() for _ in range(3)]
+    for i in range(12):
+        post = create_post(client, users[i % 3], f"Post {i}")
+        create_comment(client, users[(i + 1) % 3], post["id"])
+
+    def statements(limit):
+        with StatementCounter() as counter:
+            posts, _ = crud_post.get_feed(db, limit=limit, viewer_id=users[0].id, preview=2)
+        assert len(posts) == limit
+        return len(counter)
+
+    assert statements(3) == statements(12)
@@ -0,0 +1,42 @@
+import json
+from typing import List
+
+from app.core import feed_cache
+from app.core.serialization import dump_json
+from app.crud import post as crud_post
+from app.schemas.post import PostSummary
+
+from conftest import API, auth, create_post
+
+
+def test_writes_invalidate_cached_pages(client, make_user):
+    alice = make_user()
+    create_post(client, alice, "First")
+    assert [post["title"] for post in client.get(f"{API}/posts/").json()] == ["First"]
+
+    create_post(client, alice, "Second")
+
+    assert [post["title"] for post in client.get(f"{API}/posts/").json()] == ["Second", "First"]
+
+
+def test_overlay_matches_a_page_rendered_for_the_viewer(client, db, make_user):
+    alice, bob = make_user(), make_user()
+    posts = [create_post(client, alice, title) for title in ('"is_liked":false', "Two", "Three")]
+    client.post(f"{API}/posts/{posts[0]['id']}/like", headers=auth(bob))
+    client.post(f"{API}/posts/{posts[2]['id']}/dislike", headers=auth(bob))
+
+    for query, fields in (("", None), ("?fields=title,is_disliked", {"id", "title", "is_disliked"})):
+        cached = client.get(f"{API}/posts/{query}", headers=auth(bob))
+        expected, _ = crud_post.get_feed(db, viewer_id=bob.id, fields=fields)
+        assert cached.json() == json.loads(dump_json(List[PostSummary], expected, include=fields))
+
+
+def test_page_offsets_survive_the_cache_round_trip():
+    body = b'[{"id":1,"is_liked":false,"is_disliked":false},{"id":2,"is_liked":false,"is_disliked":false}]'
+    page = feed_cache.CachedPage.loads(feed_cache.CachedPage.render(body, "tag", None, [1, 2]).dumps())
+
+    assert feed_cache.overlay(page, {}) == body
+    assert json.loads(feed_cache.overlay(page, {1: False, 2: True})) == [
+        {"id": 1, "is_liked": False, "is_disliked": True},
+        {"id": 2, "is_liked": True, "is_disliked": False},
+    ]
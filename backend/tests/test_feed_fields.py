@@ -0,0 +1,38 @@
+from conftest import API, auth, create_comment, create_post
+
+
+def test_feed_leaves_comments_out_unless_previewed(client, make_user):
+    alice = make_user()
+    post = create_post(client, alice)
+    for i in range(3):
+        create_comment(client, alice, post["id"], f"Comment {i}")
+
+    [item] = client.get(f"{API}/posts/").json()
+    assert "comments" not in item
+    assert item["comments_preview"] is None
+    assert item["comment_count"] == 3
+
+    [item] = client.get(f"{API}/posts/?preview=2").json()
+    assert [comment["content"] for comment in item["comments_preview"]] == ["Comment 0", "Comment 1"]
+    assert "replies" not in item["comments_preview"][0]
+
+
+def test_feed_returns_only_the_selected_fields(client, make_user):
+    alice = make_user()
+    create_post(client, alice, "Selected")
+
+    response = client.get(f"{API}/posts/?fields=title,likes_count", headers=auth(alice))
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": response.json()[0]["id"], "title": "Selected", "likes_count": 0}]
+    assert client.get(f"{API}/posts/?fields=title,nope").status_code == 400
+
+
+def test_single_post_still_carries_its_comments(client, make_user):
+    alice = make_user()
+    post = create_post(client, alice)
+    create_comment(client, alice, post["id"])
+
+    response = client.get(f"{API}/posts/{post['id']}")
+
+    assert len(response.json()["comments"]) == 1
@@ -0,0 +1,52 @@
+from app.core.config import settings
+
+from conftest import API, auth, create_comment, create_post
+
+
+def test_feed_answers_304_until_it_changes(client, make_user):
+    alice, bob = make_user(), make_user()
+    post = create_post(client, alice)
+
+    first = client.get(f"{API}/posts/")
+    tag = first.headers["ETag"]
+    assert tag.startswith('W/"')
+    assert first.headers["Cache-Control"] == f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}"
+    assert first.headers["Vary"] == "Authorization"
+
+    cached = client.get(f"{API}/posts/", headers={"If-None-Match": tag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    client.post(f"{API}/posts/{post['id']}/like", headers=auth(bob))
+
+    changed = client.get(f"{API}/posts/", headers={"If-None-Match": tag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != tag
+
+
+def test_viewer_responses_are_private_and_per_viewer(client, make_user):
+    alice, bob = make_user(), make_user()
+    post = create_post(client, alice)
+    client.post(f"{API}/posts/{post['id']}/like", headers=auth(bob))
+
+    as_alice = client.get(f"{API}/posts/", headers=auth(alice))
+    as_bob = client.get(f"{API}/posts/", headers=auth(bob))
+
+    assert as_alice.headers["Cache-Control"] == "private, no-cache"
+    assert as_alice.headers["ETag"] != as_bob.headers["ETag"]
+    revalidated = client.get(f"{API}/posts/", headers={**auth(bob), "If-None-Match": as_bob.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_comment_tree_etag_follows_new_replies(client, make_user):
+    alice = make_user()
+    post = create_post(client, alice)
+    comment = create_comment(client, alice, post["id"])
+    url = f"{API}/comments/post/{post['id']}"
+
+    tag = client.get(url, headers=auth(alice)).headers["ETag"]
+    assert client.get(url, headers={**auth(alice), "If-None-Match": f"{tag}, W/\"other\""}).status_code == 304
+
+    create_comment(client, alice, post["id"], parent_id=comment["id"])
+
+    assert client.get(url, headers={**auth(alice), "If-None-Match": tag}).status_code == 200
@@ -0,0 +1,53 @@
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, Table, create_engine, text
+
+from app.db.index_audit import audit, unindexed_foreign_keys
+from app.db.session import engine
+from app.models.base import Base
+
+from conftest import create_comment, create_post
+
+
+def test_schema_has_no_findings(client, make_user):
+    alice = make_user()
+    post = create_post(client, alice)
+    create_comment(client, alice, post["id"])
+
+    assert audit(engine) == []
+
+
+def test_unindexed_foreign_key_is_reported():
+    scratch = create_engine("sqlite://")
+    metadata = MetaData()
+    Table("parents", metadata, Column("id", Integer, primary_key=True))
+    Table("children", metadata, Column("id", Integer, primary_key=True), Column("parent_id", ForeignKey("parents.id")))
+    metadata.create_all(scratch)
+
+    [finding] = unindexed_foreign_keys(scratch)
+
+    assert (finding.check, finding.table) == ("foreign_key", "children")
+
+
+def test_full_table_scan_is_reported(tmp_path):
+    scratch = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(scratch)
+    with scratch.begin() as connection:
+        connection.execute(text("DROP INDEX ix_posts_score_id"))
+
+    findings = audit(scratch)
+    scratch.dispose()
+
+    assert ("plan", "posts", "feed sort=top reads the whole table") in findings
+
+
+def test_comment_tree_statement_is_planned(tmp_path):
+    scratch = create_engine(f"sqlite:///{tmp_path / 'audit.db'}")
+    Base.metadata.create_all(scratch)
+    with scratch.begin() as connection:
+        connection.execute(text("DROP INDEX ix_comments_post_id_parent_id_created_at_id"))
+        connection.execute(text("DROP INDEX ix_comments_parent_id"))
+
+    findings = audit(scratch)
+    scratch.dispose()
+
+    # The comment tree is a single WITH RECURSIVE statement
+    assert ("plan", "comments", "comment tree reads the whole table") in findings
@@ -0,0 +1,30 @@
+from benchmarks import load_test
+
+
+def test_percentile_picks_the_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+
+    assert load_test.percentile(values, 0.50) == 51.0
+    assert load_test.percentile(values, 0.99) == 100.0
+    assert load_test.percentile([3.0], 0.99) == 3.0
+
+
+def test_summarize_and_compare_with_a_baseline(capsys):
+    samples = [(0.010, 2, 200), (0.020, 4, 200), (0.030, 3, 503), (0.040, 3, 200)]
+
+    summary = load_test.summarize(samples, duration=2.0)
+
+    assert summary == {
+        "requests": 4,
+        "errors": 1,
+        "throughput_rps": 2.0,
+        "p50_ms": 30.0,
+        "p95_ms": 40.0,
+        "p99_ms": 40.0,
+        "statements_per_request": 3.0,
+    }
+    baseline = {"overall": {**summary, "p95_ms": 50.0, "statements_per_request": 4.0}, "endpoints": {}}
+    load_test.report({"overall": summary, "endpoints": {"feed_anonymous": summary}}, baseline)
+    output = capsys.readouterr().out
+    assert "p95 -10.0ms stmts -1.0" in output
+    assert "feed_anonymous" in output
@@ -0,0 +1,49 @@
+from conftest import API, create_post
+
+
+def walk(client, url, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+
+def test_cursor_walks_the_feed_newest_first(client, make_user):
+    author = make_user()
+    ids = [create_post(client, author, f"Post {i}")["id"] for i in range(5)]
+
+    pages = walk(client, f"{API}/posts/", limit=2)
+
+    newest = ids[::-1]
+    assert pages == [newest[0:2], newest[2:4], newest[4:]]
+
+
+def test_exactly_full_last_page_has_no_cursor(client, make_user):
+    author = make_user()
+    for i in range(4):
+        create_post(client, author, f"Post {i}")
+
+    pages = walk(client, f"{API}/posts/", limit=2)
+
+    assert [len(page) for page in pages] == [2, 2]
+
+
+def test_posts_created_during_a_walk_do_not_shift_pages(client, make_user):
+    author = make_user()
+    ids = [create_post(client, author, f"Post {i}")["id"] for i in range(4)]
+    first = client.get(f"{API}/posts/", params={"limit": 2})
+
+    create_post(client, author, "Newer")
+    second = client.get(f"{API}/posts/", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+
+    assert [item["id"] for item in second.json()] == [ids[1], ids[0]]
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get(f"{API}/posts/", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
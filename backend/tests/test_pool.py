@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.db.pool import PoolMetrics, instrument
+
+from conftest import API, auth
+
+
+def test_instrumented_pool_records_checkouts_and_timeouts(tmp_path):
+    metrics = PoolMetrics()
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrument(QueuePool, metrics),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    try:
+        with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        stats = metrics.stats(engine.pool)
+    finally:
+        engine.dispose()
+
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["pool_size"] == 1
+    assert stats["checked_out"] == 0
+    assert stats["wait_seconds_max"] >= 0.01
+
+
+def test_requests_report_their_pool_wait(client, make_user):
+    response = client.get(f"{API}/posts/", headers=auth(make_user()))
+
+    assert "db-pool;dur=" in response.headers["server-timing"]
+
+
+def test_pool_stats_are_exposed_to_superusers(client, make_user):
+    admin = make_user(is_superuser=True)
+
+    response = client.get(f"{API}/admin/pool", headers=auth(admin))
+
+    assert response.status_code == 200
+    primary = response.json()["primary"]
+    assert primary["pool_size"] == settings.DB_POOL_SIZE
+    assert primary["checkouts"] > 0
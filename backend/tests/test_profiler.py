@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from app.core.profiling import Profiler, profiler
+
+from conftest import API, auth, create_post
+
+
+@pytest.fixture
+def restore_profiler():
+    yield
+    profiler.configure(0.0, [], 10)
+    profiler.reset()
+
+
+def _waiting_in_project_code(started: threading.Event, done: threading.Event) -> None:
+    started.set()
+    done.wait()
+
+
+def test_sample_collects_busy_threads_as_collapsed_stacks():
+    local = Profiler(sample_rate=0.0, routes=[], interval_ms=10)
+    started, done = threading.Event(), threading.Event()
+    worker = threading.Thread(target=_waiting_in_project_code, args=(started, done))
+    worker.start()
+    started.wait()
+    try:
+        local.sample()
+    finally:
+        done.set()
+        worker.join()
+
+    [line] = [line for line in local.collapsed().splitlines() if "_waiting_in_project_code" in line]
+    stack, count = line.rsplit(" ", 1)
+    assert count == "1"
+    assert "_waiting_in_project_code (tests/test_profiler.py:" in stack
+    assert stack.split(";")[-1].startswith("wait (threading.py:")
+    assert local.samples >= 1
+
+
+def test_only_configured_routes_are_profiled(client, make_user, restore_profiler):
+    admin = make_user(is_superuser=True)
+    post = create_post(client, admin)
+
+    response = client.put(
+        f"{API}/admin/profiler",
+        json={"routes": [f"{API}/posts/{{post_id}}"], "interval_ms": 1},
+        headers=auth(admin),
+    )
+    assert response.json()["enabled"] is True
+
+    client.get(f"{API}/posts/")
+    client.get(f"{API}/posts/{post['id']}")
+
+    status = client.get(f"{API}/admin/profiler", headers=auth(admin)).json()
+    assert status["requests"] == 1
+    assert status["in_flight"] == 0
+    assert client.get(f"{API}/admin/profiler/flamegraph", headers=auth(admin)).headers["content-type"].startswith(
+        "text/plain"
+    )
+    assert client.delete(f"{API}/admin/profiler/samples", headers=auth(admin)).json()["requests"] == 0
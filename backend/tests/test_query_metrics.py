@@ -0,0 +1,50 @@
+import logging
+
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db import query_metrics
+from app.db.session import engine
+
+from conftest import API, create_post
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.setattr(settings, "DB_QUERY_METRICS", True)
+    monkeypatch.setattr(query_metrics, "metrics", query_metrics.QueryMetrics())
+    query_metrics.instrument(engine)
+    yield query_metrics.metrics
+    event.remove(engine, "before_cursor_execute", query_metrics._before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", query_metrics._after_cursor_execute)
+    event.remove(engine, "handle_error", query_metrics._handle_error)
+
+
+def test_statements_are_reported_per_request(client, make_user, metrics):
+    post = create_post(client, make_user())
+
+    response = client.get(f"{API}/posts/{post['id']}")
+    timing = response.headers["server-timing"]
+
+    assert 'db;dur=' in timing
+    assert 'desc="statements: ' in timing
+    assert "db-statement;dur=" in timing
+    rendered = metrics.render()
+    assert 'http_requests_total{method="GET",route="/api/v1/posts/{post_id}"} 1' in rendered
+    assert 'db_statements_per_request_bucket{method="GET",route="/api/v1/posts/{post_id}",le="+Inf"} 1' in rendered
+
+
+def test_requests_over_budget_are_logged(client, make_user, metrics, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "DB_STATEMENT_BUDGET", 0)
+    create_post(client, make_user())
+
+    with caplog.at_level(logging.WARNING, logger="app.db.query_metrics"):
+        client.get(f"{API}/posts/")
+
+    assert "GET /api/v1/posts/ issued" in caplog.text
+    assert 'db_statement_budget_exceeded_total{method="GET",route="/api/v1/posts/"} 1' in metrics.render()
+
+
+def test_descriptions_are_safe_for_the_header():
+    assert query_metrics._describe('SELECT "x"\n  FROM t\\', length=30) == "SELECT  x  FROM t "
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from app.core.ranking import hot_score
+from app.models.post import Post
+
+from conftest import API, auth, create_post
+
+
+def _titles(client, sort):
+    return [post["title"] for post in client.get(f"{API}/posts/", params={"sort": sort}).json()]
+
+
+def test_top_orders_by_likes_minus_dislikes(client, make_user):
+    alice, bob, carol = make_user(), make_user(), make_user()
+    loved, disliked, quiet = (create_post(client, alice, title) for title in ("Loved", "Disliked", "Quiet"))
+    for user in (bob, carol):
+        client.post(f"{API}/posts/{loved['id']}/like", headers=auth(user))
+        client.post(f"{API}/posts/{disliked['id']}/dislike", headers=auth(user))
+
+    assert _titles(client, "top") == ["Loved", "Quiet", "Disliked"]
+    assert _titles(client, "new") == ["Quiet", "Disliked", "Loved"]
+
+
+def test_hot_score_follows_reactions_and_decays_with_age(client, db, make_user):
+    alice, bob = make_user(), make_user()
+    old, fresh = create_post(client, alice, "Old"), create_post(client, alice, "Fresh")
+    stored = db.get(Post, old["id"])
+    stored.created_at = datetime.utcnow() - timedelta(days=2)
+    db.commit()
+
+    client.post(f"{API}/posts/{old['id']}/like", headers=auth(bob))
+
+    db.expire_all()
+    stored = db.get(Post, old["id"])
+    assert stored.score == 1
+    assert stored.hot_score == hot_score(1, 0, stored.created_at)
+    # One like doesn't outweigh two days
+    assert _titles(client, "hot") == ["Fresh", "Old"]
+
+
+def test_ranked_feeds_page_with_a_cursor(client, make_user):
+    alice = make_user()
+    for i in range(5):
+        create_post(client, alice, f"Post {i}")
+
+    first = client.get(f"{API}/posts/", params={"sort": "hot", "limit": 3})
+    second = client.get(
+        f"{API}/posts/", params={"sort": "hot", "limit": 3, "cursor": first.headers["X-Next-Cursor"]}
+    )
+
+    ids = [post["id"] for post in first.json() + second.json()]
+    assert len(ids) == len(set(ids)) == 5
+    assert "X-Next-Cursor" not in second.headers
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app.db import session
+from app.db.replicas import Replica, ReplicaSet
+from app.models.base import Base
+
+from conftest import API, auth, create_post
+
+
+def _replica(path, name="replica0"):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return Replica(name, engine)
+
+
+@pytest.fixture
+def lagging_replica(tmp_path, monkeypatch):
+    """
+    A replica that has not caught up with anything written in the test.
+    """
+    replica = _replica(tmp_path / "replica.db")
+    monkeypatch.setattr(session, "replicas", ReplicaSet([replica]))
+    yield replica
+    replica.engine.dispose()
+
+
+def _search(client, query, **kwargs):
+    return [post["title"] for post in client.get(f"{API}/posts/search", params={"q": query}, **kwargs).json()]
+
+
+def test_list_reads_go_to_the_replica(client, make_user, lagging_replica):
+    create_post(client, make_user(), "Fresh")
+
+    assert _search(client, "fresh") == []
+
+
+def test_reads_of_a_users_own_writes_stay_on_the_primary(client, make_user, lagging_replica):
+    alice, bob = make_user(), make_user()
+    post = create_post(client, alice, "Fresh")
+
+    assert client.get(f"{API}/posts/{post['id']}").status_code == 200
+    assert client.get(f"{API}/auth/me", headers=auth(alice)).json()["username"] == alice.username
+    liked = client.post(f"{API}/posts/{post['id']}/like", headers=auth(bob))
+    assert liked.json()["is_liked"] is True
+    # Feed cache fills render from the primary, not the lagging replica
+    assert [item["title"] for item in client.get(f"{API}/posts/").json()] == ["Fresh"]
+
+
+def test_unhealthy_replica_falls_back_to_the_primary(client, make_user, lagging_replica):
+    create_post(client, make_user(), "Fresh")
+    lagging_replica.healthy = False
+
+    assert _search(client, "fresh") == ["Fresh"]
+
+
+def test_replicas_take_turns_and_failed_checks_take_them_out(client, tmp_path):
+    first, second = _replica(tmp_path / "first.db", "first"), _replica(tmp_path / "second.db", "second")
+    unreachable = Replica("unreachable", create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"))
+    replicas = ReplicaSet([first, second, unreachable])
+
+    client.portal.call(replicas.check)
+
+    assert unreachable.healthy is False
+    assert [replicas.pick().name for _ in range(4)] == ["first", "second", "first", "second"]
+    first.healthy = second.healthy = False
+    assert replicas.pick() is None
+    client.portal.call(replicas.dispose)
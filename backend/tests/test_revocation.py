@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from jose import jwt
+
+from app.core import revocation
+from app.core.config import settings
+from app.models.blacklisted_token import BlacklistedToken
+
+from conftest import API, auth
+
+
+def test_logout_revokes_the_token_at_once(client, make_user):
+    headers = auth(make_user())
+
+    assert client.post(f"{API}/auth/logout", headers=headers).status_code == 200
+
+    assert client.get(f"{API}/auth/me", headers=headers).status_code == 401
+
+
+def test_logout_on_another_worker_applies_at_the_next_sync(client, db, make_user):
+    user = make_user()
+    headers = auth(user)
+    revocation.refresh()
+    assert client.get(f"{API}/auth/me", headers=headers).status_code == 200
+
+    # Another worker records the logout in the shared table only
+    token = headers["Authorization"].split()[1]
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    db.add(
+        BlacklistedToken(
+            jti=payload["jti"], expires_at=datetime.utcfromtimestamp(payload["exp"]), user_id=user.id
+        )
+    )
+    db.commit()
+    assert client.get(f"{API}/auth/me", headers=headers).status_code == 200
+
+    revocation.refresh()
+
+    assert client.get(f"{API}/auth/me", headers=headers).status_code == 401
+
+
+def test_expired_revocations_are_pruned_and_purged(db, make_user):
+    user = make_user()
+    past = datetime.utcnow() - timedelta(minutes=1)
+    revocation.revoke(db, jti="expired", expires_at=past, user_id=user.id)
+    assert revocation.revoked_tokens.is_revoked("expired")
+
+    revocation.refresh()
+
+    assert not revocation.revoked_tokens.is_revoked("expired")
+    assert db.query(BlacklistedToken).count() == 0
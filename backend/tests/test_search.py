@@ -0,0 +1,90 @@
+from sqlalchemy import create_mock_engine, select
+from sqlalchemy.orm import Session
+
+from app.db import fulltext
+from app.models.post import Post
+
+from conftest import API, auth, create_comment, create_post
+
+
+def test_title_matches_rank_above_body_matches(client, make_user):
+    alice = make_user()
+    create_post(client, alice, "Gardening", "All about tomatoes")
+    create_post(client, alice, "Tomatoes", "A summer crop")
+    create_post(client, alice, "Unrelated", "Nothing here")
+
+    response = client.get(f"{API}/posts/search", params={"q": "tomatoes"})
+
+    assert [post["title"] for post in response.json()] == ["Tomatoes", "Gardening"]
+
+
+def test_search_follows_edits_and_deletes(client, make_user):
+    alice = make_user()
+    post = create_post(client, alice, "Draft", "placeholder")
+
+    client.put(f"{API}/posts/{post['id']}", json={"body": "finished article"}, headers=auth(alice))
+    assert client.get(f"{API}/posts/search", params={"q": "placeholder"}).json() == []
+    assert len(client.get(f"{API}/posts/search", params={"q": "finished"}).json()) == 1
+
+    client.delete(f"{API}/posts/{post['id']}", headers=auth(alice))
+    assert client.get(f"{API}/posts/search", params={"q": "finished"}).json() == []
+
+
+def test_search_pages_with_a_cursor_and_takes_operators_literally(client, make_user):
+    alice = make_user()
+    for i in range(5):
+        create_post(client, alice, f"Match {i}", "needle")
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "needle", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"{API}/posts/search", params=params)
+        seen.extend(post["id"] for post in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 5
+
+    assert client.get(f"{API}/posts/search", params={"q": 'needle OR "NEAR(* -'}).status_code == 200
+    assert client.get(f"{API}/posts/search", params={"q": "needle", "cursor": "bogus"}).status_code == 400
+
+
+def test_comment_search(client, make_user):
+    alice = make_user()
+    post = create_post(client, alice)
+    create_comment(client, alice, post["id"], "A remark about bicycles")
+    create_comment(client, alice, post["id"], "Something else")
+
+    response = client.get(f"{API}/comments/search", params={"q": "bicycles"}, headers=auth(alice))
+
+    assert [comment["content"] for comment in response.json()] == ["A remark about bicycles"]
+
+
+def _search_all(client, path, headers=None):
+    seen, cursor = [], None
+    while True:
+        params = {"q": "needle", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=params, headers=headers)
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return seen
+
+
+def test_search_pages_through_tied_ranks(client, make_user):
+    alice = make_user()
+    post = create_post(client, alice, "Same", "needle")
+    posts = [post["id"]] + [create_post(client, alice, "Same", "needle")["id"] for _ in range(6)]
+    comments = [create_comment(client, alice, post["id"], "needle")["id"] for _ in range(7)]
+
+    # Every match has the same rank, so pages follow the id tie-breaker
+    assert _search_all(client, f"{API}/posts/search") == sorted(posts, reverse=True)
+    assert _search_all(client, f"{API}/comments/search", auth(alice)) == sorted(comments, reverse=True)
+
+
+def test_postgres_rank_is_a_double():
+    mock = create_mock_engine("postgresql://", lambda *args, **kwargs: None)
+
+    stmt = select(fulltext.matches(Session(bind=mock), Post.__table__, "needle"))
+
+    assert "AS DOUBLE PRECISION) AS rank" in str(stmt.compile(mock))
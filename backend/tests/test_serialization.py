@@ -0,0 +1,47 @@
+import json
+from typing import List
+
+from app.core.serialization import construct, dump_json
+from app.crud import post as crud_post
+from app.models.post import Post
+from app.schemas.post import PostSummary
+
+from conftest import API, create_comment, create_post
+
+
+def test_fast_path_matches_validated_serialization(client, db, make_user):
+    alice = make_user()
+    post = create_post(client, alice)
+    create_comment(client, alice, post["id"])
+
+    posts, _ = crud_post.get_feed(db, preview=1)
+    validated = [PostSummary.model_validate(item.model_dump()) for item in posts]
+
+    assert json.loads(dump_json(List[PostSummary], posts)) == json.loads(
+        dump_json(List[PostSummary], validated)
+    )
+
+
+def test_construct_reads_loaded_attributes_without_lazy_loading(client, db, make_user):
+    alice = make_user()
+    post = create_post(client, alice)
+    stored = db.get(Post, post["id"])
+    db.expunge(stored)
+
+    summary = construct(PostSummary, stored, author=None)
+
+    assert summary.id == post["id"]
+    assert summary.title == post["title"]
+    assert summary.author is None
+
+
+def test_include_limits_every_item(client, make_user):
+    alice = make_user()
+    create_post(client, alice, "One")
+    create_post(client, alice, "Two")
+
+    response = client.get(f"{API}/posts/?fields=title")
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [{"id": item["id"], "title": item["title"]} for item in response.json()]
+    assert [item["title"] for item in response.json()] == ["Two", "One"]
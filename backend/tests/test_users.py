@@ -0,0 +1,40 @@
+from conftest import API, auth, create_comment, create_post
+
+
+def test_profile_counts_posts_comments_and_likes(client, make_user):
+    alice, bob = make_user(), make_user()
+    post = create_post(client, alice)
+    create_comment(client, alice, post["id"])
+    client.post(f"{API}/posts/{post['id']}/like", headers=auth(bob))
+
+    profile = client.get(f"{API}/users/{alice.id}").json()
+
+    assert (profile["post_count"], profile["comment_count"], profile["likes_received"]) == (1, 1, 1)
+    assert client.get(f"{API}/users/999").status_code == 404
+
+
+def test_timelines_need_no_login_and_page_newest_first(client, make_user):
+    alice, bob = make_user(), make_user()
+    post = create_post(client, bob)
+    for i in range(3):
+        create_post(client, alice, f"Post {i}")
+        create_comment(client, alice, post["id"], f"Comment {i}")
+
+    posts = client.get(f"{API}/users/{alice.id}/posts", params={"limit": 2})
+    comments = client.get(f"{API}/users/{alice.id}/comments", params={"limit": 2})
+
+    assert [item["title"] for item in posts.json()] == ["Post 2", "Post 1"]
+    assert [item["content"] for item in comments.json()] == ["Comment 2", "Comment 1"]
+    rest = client.get(
+        f"{API}/users/{alice.id}/comments", params={"limit": 2, "cursor": comments.headers["X-Next-Cursor"]}
+    )
+    assert [item["content"] for item in rest.json()] == ["Comment 0"]
+
+
+def test_timelines_of_unknown_users_are_404(client, make_user):
+    quiet = make_user()
+
+    assert client.get(f"{API}/users/{quiet.id}/posts").json() == []
+    assert client.get(f"{API}/users/{quiet.id}/comments").json() == []
+    assert client.get(f"{API}/users/999/posts").status_code == 404
+    assert client.get(f"{API}/users/999/comments").status_code == 404